@@ -0,0 +1,136 @@
+"""
+Background autosave for the Library Management System
+
+LibraryUI calls AutoSaver.request() after each change instead of
+lms.save_data(). A writer thread waits until requests have been quiet for
+`interval` seconds (or `max_delay` has passed since the first unsaved one),
+then saves once for the whole burst. LibraryManagementSystem.save_data()
+copies the records under lms.lock and writes the temp file + rename outside
+it, so the Tk thread only ever waits for the copy.
+"""
+
+import threading
+import time
+
+
+class AutoSaver:
+    def __init__(self, lms, interval=0.5, max_delay=5.0):
+        self.lms = lms
+        self.interval = interval
+        self.max_delay = max_delay
+        self.pending = 0
+        self.saves = 0
+        self.coalesced = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.errors = 0
+        self.last_error = None
+        self._first_request = None
+        self._last_request = None
+        self._flush_requested = False
+        self._saving = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='library-autosave', daemon=True)
+        self._thread.start()
+
+    def request(self):
+        """Mark the library dirty; the save happens later on the writer thread."""
+        with self._condition:
+            now = time.monotonic()
+            if not self.pending:
+                self._first_request = now
+            self.pending += 1
+            self._last_request = now
+            self._condition.notify()
+
+    def _due_in(self):
+        # Seconds until the pending burst should be written, 0 when it is due now
+        if self._flush_requested or self._closed:
+            return 0
+        now = time.monotonic()
+        return max(0, min(self._last_request + self.interval, self._first_request + self.max_delay) - now)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self.pending and not self._closed:
+                    self._condition.wait()
+                while self.pending and self._due_in() > 0:
+                    self._condition.wait(self._due_in())
+                if not self.pending:
+                    return
+                batch = self.pending
+                self.pending = 0
+                self._flush_requested = False
+                self._saving = True
+
+            start = time.perf_counter()
+            try:
+                self.lms.save_data()
+                error = None
+            except Exception as e:
+                error = e
+            latency = time.perf_counter() - start
+
+            with self._condition:
+                self._saving = False
+                if error is None:
+                    self.saves += 1
+                    self.coalesced += batch - 1
+                    self.last_latency = latency
+                    self.max_latency = max(self.max_latency, latency)
+                    self.last_error = None
+                else:
+                    # Keep the changes queued and retry after the next interval; once closed, stop and
+                    # leave them counted in pending so close() reports them
+                    self.errors += 1
+                    self.last_error = error
+                    self.pending += batch
+                    self._first_request = self._last_request = time.monotonic()
+                self._condition.notify_all()
+                if error is not None and self._closed:
+                    return
+
+    def flush(self, timeout=None):
+        """Write any pending changes now and wait for the save; False if it failed or timed out."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            errors = self.errors
+            if self.pending:
+                self._flush_requested = True
+                self._condition.notify()
+            while self.pending or self._saving:
+                if self.errors != errors:
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """Flush-on-exit hook: save pending changes and stop the writer thread.
+
+        Returns False if changes are left unsaved: the final save failed (see
+        last_error) or did not finish within timeout.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        with self._condition:
+            return not self._thread.is_alive() and not self.pending
+
+    def stats(self):
+        with self._condition:
+            return {
+                'queue_depth': self.pending,
+                'saving': self._saving,
+                'saves': self.saves,
+                'coalesced': self.coalesced,
+                'last_latency_ms': None if self.last_latency is None else round(self.last_latency * 1000, 1),
+                'max_latency_ms': round(self.max_latency * 1000, 1),
+                'errors': self.errors,
+                'last_error': None if self.last_error is None else str(self.last_error)
+            }
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmarks for the Library Management System
+
+Usage: python benchmark.py [--sizes 1k,10k,100k,1m] [--output results.json]
+                           [--baseline benchmark_baseline.json] [--save-baseline]
+                           [--tolerance 0.5]
+
+For each size a deterministic synthetic library is generated (N books,
+N/10 members, N/5 loans with issue dates spread over the last six weeks so
+a realistic share is overdue), written as a schema v2 data file, and the
+core operations are timed against it: load_data, save_data,
+search_books_recursive, issue_book, return_book, get_overdue_books,
+calculate_total_late_fees, delete_book, and the LibraryUI table refresh
+run headless against stand-in trees. Results are written as JSON; with a
+baseline, any case slower than baseline * (1 + tolerance) fails the run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import schema
+from headless import headless_ui
+from library_core import CATEGORIES, LibraryManagementSystem
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+ADJECTIVES = ('Silent', 'Hidden', 'Last', 'Broken', 'Golden', 'Distant', 'Secret', 'Endless',
+              'Forgotten', 'Burning', 'Quiet', 'Final', 'Little', 'Wild', 'Dark', 'Bright')
+NOUNS = ('River', 'Empire', 'Garden', 'Machine', 'Kingdom', 'Voyage', 'Mountain', 'City',
+         'Winter', 'Ocean', 'History', 'Algorithm', 'Forest', 'Letter', 'Island', 'Star')
+FIRST_NAMES = ('James', 'Mary', 'Ada', 'Alan', 'Grace', 'Carl', 'Ursula', 'Frank', 'Toni', 'Isaac',
+               'Jane', 'Leo', 'Maya', 'Omar', 'Chen', 'Priya', 'Sofia', 'Kenji', 'Amara', 'Ivan')
+LAST_NAMES = ('Smith', 'Lovelace', 'Turing', 'Hopper', 'Sagan', 'Le Guin', 'Herbert', 'Morrison',
+              'Asimov', 'Austen', 'Tolstoy', 'Angelou', 'Khan', 'Wei', 'Patel', 'Garcia', 'Sato', 'Okafor')
+SEARCH_QUERIES = ('river', 'golden empire', 'tur', 'science', 'hidden kingdom 1', 'le guin', 'zzz')
+LOAN_DAYS = 14
+
+
+def generate_library(books, members=None, loans=None, seed=0, as_of=None):
+    """Build the contents of a schema v2 library_data.json; the same arguments give the same data."""
+    members = max(1, books // 10) if members is None else members
+    loans = min(books // 5, members * 3) if loans is None else loans
+    if loans > min(books, members * 3):
+        raise ValueError(f"Cannot issue {loans} loans with {books} books and {members} members (3 per member)")
+    rng = random.Random(seed)
+    now = schema.to_epoch(as_of or datetime.now())
+
+    book_ids = [str(i + 1).zfill(4) for i in range(books)]
+    member_ids = [str(i + 1).zfill(4) for i in range(members)]
+    book_table = {
+        book_id: {
+            'title': f"The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.randrange(books)}",
+            'author': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'category': rng.choice(CATEGORIES),
+            'isbn': f"978{rng.randrange(10 ** 10):010d}",
+            'status': 'Available',
+            'issued_to': None
+        }
+        for book_id in book_ids
+    }
+    member_table = {
+        member_id: {
+            'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'email': f"member{member_id}@example.com",
+            'phone': f"555-{rng.randrange(10000):04d}",
+            'join_date': schema.from_epoch(now - rng.randrange(5 * 365) * schema.SECONDS_PER_DAY).strftime('%Y-%m-%d')
+        }
+        for member_id in member_ids
+    }
+
+    # Most loans are recent, with a long tail of forgotten ones past the 14-day period
+    issued_books = {}
+    borrowers = [member_id for member_id in member_ids for _ in range(3)]
+    rng.shuffle(borrowers)
+    for book_id, member_id in zip(rng.sample(book_ids, loans), borrowers):
+        issue_ts = now - int(rng.triangular(0, 42, 5) * schema.SECONDS_PER_DAY)
+        issued_books.setdefault(member_id, []).append({
+            'book_id': book_id, 'issue_ts': issue_ts, 'due_ts': issue_ts + LOAN_DAYS * schema.SECONDS_PER_DAY
+        })
+        book_table[book_id]['status'] = 'Issued'
+        book_table[book_id]['issued_to'] = member_id
+
+    return {
+        'schema_version': schema.SCHEMA_VERSION,
+        'books': book_table,
+        'members': member_table,
+        'issued_books': issued_books
+    }
+
+
+def write_library(path, books, **options):
+    with open(path, 'w') as f:
+        json.dump(generate_library(books, **options), f)
+    return path
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def per_op(seconds, ops):
+    return {'ms': round(seconds * 1000 / max(1, ops), 4), 'ops': ops}
+
+
+def run_size(count, directory, ops=200, seed=0):
+    """Time every case against a generated library of `count` books; returns {case: {'ms', 'ops'}}."""
+    data_file = write_library(os.path.join(directory, f"library_{count}.json"), count, seed=seed)
+    results = {}
+
+    seconds, lms = timed(LibraryManagementSystem, data_file)
+    results['load_data'] = per_op(seconds, 1)
+    results['save_data'] = per_op(timed(lms.save_data)[0], 1)
+
+    seconds = sum(timed(lms.search_books_recursive, query)[0] for query in SEARCH_QUERIES)
+    results['search_books_recursive'] = per_op(seconds, len(SEARCH_QUERIES))
+
+    for name, function in (('get_overdue_books', lms.get_overdue_books),
+                           ('calculate_total_late_fees', lms.calculate_total_late_fees)):
+        results[name] = per_op(sum(timed(function)[0] for _ in range(5)), 5)
+
+    rng = random.Random(seed)
+    available = [book_id for book_id, book in lms.books.items() if book['status'] == 'Available']
+    free_members = [member_id for member_id in lms.members if len(lms.issued_books.get(member_id, ())) < 3]
+    pairs = list(zip(rng.sample(available, min(ops, len(available))), free_members))
+    results['issue_book'] = per_op(sum(timed(lms.issue_book, *pair)[0] for pair in pairs), len(pairs))
+    results['return_book'] = per_op(sum(timed(lms.return_book, *pair)[0] for pair in pairs), len(pairs))
+
+    ui = headless_ui(lms)
+    results['ui_load_data'] = per_op(timed(ui.load_data)[0], 1)
+    seconds = 0
+    for pair in pairs:
+        lms.issue_book(*pair)
+        seconds += timed(ui.apply_changes)[0]
+        lms.return_book(*pair)
+        seconds += timed(ui.apply_changes)[0]
+    results['ui_apply_changes'] = per_op(seconds, 2 * len(pairs))
+    # What VirtualTreeview does on refresh: re-read the keys and build the first screen of rows
+    from widgets import RowSource
+    sources = (RowSource(lambda: lms.books, ui.book_row), RowSource(lambda: lms.members, ui.member_row),
+               RowSource(ui.issued_loans, ui.issued_row, iid=lambda loan: loan[1]['book_id']))
+    start = time.perf_counter()
+    for source in sources:
+        source.refresh()
+        source.rows(0, 50)
+    results['ui_virtual_refresh'] = per_op(time.perf_counter() - start, 1)
+
+    victims = [book_id for book_id, _ in pairs]
+    results['delete_book'] = per_op(sum(timed(lms.delete_book, book_id)[0] for book_id in victims), len(victims))
+    lms.close()
+    os.remove(data_file)
+    return results
+
+
+def run(sizes, ops=200, seed=0, progress=None):
+    directory = tempfile.mkdtemp()
+    try:
+        results = {}
+        for label in sizes:
+            if label not in SIZES:
+                raise ValueError(f"Unknown size '{label}' (expected one of: {', '.join(SIZES)})")
+            results[label] = run_size(SIZES[label], directory, ops=ops, seed=seed)
+            if progress:
+                progress(label, results[label])
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': datetime.now().strftime(schema.DATE_FORMAT),
+        'seed': seed,
+        'results': results
+    }
+
+
+def compare(current, baseline, tolerance=0.5, min_delta_ms=0.05):
+    """(size, case, baseline_ms, current_ms) for every case slower than baseline * (1 + tolerance).
+
+    Differences under min_delta_ms are ignored so sub-millisecond noise does
+    not fail the run. Sizes and cases missing from either side are skipped.
+    """
+    regressions = []
+    for label, cases in current['results'].items():
+        for case, result in cases.items():
+            base = baseline['results'].get(label, {}).get(case)
+            if base is None:
+                continue
+            if result['ms'] > base['ms'] * (1 + tolerance) and result['ms'] - base['ms'] > min_delta_ms:
+                regressions.append((label, case, base['ms'], result['ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time library operations at increasing catalogue sizes")
+    parser.add_argument('--sizes', default='1k,10k,100k,1m', help="comma-separated sizes from: " + ', '.join(SIZES))
+    parser.add_argument('--ops', type=int, default=200, help="issue/return/delete operations timed per size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default='benchmark_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed slowdown (0.5 = 50%%)")
+    args = parser.parse_args(argv)
+
+    def show(label, cases):
+        print(f"📊 {label} books")
+        for case, result in cases.items():
+            print(f"   {case:<26} {result['ms']:>12.3f} ms  (x{result['ops']})")
+
+    try:
+        current = run([size.strip().lower() for size in args.sizes.split(',')], ops=args.ops, seed=args.seed,
+                      progress=show)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️ No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.tolerance)
+    for label, case, base_ms, current_ms in regressions:
+        print(f"❌ {label} {case}: {base_ms:.3f} ms -> {current_ms:.3f} ms")
+    if regressions:
+        return 1
+    print(f"✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped binary snapshots of the library
+
+Usage: python binary_snapshot.py library_data.json [library_data.lmsnap]
+
+A snapshot holds the same data as library_data.json in fixed-width records:
+
+    header      magic, length of the JSON metadata
+    metadata    schema_version, journal/shared seq, section offsets and
+                the category and status names the records refer to by number
+    books       42 bytes each, sorted by book_id: string refs for the id,
+                title, author, isbn and issued_to, category and status codes
+    members     40 bytes each, sorted by member_id
+    loans       32 bytes each: member and book id refs, issue and due epoch seconds
+    heap        the UTF-8 strings, each stored once
+
+A string ref is (offset into the heap, byte length). Snapshot opens the file
+with mmap and MappedTable finds a record by binary search over the sorted
+ids, decoding only what it reads, so opening a multi-million-book snapshot
+costs a few page reads. LibraryManagementSystem(snapshot='binary') keeps its
+changes in an Overlay on top of the mapped tables and writes a new snapshot
+(temp file + rename) on save, then maps the new file and moves the
+overlays onto it (Overlay.rebase). Windows cannot rename over a mapped
+file, so there the old mapping is closed first.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping, MutableMapping
+
+import schema
+
+MAGIC = b'LMSNAP\x00\x01'
+EXTENSION = '.lmsnap'
+HEADER = struct.Struct('<8sI')
+REF = struct.Struct('<II')
+BOOK = struct.Struct('<10IBB')
+MEMBER = struct.Struct('<10I')
+LOAN = struct.Struct('<4Iqq')
+NULL = 0xFFFFFFFF
+BOOK_STRINGS = ('title', 'author', 'isbn', 'issued_to')
+MEMBER_STRINGS = ('name', 'email', 'phone', 'join_date')
+TABLES = ('books', 'members', 'issued_books')
+# Windows cannot replace a file that is still mapped; elsewhere the old mapping stays valid until released
+UNMAP_BEFORE_REPLACE = os.name == 'nt'
+
+
+def snapshot_path(data_file):
+    """library_data.json -> library_data.lmsnap"""
+    return os.path.splitext(data_file)[0] + EXTENSION
+
+
+class _Heap:
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = {}
+
+    def ref(self, text):
+        """(offset, length) of text, adding it the first time it is seen; None -> NULL."""
+        if text is None:
+            return NULL, 0
+        ref = self.offsets.get(text)
+        if ref is None:
+            encoded = str(text).encode('utf-8')
+            ref = self.offsets[text] = (len(self.data), len(encoded))
+            self.data += encoded
+        return ref
+
+
+def write_snapshot(path, data, replace=os.replace):
+    """Write data (the dict _serialize() builds) as a snapshot; returns the file size.
+
+    The file is written to path + '.tmp' and moved into place with
+    replace(tmp_file, path), which must first close any mapping of path
+    where UNMAP_BEFORE_REPLACE is set.
+    """
+    heap = _Heap()
+    categories, statuses = {}, {}
+    books = data.get('books', {})
+    members = data.get('members', {})
+
+    book_section = bytearray()
+    for book_id in sorted(books):
+        book = books[book_id]
+        refs = [heap.ref(book_id)] + [heap.ref(book[field]) for field in BOOK_STRINGS]
+        category = categories.setdefault(book['category'], len(categories))
+        status = statuses.setdefault(book['status'], len(statuses))
+        book_section += BOOK.pack(*(value for ref in refs for value in ref), category, status)
+    if len(categories) > 255 or len(statuses) > 255:
+        raise ValueError("A binary snapshot holds at most 255 categories and statuses")
+
+    member_section = bytearray()
+    for member_id in sorted(members):
+        member = members[member_id]
+        refs = [heap.ref(member_id)] + [heap.ref(member[field]) for field in MEMBER_STRINGS]
+        member_section += MEMBER.pack(*(value for ref in refs for value in ref))
+
+    loans = sorted(((member_id, loan if isinstance(loan, dict) else loan.to_storage())
+                    for member_id, issued_list in data.get('issued_books', {}).items() for loan in issued_list),
+                   key=lambda entry: entry[1]['due_ts'])
+    loan_section = bytearray()
+    for member_id, loan in loans:
+        loan_section += LOAN.pack(*heap.ref(member_id), *heap.ref(loan['book_id']), loan['issue_ts'], loan['due_ts'])
+
+    meta = {key: value for key, value in data.items() if key not in TABLES}
+    meta['categories'] = list(categories)
+    meta['statuses'] = list(statuses)
+    sections = [('books', book_section, len(books)), ('members', member_section, len(members)),
+                ('loans', loan_section, len(loans)), ('heap', heap.data, len(heap.data))]
+    # Section offsets count from the end of the metadata
+    meta['sections'] = {}
+    offset = 0
+    for name, section, count in sections:
+        meta['sections'][name] = [offset, count]
+        offset += len(section)
+    encoded = json.dumps(meta).encode('utf-8')
+
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, section, count in sections:
+            f.write(section)
+        size = f.tell()
+    replace(tmp_file, path)
+    return size
+
+
+class MappedTable(Mapping):
+    """Read-only id -> record dict view of one section of a mapped snapshot."""
+
+    def __init__(self, buffer, heap, offset, count, record, decode):
+        self._buffer = buffer
+        self._heap = heap
+        self._offset = offset
+        self._count = count
+        self._record = record
+        self._decode = decode
+
+    def _string(self, offset, length):
+        if offset == NULL:
+            return None
+        start = self._heap + offset
+        return str(self._buffer[start:start + length], 'utf-8')
+
+    def _key(self, i):
+        return self._string(*REF.unpack_from(self._buffer, self._offset + i * self._record.size))
+
+    def _find(self, key):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self._count and self._key(low) == key else -1
+
+    def _fields(self, i):
+        return self._record.unpack_from(self._buffer, self._offset + i * self._record.size)
+
+    def __getitem__(self, key):
+        i = self._find(key) if isinstance(key, str) else -1
+        if i < 0:
+            raise KeyError(key)
+        return self._decode(self._string, self._fields(i))
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._key(i)
+
+    def __len__(self):
+        return self._count
+
+    def items(self):
+        # The id ref comes first in every record type
+        string, decode = self._string, self._decode
+        for fields in self._record.iter_unpack(
+                self._buffer[self._offset:self._offset + self._count * self._record.size]):
+            yield string(fields[0], fields[1]), decode(string, fields)
+
+    def values(self):
+        for key, record in self.items():
+            yield record
+
+
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a library snapshot")
+        self.meta = json.loads(self._map[HEADER.size:HEADER.size + meta_length])
+        if self.meta.get('schema_version') != schema.SCHEMA_VERSION:
+            raise ValueError(f"{path} has schema version {self.meta.get('schema_version')}, "
+                             f"expected {schema.SCHEMA_VERSION}; convert it from the JSON file again")
+        sections = self.meta.pop('sections')
+        base = HEADER.size + meta_length
+        heap = base + sections['heap'][0]
+        categories = self.meta.pop('categories')
+        statuses = self.meta.pop('statuses')
+
+        def book(string, fields):
+            return {'title': string(fields[2], fields[3]), 'author': string(fields[4], fields[5]),
+                    'category': categories[fields[10]], 'isbn': string(fields[6], fields[7]),
+                    'status': statuses[fields[11]], 'issued_to': string(fields[8], fields[9])}
+
+        def member(string, fields):
+            return {'name': string(fields[2], fields[3]), 'email': string(fields[4], fields[5]),
+                    'phone': string(fields[6], fields[7]), 'join_date': string(fields[8], fields[9])}
+
+        self.books = MappedTable(self._map, heap, base + sections['books'][0], sections['books'][1], BOOK, book)
+        self.members = MappedTable(self._map, heap, base + sections['members'][0], sections['members'][1],
+                                   MEMBER, member)
+        self._heap = heap
+        self._loans = (base + sections['loans'][0], sections['loans'][1])
+
+    def close(self):
+        """Unmap the file; the tables read from it raise ValueError afterwards."""
+        self._map.close()
+
+    def loans(self):
+        """(member_id, book_id, issue_ts, due_ts) for every loan, earliest due date first."""
+        offset, count = self._loans
+        buffer, heap = self._map, self._heap
+        for member_offset, member_length, book_offset, book_length, issue_ts, due_ts in LOAN.iter_unpack(
+                buffer[offset:offset + count * LOAN.size]):
+            yield (str(buffer[heap + member_offset:heap + member_offset + member_length], 'utf-8'),
+                   str(buffer[heap + book_offset:heap + book_offset + book_length], 'utf-8'),
+                   issue_ts, due_ts)
+
+
+class Overlay(MutableMapping):
+    """A writable table over a MappedTable.
+
+    A record read through [] is decoded once and kept, so changing it in
+    place (book['status'] = 'Issued') sticks; added and replaced records
+    live here too and deleted ids are remembered. items() and values() pass
+    over untouched records without keeping them, so a save or an index
+    build does not pull the whole snapshot into memory.
+    """
+
+    def __init__(self, base, make_record=None):
+        self.base = base
+        self._make_record = make_record or (lambda record: record)
+        self._records = {}
+        self._added = set()
+        self._deleted = set()
+        # Added ids deleted again since the last rebase; a newer base may hold them
+        self._dropped = set()
+
+    def rebase(self, base):
+        """Move onto base, a newer snapshot of this table written from this overlay.
+
+        Records kept here stay; ids added or deleted before that snapshot was
+        taken are already in it, so only later changes are still tracked.
+        """
+        self._added = {key for key in self._added.union(self._records) if key not in base}
+        self._deleted = {key for key in self._deleted.union(self._dropped) if key in base}
+        self._dropped = set()
+        self.base = base
+
+    def __getitem__(self, key):
+        record = self._records.get(key)
+        if record is None:
+            if key in self._deleted:
+                raise KeyError(key)
+            record = self._records[key] = self._make_record(self.base[key])
+        return record
+
+    def __setitem__(self, key, record):
+        if key not in self._records and key not in self._deleted and key not in self.base:
+            self._added.add(key)
+        self._deleted.discard(key)
+        self._dropped.discard(key)
+        self._records[key] = record
+
+    def __delitem__(self, key):
+        if key in self._added:
+            self._added.discard(key)
+            self._dropped.add(key)
+        elif key in self._deleted or key not in self.base:
+            raise KeyError(key)
+        else:
+            self._deleted.add(key)
+        self._records.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._records or (key not in self._deleted and key in self.base)
+
+    def __iter__(self):
+        deleted = self._deleted
+        for key in self.base:
+            if key not in deleted:
+                yield key
+        yield from list(self._added)
+
+    def __len__(self):
+        return len(self.base) - len(self._deleted) + len(self._added)
+
+    def items(self):
+        records, deleted = self._records, self._deleted
+        for key, record in self.base.items():
+            if key in deleted:
+                continue
+            kept = records.get(key)
+            yield key, record if kept is None else kept
+        for key in list(self._added):
+            record = records.get(key)
+            if record is not None:
+                yield key, record
+
+    def values(self):
+        for key, record in self.items():
+            yield record
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) not in (1, 2):
+        print("Usage: python binary_snapshot.py library_data.json [library_data.lmsnap]")
+        return 1
+    source = argv[0]
+    target = argv[1] if len(argv) == 2 else snapshot_path(source)
+    with open(source) as f:
+        data = schema.migrate(json.load(f))
+    size = write_snapshot(target, data)
+    print(f"✅ Wrote {len(data.get('books', {})):,} books and {len(data.get('members', {})):,} members "
+          f"to {target} ({size / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
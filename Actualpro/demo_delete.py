@@ -3,7 +3,7 @@
 Demonstration of Delete Functionality in Library Management System
 """
 
-from library import LibraryManagementSystem
+from library_core import LibraryManagementSystem
 
 def demo_delete_functionality():
     """Demonstrate the delete functionality"""
@@ -0,0 +1,117 @@
+"""
+Batch late-fee and circulation engine for month-end billing
+
+Active loans are held as column arrays (member index, book id, due date as
+epoch seconds) so
+overdue masks, per-member fee totals and fee histograms are computed in a few
+vectorized passes. NumPy is optional; without it the same results are
+computed in pure Python.
+"""
+
+from datetime import datetime
+
+from schema import SECONDS_PER_DAY, to_epoch
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FEE_PER_DAY = 1.0
+# Lower edges (days overdue) of the fee histogram buckets
+HISTOGRAM_EDGES = (1, 8, 15, 31, 61)
+
+
+def histogram_labels(edges=HISTOGRAM_EDGES):
+    return [f"{low}-{high - 1} days" for low, high in zip(edges, edges[1:])] + [f"{edges[-1]}+ days"]
+
+
+class LoanBatch:
+    def __init__(self, member_ids, book_ids, due_timestamps):
+        self.members = list(dict.fromkeys(member_ids))
+        member_index = {member_id: i for i, member_id in enumerate(self.members)}
+        self.book_ids = list(book_ids)
+        if np is not None:
+            self.member_codes = np.fromiter((member_index[member_id] for member_id in member_ids),
+                                            dtype=np.int64, count=len(member_ids))
+            self.due_timestamps = np.array(due_timestamps, dtype=np.int64)
+        else:
+            self.member_codes = [member_index[member_id] for member_id in member_ids]
+            self.due_timestamps = list(due_timestamps)
+
+    @classmethod
+    def from_library(cls, lms):
+        due_index = lms.due_index
+        loans_by_book = lms.loans_by_book
+        return cls([loans_by_book[book_id][0] for book_id in due_index.book_ids],
+                   due_index.book_ids, due_index.due_timestamps)
+
+    def __len__(self):
+        return len(self.book_ids)
+
+    def days_overdue(self, as_of):
+        """Whole days past due per loan (negative while the loan is still running)."""
+        now = to_epoch(as_of)
+        if np is not None:
+            return (now - self.due_timestamps) // SECONDS_PER_DAY
+        return [(now - due_ts) // SECONDS_PER_DAY for due_ts in self.due_timestamps]
+
+    def overdue_mask(self, as_of):
+        days = self.days_overdue(as_of)
+        if np is not None:
+            return days > 0
+        return [day > 0 for day in days]
+
+    def fees(self, as_of, fee_per_day=FEE_PER_DAY):
+        days = self.days_overdue(as_of)
+        if np is not None:
+            return np.maximum(days, 0) * fee_per_day
+        return [max(0, day) * fee_per_day for day in days]
+
+    def member_totals(self, as_of, fee_per_day=FEE_PER_DAY):
+        """member_id -> total late fee, for members who owe something."""
+        fees = self.fees(as_of, fee_per_day)
+        if np is not None:
+            totals = np.bincount(self.member_codes, weights=fees, minlength=len(self.members))
+            owing = np.nonzero(totals)[0]
+            return {self.members[i]: float(totals[i]) for i in owing}
+        totals = {}
+        for code, fee in zip(self.member_codes, fees):
+            if fee:
+                member_id = self.members[code]
+                totals[member_id] = totals.get(member_id, 0) + fee
+        return totals
+
+    def fee_histogram(self, as_of, edges=HISTOGRAM_EDGES):
+        """Count of overdue loans per days-overdue bucket, as (label, count) pairs."""
+        labels = histogram_labels(edges)
+        days = self.days_overdue(as_of)
+        if np is not None:
+            counts = np.histogram(days, bins=list(edges) + [np.iinfo(np.int64).max])[0].tolist()
+        else:
+            counts = [0] * len(edges)
+            for day in days:
+                for i in range(len(edges) - 1, -1, -1):
+                    if day >= edges[i]:
+                        counts[i] += 1
+                        break
+        return list(zip(labels, counts))
+
+
+def late_fee_report(lms, as_of=None, fee_per_day=FEE_PER_DAY):
+    as_of = as_of or datetime.now()
+    batch = LoanBatch.from_library(lms)
+    fees = batch.fees(as_of, fee_per_day)
+    mask = batch.overdue_mask(as_of)
+    if np is not None:
+        overdue_loans, total_fees = int(np.count_nonzero(mask)), float(fees.sum())
+    else:
+        overdue_loans, total_fees = sum(mask), float(sum(fees))
+    return {
+        'as_of': as_of,
+        'active_loans': len(batch),
+        'overdue_loans': overdue_loans,
+        'total_fees': total_fees,
+        'member_totals': batch.member_totals(as_of, fee_per_day),
+        'histogram': batch.fee_histogram(as_of)
+    }
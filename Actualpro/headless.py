@@ -0,0 +1,71 @@
+"""
+Stand-ins for the Tk widgets LibraryUI writes to
+
+benchmark.py and the UI tests drive the real LibraryUI table code against
+these, so it runs without a display. HeadlessTree keeps the rows the way
+ttk.Treeview would and counts the item calls made on it.
+"""
+
+
+class HeadlessTree:
+    """The ttk.Treeview calls LibraryUI makes, kept in a dict and a list of visible rows"""
+
+    def __init__(self):
+        self.items = {}
+        self.order = []
+        self.calls = 0
+
+    def get_children(self):
+        return list(self.order)
+
+    def exists(self, iid):
+        return iid in self.items
+
+    def insert(self, parent, index, iid, values):
+        self.calls += 1
+        self.items[iid] = values
+        self.order.append(iid)
+
+    def item(self, iid, values):
+        self.calls += 1
+        self.items[iid] = values
+
+    def delete(self, *iids):
+        self.calls += 1
+        for iid in iids:
+            del self.items[iid]
+            if iid in self.order:
+                self.order.remove(iid)
+
+    def detach(self, *iids):
+        self.calls += 1
+        detached = set(iids)
+        self.order = [iid for iid in self.order if iid not in detached]
+
+    def move(self, iid, parent, index):
+        self.calls += 1
+        if iid in self.order:
+            self.order.remove(iid)
+        self.order.insert(index, iid)
+
+
+class HeadlessLabel:
+    def config(self, text):
+        self.text = text
+
+
+def headless_ui(lms):
+    """A LibraryUI over lms with headless trees, subscribed to its changes; call load_data() to fill it."""
+    # The Tk modules are only loaded here, so importing this module stays cheap
+    from library import LibraryUI
+    ui = LibraryUI.__new__(LibraryUI)
+    ui.lms = lms
+    ui._changed = {'books': set(), 'members': set(), 'loans': set()}
+    ui.filter_query = ''
+    ui.hidden_books = set()
+    ui.book_search = None
+    ui.filter_label = HeadlessLabel()
+    ui.books_tree, ui.members_tree, ui.issued_tree = HeadlessTree(), HeadlessTree(), HeadlessTree()
+    if hasattr(lms, 'subscribe'):
+        lms.subscribe(ui.on_change)
+    return ui
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Bulk catalogue import for the Library Management System
+
+Usage: python importer.py books.csv [--format csv|jsonl|mrk] [--data-file library_data.json]
+                          [--workers N] [--chunk-size N] [--default-category Fiction]
+                          [--errors bad_rows.csv] [--dry-run]
+
+Rows are streamed from the file in chunks, parsed and validated in a
+process pool (required fields, ISBN-10/13 checksum, category mapped onto
+LibraryManagementSystem.categories), deduplicated by ISBN against the
+catalogue and the rest of the file, and added with one bulk_add_books per
+chunk. Each chunk is its own transaction: the library lock is held and
+undo entries are kept only for that chunk, and the data file (or journal)
+is saved after it. If the import stops partway, the chunks already added
+stay in the catalogue and a rerun skips them as duplicates.
+
+Supported inputs: CSV with a header row (title, author, category, isbn),
+JSON Lines with the same keys, and MARC-like mnemonic text (.mrk, one
+"=TAG  ind$a..." field per line, records separated by blank lines).
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+FORMATS = ('csv', 'jsonl', 'mrk')
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.mrk': 'mrk'}
+
+# Common subject/genre names mapped onto the library's categories (matched case-insensitively)
+CATEGORY_ALIASES = {
+    'nonfiction': 'Non-Fiction',
+    'non fiction': 'Non-Fiction',
+    'biography': 'Non-Fiction',
+    'reference': 'Non-Fiction',
+    'novel': 'Fiction',
+    'novels': 'Fiction',
+    'sci-fi': 'Fiction',
+    'science fiction': 'Fiction',
+    'fantasy': 'Fiction',
+    'mystery': 'Fiction',
+    'physics': 'Science',
+    'chemistry': 'Science',
+    'biology': 'Science',
+    'mathematics': 'Science',
+    'computers': 'Technology',
+    'computer science': 'Technology',
+    'computing': 'Technology',
+    'engineering': 'Technology',
+    'poetry': 'Literature',
+    'drama': 'Literature',
+    'classics': 'Literature',
+    'world history': 'History',
+}
+
+# Dewey Decimal hundreds used when a MARC record has a class number but no usable subject
+DEWEY_CATEGORIES = {
+    '0': 'Technology', '1': 'Non-Fiction', '2': 'Non-Fiction', '3': 'Non-Fiction', '4': 'Literature',
+    '5': 'Science', '6': 'Technology', '7': 'Non-Fiction', '8': 'Literature', '9': 'History'
+}
+
+MARC_FIELD = re.compile(r'^=(\d{3})  (.*)$')
+
+
+def normalize_isbn(value):
+    """Return the ISBN without hyphens/spaces if its ISBN-10 or ISBN-13 checksum is valid, else None."""
+    isbn = re.sub(r'[\s-]', '', str(value or '')).upper()
+    if len(isbn) == 10 and isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] == 'X'):
+        digits = [int(c) for c in isbn[:9]] + [10 if isbn[9] == 'X' else int(isbn[9])]
+        return isbn if sum((10 - i) * d for i, d in enumerate(digits)) % 11 == 0 else None
+    if len(isbn) == 13 and isbn.isdigit():
+        return isbn if sum(int(c) * (3 if i % 2 else 1) for i, c in enumerate(isbn)) % 10 == 0 else None
+    return None
+
+
+def category_lookup(categories):
+    """Lower-cased category and alias names -> category, for the given categories only."""
+    lookup = {alias: category for alias, category in CATEGORY_ALIASES.items() if category in categories}
+    lookup.update((category.lower(), category) for category in categories)
+    return lookup
+
+
+def parse_marc(text):
+    """Pull title/author/isbn/category out of one mnemonic MARC record."""
+    fields = {}
+    for line in text.splitlines():
+        match = MARC_FIELD.match(line.strip())
+        if match:
+            tag, data = match.groups()
+            subfields = {}
+            for part in data[2:].split('$')[1:]:
+                if part:
+                    subfields.setdefault(part[0], part[1:].strip())
+            fields.setdefault(tag, []).append(subfields)
+
+    def first(tag, code):
+        for subfields in fields.get(tag, ()):
+            if subfields.get(code):
+                return subfields[code]
+        return ''
+
+    title = ' '.join(filter(None, (first('245', 'a').rstrip(' /:;'), first('245', 'b').rstrip(' /:;'))))
+    subjects = [subfields.get('a', '').rstrip('.') for tag in ('655', '650') for subfields in fields.get(tag, ())]
+    dewey = first('082', 'a')
+    return {
+        'title': title.rstrip(' /:;.'),
+        'author': first('100', 'a').rstrip(' ,.') or first('110', 'a').rstrip(' ,.'),
+        'isbn': first('020', 'a').split(' ')[0],
+        'category': subjects,
+        'dewey': DEWEY_CATEGORIES.get(dewey[:1], '') if dewey[:1].isdigit() else ''
+    }
+
+
+def parse_raw(fmt, raw):
+    if fmt == 'csv':
+        return {str(key).strip().lower(): value for key, value in raw.items() if key is not None}
+    if fmt == 'jsonl':
+        row = json.loads(raw)
+        if not isinstance(row, dict):
+            raise ValueError("not a JSON object")
+        return {str(key).strip().lower(): value for key, value in row.items()}
+    return parse_marc(raw)
+
+
+def validate_row(row, lookup, default_category=None):
+    """Return (book, None) for a good row or (None, reason) for a bad one; lookup is from category_lookup."""
+    book = {field: ' '.join(str(row.get(field) or '').split()) for field in ('title', 'author', 'isbn')}
+    missing = [field for field, value in book.items() if not value]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+
+    isbn = normalize_isbn(book['isbn'])
+    if isbn is None:
+        return None, f"invalid ISBN '{book['isbn']}'"
+    book['isbn'] = isbn
+
+    # MARC records carry several subject headings; the first one that maps wins
+    candidates = row.get('category')
+    candidates = candidates if isinstance(candidates, list) else [candidates]
+    candidates = candidates + [row.get('dewey')]
+    for candidate in candidates:
+        category = lookup.get(' '.join(str(candidate or '').split()).lower())
+        if category:
+            break
+    else:
+        category = default_category
+    if category is None:
+        return None, f"unknown category '{candidates[0] or ''}'"
+    book['category'] = category
+    return book, None
+
+
+def process_chunk(job):
+    """Process-pool worker: parse and validate one chunk of (line, raw) pairs."""
+    fmt, chunk, categories, default_category = job
+    lookup = category_lookup(categories)
+    good, bad = [], []
+    for line, raw in chunk:
+        try:
+            book, reason = validate_row(parse_raw(fmt, raw), lookup, default_category)
+        except ValueError as e:
+            book, reason = None, f"unreadable row: {e}"
+        if book is None:
+            bad.append((line, reason, raw if isinstance(raw, str) else json.dumps(raw)))
+        else:
+            good.append(book)
+    return good, bad
+
+
+def read_rows(path, fmt):
+    """Yield (line_number, raw) pairs; raw is a dict for CSV and the record text otherwise."""
+    with open(path, 'r', newline='' if fmt == 'csv' else None, encoding='utf-8') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        elif fmt == 'jsonl':
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_number, line
+        else:
+            record, start = [], 0
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    if not record:
+                        start = line_number
+                    record.append(line)
+                elif record:
+                    yield start, ''.join(record)
+                    record = []
+            if record:
+                yield start, ''.join(record)
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ImportReport:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.bad = 0
+        self.bad_rows = []
+        self.book_ids = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (f"{self.read:,} rows read, {self.imported:,} imported, {self.duplicates:,} duplicates, "
+                f"{self.bad:,} bad in {self.elapsed:.1f}s ({self.rate:,.0f} rows/s)")
+
+
+def _chunk_results(jobs, workers):
+    # Keep a bounded number of chunks in flight so the file is streamed, not loaded
+    if workers == 0:
+        for job in jobs:
+            yield process_chunk(job)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(process_chunk, job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def import_books(lms, path, fmt=None, workers=None, chunk_size=5000, default_category=None,
+                 errors_file=None, progress=None, dry_run=False, max_bad_rows=1000):
+    """Import a CSV/JSONL/MARC file into lms and return an ImportReport.
+
+    workers=None uses one process per CPU, workers=0 validates in this process.
+    progress(report) is called after every chunk. Bad rows are kept on the
+    report (up to max_bad_rows) and all of them are written to errors_file.
+    Every chunk is committed and saved on its own, so a larger chunk_size
+    means fewer saves but more memory and a longer hold on the library lock.
+    """
+    fmt = fmt or EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format for {path}; use one of {', '.join(FORMATS)}")
+    if default_category is not None and default_category not in lms.categories:
+        raise ValueError(f"Unknown default category '{default_category}'")
+
+    report = ImportReport()
+    categories = sorted(lms.categories)
+    seen_isbns = {normalize_isbn(book['isbn']) or book['isbn'] for book in lms.books.values()}
+    jobs = ((fmt, chunk, categories, default_category) for chunk in chunked(read_rows(path, fmt), chunk_size))
+
+    errors = None
+    if errors_file:
+        errors = open(errors_file, 'w', newline='', encoding='utf-8')
+        errors_writer = csv.writer(errors)
+        errors_writer.writerow(['line', 'reason', 'row'])
+    try:
+        for good, bad in _chunk_results(jobs, workers):
+            report.read += len(good) + len(bad)
+            report.bad += len(bad)
+            report.bad_rows.extend(bad[:max(0, max_bad_rows - len(report.bad_rows))])
+            if errors is not None:
+                errors_writer.writerows(bad)
+            books = []
+            for book in good:
+                if book['isbn'] in seen_isbns:
+                    report.duplicates += 1
+                else:
+                    seen_isbns.add(book['isbn'])
+                    books.append(book)
+            if books and not dry_run:
+                report.book_ids.extend(lms.bulk_add_books(books))
+            report.imported += len(books)
+            report.elapsed = time.perf_counter() - report.started
+            if progress is not None:
+                progress(report)
+    finally:
+        if errors is not None:
+            errors.close()
+    report.elapsed = time.perf_counter() - report.started
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import books into the library catalogue")
+    parser.add_argument('path', help="CSV, JSON Lines or MARC mnemonic (.mrk) file")
+    parser.add_argument('--format', choices=FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument('--data-file', default='library_data.json')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--journal', action='store_true', help="append to the journal instead of rewriting the data file")
+    parser.add_argument('--workers', type=int, default=None, help="validation processes (0 = in this process)")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--default-category', help="category for rows whose category cannot be mapped")
+    parser.add_argument('--errors', help="write rejected rows to this CSV file")
+    parser.add_argument('--dry-run', action='store_true', help="validate and report without importing")
+    args = parser.parse_args(argv)
+
+    if args.backend == 'sqlite':
+        from sqlite_backend import SQLiteLibraryManagementSystem
+        lms = SQLiteLibraryManagementSystem(os.path.splitext(args.data_file)[0] + '.db')
+    else:
+        from library_core import LibraryManagementSystem
+        lms = LibraryManagementSystem(data_file=args.data_file, journal=args.journal)
+
+    def show_progress(report):
+        print(f"\r📥 {report.read:,} rows, {report.imported:,} imported ({report.rate:,.0f} rows/s)", end='', flush=True)
+
+    print(f"📥 Importing {args.path} into {args.data_file}")
+    try:
+        report = import_books(lms, args.path, fmt=args.format, workers=args.workers, chunk_size=args.chunk_size,
+                              default_category=args.default_category, errors_file=args.errors,
+                              progress=show_progress, dry_run=args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"\n❌ Import failed: {e}")
+        return 1
+    finally:
+        lms.close()
+    print(f"\n✅ {report.summary()}")
+    for line, reason, raw in report.bad_rows[:10]:
+        print(f"   line {line}: {reason}")
+    if report.bad > 10:
+        print(f"   ... {report.bad - 10:,} more" + (f" in {args.errors}" if args.errors else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
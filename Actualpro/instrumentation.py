@@ -0,0 +1,223 @@
+"""
+Operation timing and counters for the Library Management System
+
+Metrics.instrument(obj, names) replaces each named method on that one
+instance with a wrapper that counts calls and errors, records the latency
+in a log-scale histogram (p50/p95/p99 within 5%) and the payload size of
+the result. Nothing is wrapped until instrumentation is enabled, so the
+disabled cost is zero; uninstrument() puts the original methods back.
+
+LibraryUI enables it when LIBRARY_METRICS=1 is set (LIBRARY_METRICS_FILE
+adds a periodic JSON dump) or from the Diagnostics panel.
+"""
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+# Public LibraryManagementSystem / SQLiteLibraryManagementSystem operations
+LMS_OPERATIONS = (
+    'load_data', 'save_data', 'compact',
+    'add_book', 'delete_book', 'add_member', 'delete_member', 'issue_book', 'return_book',
+    'bulk_add_books', 'bulk_add_members', 'bulk_issue',
+    'search_books', 'search_books_recursive', 'fuzzy_search', 'complete_books', 'complete_members',
+    'get_overdue_books', 'calculate_total_late_fees', 'late_fee_report'
+)
+UI_OPERATIONS = (
+    'load_data', 'apply_changes', 'refresh_books', 'refresh_members', 'refresh_issued_books',
+    'show_book_filter'
+)
+
+# Histogram bucket i holds latencies in [MIN_LATENCY * GROWTH**i, MIN_LATENCY * GROWTH**(i+1))
+MIN_LATENCY = 1e-6
+GROWTH = 1.05
+_LOG_GROWTH = math.log(GROWTH)
+
+
+def result_size(obj, args, result):
+    """Rows in a list/dict/set result; None for results that are not collections."""
+    if isinstance(result, (list, tuple, dict, set, frozenset)):
+        return len(result)
+    return None
+
+
+def file_size(obj, args, result):
+    path = getattr(obj, 'data_file', None) or getattr(obj, 'db_file', None)
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return None
+
+
+def table_size(table):
+    return lambda ui, args, result: len(getattr(ui.lms, table))
+
+
+def filter_size(ui, args, result):
+    return None if not args or args[0] is None else len(args[0])
+
+
+SIZERS = {
+    'lms.load_data': file_size,
+    'lms.save_data': file_size,
+    'lms.compact': file_size,
+    'ui.refresh_books': table_size('books'),
+    'ui.refresh_members': table_size('members'),
+    'ui.refresh_issued_books': table_size('issued_books'),
+    'ui.show_book_filter': filter_size
+}
+
+
+class OperationStats:
+    __slots__ = ('count', 'errors', 'total', 'max', 'buckets', 'payload_count', 'payload_total', 'payload_max')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+        self.payload_count = 0
+        self.payload_total = 0
+        self.payload_max = 0
+
+    def add(self, latency, failed, payload):
+        self.count += 1
+        self.errors += failed
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+        bucket = int(math.log(latency / MIN_LATENCY) / _LOG_GROWTH) if latency > MIN_LATENCY else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        if payload is not None:
+            self.payload_count += 1
+            self.payload_total += payload
+            if payload > self.payload_max:
+                self.payload_max = payload
+
+    def percentile(self, fraction):
+        """Upper edge of the bucket holding the given fraction of calls, capped at the slowest call."""
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.max, MIN_LATENCY * GROWTH ** (bucket + 1))
+        return self.max
+
+    def to_dict(self):
+        def ms(seconds):
+            return round(seconds * 1000, 3)
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': ms(self.total),
+            'mean_ms': ms(self.total / self.count) if self.count else 0.0,
+            'p50_ms': ms(self.percentile(0.50)),
+            'p95_ms': ms(self.percentile(0.95)),
+            'p99_ms': ms(self.percentile(0.99)),
+            'max_ms': ms(self.max),
+            'payload_mean': round(self.payload_total / self.payload_count, 1) if self.payload_count else None,
+            'payload_max': self.payload_max if self.payload_count else None
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.operations = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._wrapped = []
+        self._dump_stop = None
+
+    @property
+    def enabled(self):
+        return bool(self._wrapped)
+
+    def record(self, name, latency, failed=False, payload=None):
+        with self._lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats()
+            stats.add(latency, failed, payload)
+
+    def _wrap(self, obj, method, name):
+        sizer = SIZERS.get(name, result_size)
+        record = self.record
+        clock = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                record(name, clock() - start, True)
+                raise
+            latency = clock() - start
+            try:
+                payload = sizer(obj, args, result)
+            except Exception:
+                payload = None
+            record(name, latency, False, payload)
+            return result
+        return timed
+
+    def instrument(self, obj, names, prefix):
+        """Time the named methods of this one object; methods it does not have are skipped."""
+        for attr in names:
+            if not callable(getattr(type(obj), attr, None)) or attr in vars(obj):
+                continue
+            setattr(obj, attr, self._wrap(obj, getattr(obj, attr), f"{prefix}.{attr}"))
+            self._wrapped.append((obj, attr))
+        return obj
+
+    def uninstrument(self):
+        for obj, attr in self._wrapped:
+            vars(obj).pop(attr, None)
+        self._wrapped = []
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+            self.started = time.time()
+
+    def stats(self):
+        """{'uptime_s', 'enabled', 'operations': {name: counts, latency percentiles, payload sizes}}"""
+        with self._lock:
+            operations = {name: stats.to_dict() for name, stats in sorted(self.operations.items())}
+        return {'uptime_s': round(time.time() - self.started, 1), 'enabled': self.enabled, 'operations': operations}
+
+    def dump(self, path, extra=None):
+        data = self.stats()
+        if extra:
+            data.update(extra())
+        tmp_file = path + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_file, path)
+
+    def start_dump(self, path, interval=10.0, extra=None):
+        """Write stats() to path every interval seconds (and once more on stop_dump)."""
+        self.stop_dump()
+        stop = self._dump_stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.dump(path, extra)
+                except OSError:
+                    pass
+            self.dump(path, extra)
+        thread = threading.Thread(target=run, name='library-metrics', daemon=True)
+        thread.start()
+        self._dump_thread = thread
+
+    def stop_dump(self, timeout=None):
+        if self._dump_stop is not None:
+            self._dump_stop.set()
+            self._dump_thread.join(timeout)
+            self._dump_stop = None
@@ -0,0 +1,74 @@
+"""
+Append-only operation journal used by LibraryManagementSystem's journaled persistence mode
+"""
+
+import json
+import os
+
+
+class OperationJournal:
+    def __init__(self, path):
+        self.path = path
+        self.rotated_path = path + '.1'
+        self.seq = 0
+        self.pending = 0
+        self._file = None
+
+    def open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, record):
+        self.open()
+        self.seq += 1
+        record['seq'] = self.seq
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.pending += 1
+        return self.seq
+
+    def flush(self, sync=False):
+        if self._file is not None:
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def read(self, after_seq=0):
+        """Yield journal records newer than after_seq, oldest first.
+
+        A torn last line (crash mid-write) is ignored.
+        """
+        for path in (self.rotated_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record['seq'] > after_seq:
+                        self.seq = max(self.seq, record['seq'])
+                        yield record
+
+    def rotate(self):
+        """Move the live journal aside so a snapshot can be written for everything in it."""
+        self.close()
+        if os.path.exists(self.path):
+            if os.path.exists(self.rotated_path):
+                with open(self.path, 'r', encoding='utf-8') as src, \
+                        open(self.rotated_path, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.rotated_path)
+        self.pending = 0
+        self.open()
+
+    def discard_rotated(self):
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
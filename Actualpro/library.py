@@ -1,227 +1,132 @@
 #python Project Library Mgmt. System
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from datetime import datetime, timedelta
-from functools import reduce
+from tkinter import ttk, messagebox, simpledialog, filedialog
+from datetime import datetime
 import json
 import os
+import threading
 
-class LibraryManagementSystem:
-    def __init__(self):
-        self.books = {}
-        self.members = {}
-        self.issued_books = {}
-        self.categories = {'Fiction', 'Non-Fiction', 'Science', 'History', 'Technology', 'Literature'}
-        self.library_rules = frozenset({
-            'Maximum 3 books per member',
-            '14 days loan period',
-            'Late fee: $1 per day',
-            'No food or drinks',
-            'Quiet zone'
-        })
-        self.load_data()
-    
-    def load_data(self):
-        if os.path.exists('library_data.json'):
-            try:
-                with open('library_data.json', 'r') as f:
-                    data = json.load(f)
-                    self.books = data.get('books', {})
-                    self.members = data.get('members', {})
-                    raw_issued_books = data.get('issued_books', {})
-                    self.issued_books = {}
-                    for member_id, issued_list in raw_issued_books.items():
-                        self.issued_books[member_id] = []
-                        for issued in issued_list:
-                            issued_copy = issued.copy()
-                            issued_copy['issue_date'] = datetime.strptime(issued['issue_date'], '%Y-%m-%d %H:%M:%S')
-                            issued_copy['due_date'] = datetime.strptime(issued['due_date'], '%Y-%m-%d %H:%M:%S')
-                            self.issued_books[member_id].append(issued_copy)
-            except Exception as e:
-                print(f"Error loading data: {e}")
-                self.books = {}
-                self.members = {}
-                self.issued_books = {}
-    
-    def save_data(self):
-        serializable_issued_books = {}
-        for member_id, issued_list in self.issued_books.items():
-            serializable_issued_books[member_id] = []
-            for issued in issued_list:
-                serializable_issued = issued.copy()
-                serializable_issued['issue_date'] = issued['issue_date'].strftime('%Y-%m-%d %H:%M:%S')
-                serializable_issued['due_date'] = issued['due_date'].strftime('%Y-%m-%d %H:%M:%S')
-                serializable_issued_books[member_id].append(serializable_issued)
-        
-        data = {
-            'books': self.books,
-            'members': self.members,
-            'issued_books': serializable_issued_books
-        }
-        with open('library_data.json', 'w') as f:
-            json.dump(data, f, indent=2)
-    
-    def get_overdue_books(self):
-        today = datetime.now()
-        all_issued = []
-        for issued_list in self.issued_books.values():
-            all_issued.extend(issued_list)
-        
-        overdue = list(filter(
-            lambda issued: (today - issued['issue_date']).days > 14,
-            all_issued
-        ))
-        return overdue
-    
-    def calculate_total_late_fees(self):
-        overdue_books = self.get_overdue_books()
-        if not overdue_books:
-            return 0
-        
-        def calculate_fee(issued):
-            days_overdue = (datetime.now() - issued['issue_date']).days - 14
-            return max(0, days_overdue) * 1.0
-        
-        total_fees = reduce(lambda total, issued: total + calculate_fee(issued), overdue_books, 0)
-        return total_fees
-    
-    def search_books_recursive(self, query, book_ids=None, results=None):
-        if book_ids is None:
-            book_ids = list(self.books.keys())
-            results = []
-        
-        if not book_ids:
-            return results
-        
-        current_id = book_ids[0]
-        book = self.books[current_id]
-        
-        if (query.lower() in book['title'].lower() or 
-            query.lower() in book['author'].lower() or
-            query.lower() in book['category'].lower()):
-            results.append(current_id)
-        
-        return self.search_books_recursive(query, book_ids[1:], results)
-    
-    def issue_book(self, book_id, member_id):
-        if member_id not in self.members:
-            raise ValueError("Member not found")
-        if member_id not in self.issued_books:
-            self.issued_books[member_id] = []
-        
-        if len(self.issued_books[member_id]) >= 3:
-            raise ValueError("Maximum book limit reached (3 books)")
-        
-        if book_id not in self.books:
-            raise ValueError("Book not found")
-        
-        if self.books[book_id]['status'] != 'Available':
-            raise ValueError("Book not available")
-        
-        issue_date = datetime.now()
-        self.issued_books[member_id].append({
-            'book_id': book_id,
-            'issue_date': issue_date,
-            'due_date': issue_date + timedelta(days=14)
-        })
-        
-        self.books[book_id]['status'] = 'Issued'
-        self.books[book_id]['issued_to'] = member_id
-        
-        return f"Book '{self.books[book_id]['title']}' issued to {self.members[member_id]['name']}"
-    
-    def return_book(self, book_id, member_id):
-        if member_id not in self.issued_books:
-            raise ValueError("No books issued to this member")
-        
-        for issued in self.issued_books[member_id]:
-            if issued['book_id'] == book_id:
-                days_overdue = (datetime.now() - issued['issue_date']).days - 14
-                late_fee = max(0, days_overdue) * 1.0
-                
-                self.issued_books[member_id].remove(issued)
-                self.books[book_id]['status'] = 'Available'
-                self.books[book_id]['issued_to'] = None
-                
-                return f"Book returned. Late fee: ${late_fee:.2f}" if late_fee > 0 else "Book returned on time"
-        
-        raise ValueError("Book not issued to this member")
-    
-    def add_book(self, title, author, category, isbn):
-        book_id = str(len(self.books) + 1).zfill(4)
-        self.books[book_id] = {
-            'title': title,
-            'author': author,
-            'category': category,
-            'isbn': isbn,
-            'status': 'Available',
-            'issued_to': None
-        }
-        return book_id
-    
-    def delete_book(self, book_id):
-        if book_id not in self.books:
-            raise ValueError("Book not found")
-        
-        book = self.books[book_id]
-        
-        if book['status'] == 'Issued':
-            raise ValueError("Cannot delete book that is currently issued")
-        
-        for member_id, issued_list in self.issued_books.items():
-            for issued in issued_list:
-                if issued['book_id'] == book_id:
-                    raise ValueError("Cannot delete book that is currently issued")
-        
-        deleted_book = self.books.pop(book_id)
-        return f"Book '{deleted_book['title']}' has been deleted from the library"
-    
-    def add_member(self, name, email, phone):
-        member_id = str(len(self.members) + 1).zfill(4)
-        self.members[member_id] = {
-            'name': name,
-            'email': email,
-            'phone': phone,
-            'join_date': datetime.now().strftime('%Y-%m-%d')
-        }
-        return member_id
-    
-    def delete_member(self, member_id):
-        if member_id not in self.members:
-            raise ValueError("Member not found")
-        
-        if member_id in self.issued_books and len(self.issued_books[member_id]) > 0:
-            raise ValueError("Cannot delete member who has books currently issued")
-        
-        deleted_member = self.members.pop(member_id)
-        
-        if member_id in self.issued_books:
-            self.issued_books.pop(member_id)
-        
-        return f"Member '{deleted_member['name']}' has been deleted from the library"
-
-def manage_library():
-    lms = LibraryManagementSystem()
-    
-    def issue_book_nested(book_id, member_id):
-        return lms.issue_book(book_id, member_id)
-    
-    return lms, issue_book_nested
+# The engine lives in library_core; it is re-exported here for existing imports
+from library_core import LibraryManagementSystem, manage_library
+from autosave import AutoSaver
+from instrumentation import LMS_OPERATIONS, UI_OPERATIONS, Metrics
+import reports
+from widgets import AutocompleteCombobox, BackgroundSearch, RowSource, VirtualTreeview
 
 class LibraryUI:
-    def __init__(self, root):
+    # Longest list shown in a message box; Export Report writes the rest
+    MESSAGE_ROWS = 20
+    # How often a desk on a shared data file looks for other desks' changes
+    SHARED_POLL_MS = 1000
+    
+    def __init__(self, root, autosave_interval=0.5, virtual_threshold=5000, **lms_options):
         self.root = root
         self.root.title("Library Management System")
         self.root.geometry("1400x900")
         self.root.configure(bg='#f0f0f0')
         
-        self.lms, self.issue_book_nested = manage_library()
+        self.lms, self.issue_book_nested = manage_library(**lms_options)
+        self.autosaver = AutoSaver(self.lms, interval=autosave_interval)
+        # Off unless LIBRARY_METRICS / LIBRARY_METRICS_FILE is set or it is switched on under Diagnostics
+        self.metrics = Metrics()
+        if os.environ.get('LIBRARY_METRICS') or os.environ.get('LIBRARY_METRICS_FILE'):
+            self.enable_metrics()
+        if os.environ.get('LIBRARY_METRICS_FILE'):
+            self.metrics.start_dump(os.environ['LIBRARY_METRICS_FILE'], extra=lambda: {'autosave': self.autosaver.stats()})
+        # Tables with at least this many rows only render what is on screen (None: never)
+        self.virtual_threshold = virtual_threshold
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         style = ttk.Style()
         style.theme_use('clam')
         
+        self._changed = {'books': set(), 'members': set(), 'loans': set()}
+        if hasattr(self.lms, 'subscribe'):
+            self.lms.subscribe(self.on_change)
+        # Live filter state; the SQLite backend's connection belongs to this thread, so it searches inline
+        self.filter_query = ''
+        self.hidden_books = set()
+        self.book_search = BackgroundSearch(self.filter_search) if hasattr(self.lms, 'lock') else None
+        self._filter_polling = False
+        if hasattr(self.lms, 'lock'):
+            # Build the picker indexes now so the first Issue/Return dialog opens instantly
+            threading.Thread(target=self.warm_pickers, daemon=True).start()
+        
         self.create_widgets()
         self.load_data()
+        self.root.bind('<F5>', lambda event: self.load_data())
+        self.update_save_status()
+        self._generation = getattr(self.lms, 'generation', 0)
+        if getattr(self.lms, 'shared', False):
+            self.root.after(self.SHARED_POLL_MS, self.poll_shared)
+    
+    def on_close(self):
+        if not self.autosaver.close():
+            error = self.autosaver.stats()['last_error'] or "the save did not finish"
+            if not messagebox.askyesno("Changes not saved",
+                                       f"Your latest changes could not be saved:\n{error}\n\n"
+                                       "Close anyway and lose them?", icon='warning'):
+                # Stay open; a new writer retries the unsaved changes
+                self.autosaver = AutoSaver(self.lms, interval=self.autosaver.interval)
+                self.autosaver.request()
+                return
+        if self.book_search is not None:
+            self.book_search.close()
+        self.metrics.stop_dump()
+        self.lms.close()
+        self.root.destroy()
+    
+    def enable_metrics(self):
+        self.metrics.instrument(self.lms, LMS_OPERATIONS, 'lms')
+        self.metrics.instrument(self, UI_OPERATIONS, 'ui')
+    
+    def diagnostics(self):
+        return dict(self.metrics.stats(), autosave=self.autosaver.stats())
+    
+    def poll_shared(self):
+        # A sync can reload the data file and write the compaction, so it runs off the Tk thread
+        done = {}
+        
+        def run():
+            try:
+                self.lms.poll_changes()
+            except (OSError, ValueError) as e:
+                done['error'] = e
+            done['finished'] = True
+        
+        threading.Thread(target=run, name='library-sync', daemon=True).start()
+        self.root.after(16, self.show_shared_changes, done)
+    
+    def show_shared_changes(self, done):
+        if 'finished' not in done:
+            self.root.after(16, self.show_shared_changes, done)
+            return
+        if 'error' in done:
+            self.status_label.config(text=f"⚠️ Could not read other desks' changes: {done['error']}")
+        if self.lms.generation != self._generation:
+            self._generation = self.lms.generation
+            self.load_data()
+        else:
+            self.apply_changes()
+        conflicts = self.lms.take_conflicts()
+        if conflicts:
+            messagebox.showwarning("Changes from other desks",
+                                   "These changes were undone because another desk changed the same records:\n\n"
+                                   + "\n".join(f"• {conflict}" for conflict in conflicts))
+        self.root.after(self.SHARED_POLL_MS, self.poll_shared)
+    
+    def update_save_status(self):
+        stats = self.autosaver.stats()
+        if stats['last_error']:
+            text = f"⚠️ Save failed: {stats['last_error']}"
+        elif stats['queue_depth'] or stats['saving']:
+            text = f"💾 Saving... ({stats['queue_depth']} pending)"
+        elif stats['last_latency_ms'] is not None:
+            text = f"💾 Saved in {stats['last_latency_ms']:.0f} ms ({stats['saves']} saves, {stats['coalesced']} coalesced)"
+        else:
+            text = "💾 No unsaved changes"
+        self.status_label.config(text=text)
+        self.root.after(500, self.update_save_status)
     
     def create_widgets(self):
         title_frame = tk.Frame(self.root, bg='#2c3e50', height=80)
@@ -232,6 +137,9 @@ class LibraryUI:
                                font=('Arial', 24, 'bold'), fg='white', bg='#2c3e50')
         title_label.pack(expand=True)
         
+        self.status_label = tk.Label(self.root, text="", anchor='w', bg='#f0f0f0', fg='#7f8c8d', font=('Arial', 9))
+        self.status_label.pack(side='bottom', fill='x', padx=20, pady=(0, 5))
+        
         main_frame = tk.Frame(self.root, bg='#f0f0f0')
         main_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
@@ -290,6 +198,12 @@ class LibraryUI:
                   bg='#9b59b6', fg='white', font=('Arial', 10, 'bold')).pack(fill='x', padx=5, pady=5)
         tk.Button(info_frame, text="Library Rules", command=self.show_rules, 
                   bg='#34495e', fg='white', font=('Arial', 10, 'bold')).pack(fill='x', padx=5, pady=5)
+        tk.Button(info_frame, text="Reload Tables", command=self.load_data, 
+                  bg='#7f8c8d', fg='white', font=('Arial', 10, 'bold')).pack(fill='x', padx=5, pady=5)
+        tk.Button(info_frame, text="Export Report", command=self.export_report_dialog, 
+                  bg='#16a085', fg='white', font=('Arial', 10, 'bold')).pack(fill='x', padx=5, pady=5)
+        tk.Button(info_frame, text="Diagnostics", command=self.diagnostics_dialog, 
+                  bg='#2c3e50', fg='white', font=('Arial', 10, 'bold')).pack(fill='x', padx=5, pady=5)
     
     def create_right_panel(self, parent):
         self.notebook = ttk.Notebook(parent)
@@ -298,7 +212,17 @@ class LibraryUI:
         self.books_frame = tk.Frame(self.notebook)
         self.notebook.add(self.books_frame, text="📚 Books")
         
-        self.books_tree = ttk.Treeview(self.books_frame, columns=('ID', 'Title', 'Author', 'Category', 'Status'), show='headings')
+        filter_frame = tk.Frame(self.books_frame)
+        filter_frame.pack(side='top', fill='x', padx=10, pady=(10, 0))
+        tk.Label(filter_frame, text="🔎 Filter:").pack(side='left')
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *args: self.submit_filter())
+        tk.Entry(filter_frame, textvariable=self.filter_var, width=40).pack(side='left', padx=5)
+        self.filter_label = tk.Label(filter_frame, text="", fg='#7f8c8d')
+        self.filter_label.pack(side='left')
+        
+        self.book_source = RowSource(lambda: self.lms.books, self.book_row)
+        self.books_tree = self.create_tree(self.books_frame, ('ID', 'Title', 'Author', 'Category', 'Status'), self.book_source)
         self.books_tree.heading('ID', text='Book ID')
         self.books_tree.heading('Title', text='Title')
         self.books_tree.heading('Author', text='Author')
@@ -311,16 +235,11 @@ class LibraryUI:
         self.books_tree.column('Category', width=120)
         self.books_tree.column('Status', width=100)
         
-        books_scrollbar = ttk.Scrollbar(self.books_frame, orient='vertical', command=self.books_tree.yview)
-        self.books_tree.configure(yscrollcommand=books_scrollbar.set)
-        
-        self.books_tree.pack(side='left', fill='both', expand=True, padx=10, pady=10)
-        books_scrollbar.pack(side='right', fill='y', pady=10)
-        
         self.members_frame = tk.Frame(self.notebook)
         self.notebook.add(self.members_frame, text="👥 Members")
         
-        self.members_tree = ttk.Treeview(self.members_frame, columns=('ID', 'Name', 'Email', 'Phone', 'Join Date'), show='headings')
+        self.member_source = RowSource(lambda: self.lms.members, self.member_row)
+        self.members_tree = self.create_tree(self.members_frame, ('ID', 'Name', 'Email', 'Phone', 'Join Date'), self.member_source)
         self.members_tree.heading('ID', text='Member ID')
         self.members_tree.heading('Name', text='Name')
         self.members_tree.heading('Email', text='Email')
@@ -333,16 +252,11 @@ class LibraryUI:
         self.members_tree.column('Phone', width=140)
         self.members_tree.column('Join Date', width=120)
         
-        members_scrollbar = ttk.Scrollbar(self.members_frame, orient='vertical', command=self.members_tree.yview)
-        self.members_tree.configure(yscrollcommand=members_scrollbar.set)
-        
-        self.members_tree.pack(side='left', fill='both', expand=True, padx=10, pady=10)
-        members_scrollbar.pack(side='right', fill='y', pady=10)
-        
         self.issued_frame = tk.Frame(self.notebook)
         self.notebook.add(self.issued_frame, text="📖 Issued Books")
         
-        self.issued_tree = ttk.Treeview(self.issued_frame, columns=('Member', 'Book', 'Issue Date', 'Due Date', 'Status'), show='headings')
+        self.issued_source = RowSource(self.issued_loans, self.issued_row, iid=lambda loan: loan[1]['book_id'])
+        self.issued_tree = self.create_tree(self.issued_frame, ('Member', 'Book', 'Issue Date', 'Due Date', 'Status'), self.issued_source)
         self.issued_tree.heading('Member', text='Member')
         self.issued_tree.heading('Book', text='Book')
         self.issued_tree.heading('Issue Date', text='Issue Date')
@@ -354,55 +268,190 @@ class LibraryUI:
         self.issued_tree.column('Issue Date', width=120)
         self.issued_tree.column('Due Date', width=120)
         self.issued_tree.column('Status', width=100)
+    
+    def create_tree(self, parent, columns, source):
+        if self.virtual_threshold is not None and len(source) >= self.virtual_threshold:
+            tree = VirtualTreeview(parent, columns, source)
+            tree.pack(fill='both', expand=True, padx=10, pady=10)
+            return tree
         
-        issued_scrollbar = ttk.Scrollbar(self.issued_frame, orient='vertical', command=self.issued_tree.yview)
-        self.issued_tree.configure(yscrollcommand=issued_scrollbar.set)
+        tree = ttk.Treeview(parent, columns=columns, show='headings')
+        scrollbar = ttk.Scrollbar(parent, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
         
-        self.issued_tree.pack(side='left', fill='both', expand=True, padx=10, pady=10)
-        issued_scrollbar.pack(side='right', fill='y', pady=10)
+        tree.pack(side='left', fill='both', expand=True, padx=10, pady=10)
+        scrollbar.pack(side='right', fill='y', pady=10)
+        return tree
+
     
     def load_data(self):
+        # Full rebuild; after single operations apply_changes() updates only the affected rows
+        for changed in self._changed.values():
+            changed.clear()
         self.refresh_books()
         self.refresh_members()
         self.refresh_issued_books()
+        if self.filter_query:
+            self.submit_filter(self.filter_query)
+    
+    def on_change(self, record):
+        if 'book_id' in record:
+            self._changed['books'].add(record['book_id'])
+        if record['op'] in ('add_member', 'delete_member'):
+            self._changed['members'].add(record['member_id'])
+        elif record['op'] in ('issue_book', 'return_book'):
+            self._changed['loans'].add(record['book_id'])
+    
+    def apply_changes(self):
+        """Bring the tables up to date with the changes reported through on_change."""
+        if not hasattr(self.lms, 'subscribe'):
+            self.load_data()
+            return
+        # Changes pulled from other desks are reported on the autosave thread
+        with self.lms.lock:
+            changed, self._changed = self._changed, {'books': set(), 'members': set(), 'loans': set()}
+        self.sync_rows(self.books_tree, changed['books'],
+                       lambda book_id: self.book_row(book_id) if book_id in self.lms.books else None)
+        self.sync_rows(self.members_tree, changed['members'],
+                       lambda member_id: self.member_row(member_id) if member_id in self.lms.members else None)
+        self.sync_rows(self.issued_tree, changed['loans'], self.loan_row)
+        if self.filter_query and changed['books']:
+            self.submit_filter(self.filter_query)
+    
+    def loan_row(self, book_id):
+        loan = self.lms.loan_for_book(book_id)
+        return self.issued_row(loan) if loan else None
+    
+    def sync_rows(self, tree, iids, row):
+        """Insert, update or delete the items for iids; row(iid) returns the values or None if gone."""
+        if not iids:
+            return
+        if isinstance(tree, VirtualTreeview):
+            tree.refresh()
+            return
+        for iid in sorted(iids):
+            values = row(iid)
+            if values is None:
+                if tree.exists(iid):
+                    tree.delete(iid)
+            elif tree.exists(iid):
+                tree.item(iid, values=values)
+            else:
+                tree.insert('', 'end', iid=iid, values=values)
+    
+    def book_row(self, book_id):
+        book = self.lms.books[book_id]
+        return (book_id, book['title'], book['author'], book['category'], book['status'])
+    
+    def member_row(self, member_id):
+        member = self.lms.members[member_id]
+        return (member_id, member['name'], member['email'], member['phone'], member['join_date'])
+    
+    def issued_loans(self):
+        return [(member_id, issued) for member_id, issued_list in self.lms.issued_books.items()
+                for issued in issued_list]
+    
+    def issued_row(self, loan):
+        member_id, issued = loan
+        book = self.lms.books[issued['book_id']]
+        member = self.lms.members[member_id]
+        
+        days_overdue = (datetime.now() - issued['issue_date']).days - 14
+        status = "Overdue" if days_overdue > 0 else "On Time"
+        
+        return (
+            member['name'],
+            book['title'],
+            issued['issue_date'].strftime('%Y-%m-%d'),
+            issued['due_date'].strftime('%Y-%m-%d'),
+            status
+        )
     
     def refresh_books(self):
+        if isinstance(self.books_tree, VirtualTreeview):
+            self.books_tree.refresh()
+            return
         for item in self.books_tree.get_children():
             self.books_tree.delete(item)
-        
-        for book_id, book in self.lms.books.items():
-            self.books_tree.insert('', 'end', values=(
-                book_id, book['title'], book['author'], book['category'], book['status']
-            ))
+        for item in self.hidden_books:
+            if self.books_tree.exists(item):
+                self.books_tree.delete(item)
+        self.hidden_books.clear()
+        
+        for book_id in self.lms.books:
+            self.books_tree.insert('', 'end', iid=book_id, values=self.book_row(book_id))
+    
+    def filter_search(self, query):
+        # Runs on the search thread; search_books retries if a dialog changes the index mid-query
+        return self.lms.search_books(query)
+    
+    def submit_filter(self, query=None):
+        if query is None:
+            query = self.filter_var.get().strip()
+        self.filter_query = query
+        if not query:
+            self.show_book_filter(None)
+        elif self.book_search is None:
+            # SQLite backend: its connection belongs to this thread, and the FTS query is indexed
+            self.show_book_filter(self.lms.search_books(query))
+        else:
+            self.book_search.submit(query)
+            if not self._filter_polling:
+                self._filter_polling = True
+                self.root.after(16, self.poll_filter)
+    
+    def poll_filter(self):
+        result = self.book_search.poll()
+        if result is not None and result[0] == self.filter_query:
+            if isinstance(result[1], Exception):
+                self.filter_label.config(text=f"Search failed: {result[1]}")
+            else:
+                self.show_book_filter(result[1])
+        if self.book_search.busy:
+            self.root.after(16, self.poll_filter)
+        else:
+            self._filter_polling = False
+    
+    def show_book_filter(self, results):
+        """Show only the books in results (None shows all) by detaching the other items."""
+        tree = self.books_tree
+        if isinstance(tree, VirtualTreeview):
+            tree.set_filter(results)
+        elif results is None:
+            if self.hidden_books:
+                for index, book_id in enumerate(book_id for book_id in self.lms.books if tree.exists(book_id)):
+                    tree.move(book_id, '', index)
+                self.hidden_books.clear()
+        else:
+            results = [book_id for book_id in results if tree.exists(book_id)]
+            shown = set(results)
+            hide = [item for item in tree.get_children() if item not in shown]
+            tree.detach(*hide)
+            self.hidden_books.update(hide)
+            self.hidden_books.difference_update(shown)
+            for index, book_id in enumerate(results):
+                tree.move(book_id, '', index)
+        self.filter_label.config(text="" if results is None else f"{len(results)} matches")
     
     def refresh_members(self):
+        if isinstance(self.members_tree, VirtualTreeview):
+            self.members_tree.refresh()
+            return
         for item in self.members_tree.get_children():
             self.members_tree.delete(item)
         
-        for member_id, member in self.lms.members.items():
-            self.members_tree.insert('', 'end', values=(
-                member_id, member['name'], member['email'], member['phone'], member['join_date']
-            ))
+        for member_id in self.lms.members:
+            self.members_tree.insert('', 'end', iid=member_id, values=self.member_row(member_id))
     
     def refresh_issued_books(self):
+        if isinstance(self.issued_tree, VirtualTreeview):
+            self.issued_tree.refresh()
+            return
         for item in self.issued_tree.get_children():
             self.issued_tree.delete(item)
         
-        for member_id, issued_list in self.lms.issued_books.items():
-            for issued in issued_list:
-                book = self.lms.books[issued['book_id']]
-                member = self.lms.members[member_id]
-                
-                days_overdue = (datetime.now() - issued['issue_date']).days - 14
-                status = "Overdue" if days_overdue > 0 else "On Time"
-                
-                self.issued_tree.insert('', 'end', values=(
-                    member['name'],
-                    book['title'],
-                    issued['issue_date'].strftime('%Y-%m-%d'),
-                    issued['due_date'].strftime('%Y-%m-%d'),
-                    status
-                ))
+        for loan in self.issued_loans():
+            self.issued_tree.insert('', 'end', iid=loan[1]['book_id'], values=self.issued_row(loan))
     
     def add_book_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -437,8 +486,8 @@ class LibraryUI:
             
             if title and author and category and isbn:
                 book_id = self.lms.add_book(title, author, category, isbn)
-                self.lms.save_data()
-                self.refresh_books()
+                self.autosaver.request()
+                self.apply_changes()
                 messagebox.showinfo("Success", f"Book added with ID: {book_id}")
                 dialog.destroy()
             else:
@@ -460,9 +509,7 @@ class LibraryUI:
         
         tk.Label(dialog, text="Select Book to Delete:", bg='white').pack()
         book_var = tk.StringVar()
-        book_combo = ttk.Combobox(dialog, textvariable=book_var, 
-                                  values=[f"{bid}: {book['title']} ({book['status']})" 
-                                         for bid, book in self.lms.books.items()])
+        book_combo = self.book_picker(dialog, book_var, status='Available')
         book_combo.pack(pady=5)
         
         warning_label = tk.Label(dialog, text="⚠️ Warning: This action cannot be undone!", 
@@ -479,8 +526,8 @@ class LibraryUI:
                     return
                 
                 result = self.lms.delete_book(book_id)
-                self.lms.save_data()
-                self.refresh_books()
+                self.autosaver.request()
+                self.apply_changes()
                 messagebox.showinfo("Success", result)
                 dialog.destroy()
             except Exception as e:
@@ -515,8 +562,8 @@ class LibraryUI:
             
             if name and email and phone:
                 member_id = self.lms.add_member(name, email, phone)
-                self.lms.save_data()
-                self.refresh_members()
+                self.autosaver.request()
+                self.apply_changes()
                 messagebox.showinfo("Success", f"Member added with ID: {member_id}")
                 dialog.destroy()
             else:
@@ -538,9 +585,7 @@ class LibraryUI:
         
         tk.Label(dialog, text="Select Member to Delete:", bg='white').pack()
         member_var = tk.StringVar()
-        member_combo = ttk.Combobox(dialog, textvariable=member_var, 
-                                    values=[f"{mid}: {member['name']} ({member['email']})" 
-                                           for mid, member in self.lms.members.items()])
+        member_combo = self.member_picker(dialog, member_var)
         member_combo.pack(pady=5)
         
         warning_label = tk.Label(dialog, text="⚠️ Warning: This action cannot be undone!", 
@@ -557,9 +602,8 @@ class LibraryUI:
                     return
                 
                 result = self.lms.delete_member(member_id)
-                self.lms.save_data()
-                self.refresh_members()
-                self.refresh_issued_books()
+                self.autosaver.request()
+                self.apply_changes()
                 messagebox.showinfo("Success", result)
                 dialog.destroy()
             except Exception as e:
@@ -570,17 +614,25 @@ class LibraryUI:
     def search_books_dialog(self):
         query = simpledialog.askstring("Search Books", "Enter search term:")
         if query:
-            results = self.lms.search_books_recursive(query)
+            results = self.lms.search_books(query)
             if results:
                 messagebox.showinfo("Search Results", f"Found {len(results)} books matching '{query}'")
-                self.books_tree.selection_set()
-                for book_id in results:
-                    for item in self.books_tree.get_children():
-                        if self.books_tree.item(item)['values'][0] == book_id:
-                            self.books_tree.selection_add(item)
-                            self.books_tree.see(item)
             else:
-                messagebox.showinfo("Search Results", f"No books found matching '{query}'")
+                ranked = self.lms.fuzzy_search(query)
+                if not ranked:
+                    messagebox.showinfo("Search Results", f"No books found matching '{query}'")
+                    return
+                results = [book_id for book_id, score in ranked]
+                message = f"No exact matches for '{query}'. Closest matches:\n\n"
+                for book_id, score in ranked:
+                    book = self.lms.books[book_id]
+                    message += f"• {book['title']} - {book['author']} ({score:.0%})\n"
+                messagebox.showinfo("Search Results", message)
+            self.notebook.select(0)
+            items = [book_id for book_id in results if self.books_tree.exists(book_id)]
+            self.books_tree.selection_set(items)
+            if items:
+                self.books_tree.see(items[0])
     
     def issue_book_dialog(self):
         if not self.lms.books or not self.lms.members:
@@ -596,14 +648,12 @@ class LibraryUI:
         
         tk.Label(dialog, text="Book ID:", bg='white').pack()
         book_var = tk.StringVar()
-        book_combo = ttk.Combobox(dialog, textvariable=book_var, 
-                                  values=[f"{bid}: {book['title']}" for bid, book in self.lms.books.items() if book['status'] == 'Available'])
+        book_combo = self.book_picker(dialog, book_var, status='Available')
         book_combo.pack(pady=5)
         
         tk.Label(dialog, text="Member ID:", bg='white').pack()
         member_var = tk.StringVar()
-        member_combo = ttk.Combobox(dialog, textvariable=member_var, 
-                                    values=[f"{mid}: {member['name']}" for mid, member in self.lms.members.items()])
+        member_combo = self.member_picker(dialog, member_var)
         member_combo.pack(pady=5)
         
         def issue():
@@ -612,9 +662,8 @@ class LibraryUI:
                 member_id = member_var.get().split(':')[0]
                 
                 result = self.issue_book_nested(book_id, member_id)
-                self.lms.save_data()
-                self.refresh_books()
-                self.refresh_issued_books()
+                self.autosaver.request()
+                self.apply_changes()
                 messagebox.showinfo("Success", result)
                 dialog.destroy()
             except Exception as e:
@@ -622,6 +671,20 @@ class LibraryUI:
         
         tk.Button(dialog, text="Issue Book", command=issue, bg='#e67e22', fg='white').pack(pady=20)
     
+    def warm_pickers(self):
+        self.lms.complete_books('', limit=1)
+        self.lms.complete_members('', limit=1)
+    
+    def book_picker(self, parent, variable, status=None):
+        return AutocompleteCombobox(parent, lambda text, limit: [
+            f"{book_id}: {title}" for book_id, title in self.lms.complete_books(text, limit, status=status)
+        ], textvariable=variable)
+    
+    def member_picker(self, parent, variable, borrowers_only=False):
+        return AutocompleteCombobox(parent, lambda text, limit: [
+            f"{member_id}: {name}" for member_id, name in self.lms.complete_members(text, limit, borrowers_only=borrowers_only)
+        ], textvariable=variable)
+    
     def return_book_dialog(self):
         if not self.lms.issued_books:
             messagebox.showinfo("Info", "No books are currently issued")
@@ -636,18 +699,12 @@ class LibraryUI:
         
         tk.Label(dialog, text="Book ID:", bg='white').pack()
         book_var = tk.StringVar()
-        book_combo = ttk.Combobox(dialog, textvariable=book_var, 
-                                  values=[f"{bid}: {self.lms.books[bid]['title']}" 
-                                         for mid, issued_list in self.lms.issued_books.items() 
-                                         for issued in issued_list 
-                                         for bid in [issued['book_id']]])
+        book_combo = self.book_picker(dialog, book_var, status='Issued')
         book_combo.pack(pady=5)
         
         tk.Label(dialog, text="Member ID:", bg='white').pack()
         member_var = tk.StringVar()
-        member_combo = ttk.Combobox(dialog, textvariable=member_var, 
-                                    values=[f"{mid}: {self.lms.members[mid]['name']}" 
-                                           for mid in self.lms.issued_books.keys()])
+        member_combo = self.member_picker(dialog, member_var, borrowers_only=True)
         member_combo.pack(pady=5)
         
         def return_book():
@@ -656,9 +713,8 @@ class LibraryUI:
                 member_id = member_var.get().split(':')[0]
                 
                 result = self.lms.return_book(book_id, member_id)
-                self.lms.save_data()
-                self.refresh_books()
-                self.refresh_issued_books()
+                self.autosaver.request()
+                self.apply_changes()
                 messagebox.showinfo("Success", result)
                 dialog.destroy()
             except Exception as e:
@@ -678,26 +734,138 @@ class LibraryUI:
         overdue = self.lms.get_overdue_books()
         if overdue:
             message = f"Found {len(overdue)} overdue books:\n\n"
-            for issued in overdue:
+            for issued in overdue[:self.MESSAGE_ROWS]:
                 book = self.lms.books[issued['book_id']]
-                member_name = "Unknown"
-                for member_id, issued_list in self.lms.issued_books.items():
-                    for issued_book in issued_list:
-                        if issued_book['book_id'] == issued['book_id']:
-                            member_name = self.lms.members[member_id]['name']
-                            break
-                    if member_name != "Unknown":
-                        break
+                loan = self.lms.loan_for_book(issued['book_id'])
+                member_name = self.lms.members[loan[0]]['name'] if loan else "Unknown"
                 
                 days_overdue = (datetime.now() - issued['issue_date']).days - 14
                 message += f"• {book['title']} - {member_name} ({days_overdue} days overdue)\n"
+            if len(overdue) > self.MESSAGE_ROWS:
+                message += f"\n... and {len(overdue) - self.MESSAGE_ROWS} more (use Export Report for the full list)\n"
             messagebox.showinfo("Overdue Books", message)
         else:
             messagebox.showinfo("Overdue Books", "No overdue books found")
     
     def show_late_fees(self):
-        total_fees = self.lms.calculate_total_late_fees()
-        messagebox.showinfo("Late Fees", f"Total late fees: ${total_fees:.2f}")
+        report = self.lms.late_fee_report()
+        message = f"Total late fees: ${report['total_fees']:.2f}\n"
+        message += f"Overdue loans: {report['overdue_loans']} of {report['active_loans']}\n"
+        top_members = sorted(report['member_totals'].items(), key=lambda item: item[1], reverse=True)[:5]
+        if top_members:
+            message += "\nHighest balances:\n"
+            for member_id, fee in top_members:
+                message += f"• {self.lms.members[member_id]['name']}: ${fee:.2f}\n"
+            message += "\nDays overdue:\n"
+            for label, count in report['histogram']:
+                message += f"• {label}: {count}\n"
+        messagebox.showinfo("Late Fees", message)
+    
+    def export_report_dialog(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Export Report")
+        dialog.geometry("400x250")
+        dialog.configure(bg='white')
+        
+        tk.Label(dialog, text="Export Report", font=('Arial', 16, 'bold'), bg='white').pack(pady=10)
+        
+        titles = {title: report for report, (title, columns, rows) in reports.REPORTS.items()}
+        report_var = tk.StringVar(value=next(iter(titles)))
+        ttk.Combobox(dialog, textvariable=report_var, values=list(titles), state='readonly', width=30).pack(pady=5)
+        progress_label = tk.Label(dialog, text="", bg='white', fg='#7f8c8d')
+        progress_label.pack(pady=5)
+        done = {}
+        
+        def run(report, path):
+            try:
+                done['count'] = reports.export_report(self.lms, report, path,
+                                                      progress=lambda rows: done.update(rows=rows))
+            except Exception as e:
+                done['error'] = e
+        
+        def poll(path):
+            if 'error' in done:
+                progress_label.config(text="")
+                messagebox.showerror("Error", str(done.pop('error')))
+            elif 'count' in done:
+                progress_label.config(text="")
+                messagebox.showinfo("Export Report", f"Wrote {done.pop('count')} rows to {path}")
+                dialog.destroy()
+            else:
+                progress_label.config(text=f"Exporting... {done.get('rows', 0)} rows")
+                dialog.after(100, poll, path)
+        
+        def export():
+            report = titles[report_var.get()]
+            path = filedialog.asksaveasfilename(parent=dialog, initialfile=f"{report}.csv", defaultextension='.csv',
+                                                filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("HTML", "*.html")])
+            if not path:
+                return
+            done.clear()
+            if hasattr(self.lms, 'lock'):
+                # Rows are read as they are written, so the UI stays usable during a large export
+                threading.Thread(target=run, args=(report, path), daemon=True).start()
+            else:
+                run(report, path)
+            poll(path)
+        
+        tk.Button(dialog, text="Export...", command=export, bg='#16a085', fg='white').pack(pady=20)
+    
+    def diagnostics_dialog(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Diagnostics")
+        dialog.geometry("900x500")
+        dialog.configure(bg='white')
+        
+        summary = tk.Label(dialog, text="", bg='white', justify='left', anchor='w')
+        summary.pack(fill='x', padx=10, pady=10)
+        
+        columns = ('Operation', 'Calls', 'Errors', 'p50 ms', 'p95 ms', 'p99 ms', 'Max ms', 'Avg Size')
+        tree = ttk.Treeview(dialog, columns=columns, show='headings')
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=200 if column == 'Operation' else 85, anchor='w' if column == 'Operation' else 'e')
+        tree.pack(fill='both', expand=True, padx=10)
+        
+        buttons = tk.Frame(dialog, bg='white')
+        buttons.pack(pady=10)
+        toggle = tk.Button(buttons, bg='#3498db', fg='white')
+        toggle.pack(side='left', padx=5)
+        
+        def show():
+            stats = self.diagnostics()
+            autosave = stats['autosave']
+            summary.config(text=f"Instrumentation {'on' if stats['enabled'] else 'off'} for {stats['uptime_s']:.0f}s  |  "
+                                f"Autosave: {autosave['saves']} saves, {autosave['coalesced']} coalesced, "
+                                f"{autosave['queue_depth']} pending, max {autosave['max_latency_ms']} ms")
+            toggle.config(text="Disable" if stats['enabled'] else "Enable")
+            tree.delete(*tree.get_children())
+            for name, op in stats['operations'].items():
+                tree.insert('', 'end', values=(name, op['count'], op['errors'], op['p50_ms'], op['p95_ms'], op['p99_ms'],
+                                               op['max_ms'], '' if op['payload_mean'] is None else op['payload_mean']))
+        
+        def poll():
+            if dialog.winfo_exists():
+                show()
+                dialog.after(1000, poll)
+        
+        def toggle_metrics():
+            if self.metrics.enabled:
+                self.metrics.uninstrument()
+            else:
+                self.enable_metrics()
+            show()
+        
+        def save():
+            path = filedialog.asksaveasfilename(parent=dialog, initialfile='library_metrics.json', defaultextension='.json')
+            if path:
+                with open(path, 'w') as f:
+                    json.dump(self.diagnostics(), f, indent=2)
+        
+        toggle.config(command=toggle_metrics)
+        tk.Button(buttons, text="Reset", command=lambda: (self.metrics.reset(), show()), bg='#7f8c8d', fg='white').pack(side='left', padx=5)
+        tk.Button(buttons, text="Save JSON...", command=save, bg='#16a085', fg='white').pack(side='left', padx=5)
+        poll()
     
     def show_categories(self):
         categories_text = "Available Categories:\n\n"
@@ -713,7 +881,8 @@ class LibraryUI:
 
 def main():
     root = tk.Tk()
-    app = LibraryUI(root)
+    # LIBRARY_SHARED=1 lets several desks work on the same library_data.json
+    app = LibraryUI(root, shared=bool(os.environ.get('LIBRARY_SHARED')))
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Command-line entry point for scripted and nightly library jobs
+
+Usage: python library_cli.py [--data-file library_data.json] [--journal | --shared] [--binary | --partitioned] [--json] COMMAND ...
+
+    search QUERY [--fuzzy] [--limit 20]
+    issue BOOK_ID MEMBER_ID
+    return BOOK_ID MEMBER_ID
+    add-book TITLE AUTHOR CATEGORY ISBN
+    add-member NAME EMAIL PHONE
+    overdue [--as-of YYYY-MM-DD] [--limit N]
+    fees [--as-of YYYY-MM-DD]
+    report {books,members,loans,overdue} PATH [--format csv|jsonl|html] [--as-of YYYY-MM-DD]
+    import PATH [--format csv|jsonl|mrk] [--default-category C] [--errors FILE] [--dry-run]
+    compact
+    stats
+
+Only library_core is loaded up front (no tkinter), and the report and import
+modules only for their own commands, so a command starts in tens of
+milliseconds plus the time to read the data file. --json prints the result
+as JSON for other scripts. --binary reads and saves the memory-mapped
+snapshot (library_data.lmsnap) instead, so a lookup on a large catalogue
+does not wait for the whole file to be parsed; --partitioned keeps books
+(one file per category), members and loans in library_data.parts/ and
+rewrites only the files a command changed. Exits 1 with a message if
+the command fails.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
+from library_core import LibraryManagementSystem
+
+
+def _date(text):
+    try:
+        return datetime.strptime(text, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a YYYY-MM-DD date")
+
+
+def search(lms, args):
+    if args.fuzzy:
+        book_ids = [book_id for book_id, score in lms.fuzzy_search(args.query, args.limit)]
+    else:
+        book_ids = lms.search_books(args.query)[:args.limit]
+    return [dict(lms.books[book_id], book_id=book_id) for book_id in book_ids]
+
+
+def issue(lms, args):
+    return lms.issue_book(args.book_id, args.member_id)
+
+
+def return_book(lms, args):
+    return lms.return_book(args.book_id, args.member_id)
+
+
+def add_book(lms, args):
+    if args.category not in lms.categories:
+        raise ValueError(f"Unknown category '{args.category}' (use one of: {', '.join(sorted(lms.categories))})")
+    return {'book_id': lms.add_book(args.title, args.author, args.category, args.isbn)}
+
+
+def add_member(lms, args):
+    return {'member_id': lms.add_member(args.name, args.email, args.phone)}
+
+
+def overdue(lms, args):
+    from itertools import islice
+    from reports import LOAN_COLUMNS, loan_rows
+    rows = loan_rows(lms, args.as_of, overdue_only=True)
+    return [dict(zip(LOAN_COLUMNS, row)) for row in islice(rows, args.limit)]
+
+
+def fees(lms, args):
+    as_of = args.as_of or datetime.now()
+    return {'as_of': as_of.strftime('%Y-%m-%d'), 'overdue_loans': len(lms.get_overdue_books(as_of)),
+            'total_fees': lms.calculate_total_late_fees(as_of)}
+
+
+def report(lms, args):
+    from reports import export_report
+    start = time.perf_counter()
+    rows = export_report(lms, args.report, args.path, fmt=args.format, as_of=args.as_of)
+    return {'report': args.report, 'path': args.path, 'rows': rows, 'seconds': round(time.perf_counter() - start, 2)}
+
+
+def import_books(lms, args):
+    import importer
+    result = importer.import_books(lms, args.path, fmt=args.format, default_category=args.default_category,
+                                   errors_file=args.errors, dry_run=args.dry_run)
+    return result.summary()
+
+
+def compact(lms, args):
+    if lms.journal is not None:
+        lms.compact(background=False)
+    else:
+        lms.save_data()
+    return f"Compacted {lms.data_file}"
+
+
+def stats(lms, args):
+    return {'books': len(lms.books), 'members': len(lms.members), 'loans': len(lms.loans_by_book),
+            'overdue_loans': len(lms.get_overdue_books())}
+
+
+# name: (function, changes the library, help)
+COMMANDS = {
+    'search': (search, False, "search the catalogue"),
+    'issue': (issue, True, "issue a book to a member"),
+    'return': (return_book, True, "return a book"),
+    'add-book': (add_book, True, "add a book"),
+    'add-member': (add_member, True, "add a member"),
+    'overdue': (overdue, False, "list overdue loans, longest overdue first"),
+    'fees': (fees, False, "total late fees"),
+    'report': (report, False, "export a report to CSV, JSON Lines or HTML"),
+    'import': (import_books, False, "import books from CSV, JSON Lines or MARC"),
+    'compact': (compact, False, "fold the journal into the data file"),
+    'stats': (stats, False, "count books, members and loans")
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='library-cli', description="Run library operations without the GUI")
+    parser.add_argument('--data-file', default='library_data.json')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--journal', action='store_true', help="append changes to the journal")
+    mode.add_argument('--shared', action='store_true', help="share the data file with other desks")
+    storage = parser.add_mutually_exclusive_group()
+    storage.add_argument('--binary', action='store_const', const='binary', dest='snapshot', default='json',
+                         help="use the memory-mapped binary snapshot")
+    storage.add_argument('--partitioned', action='store_const', const='partitioned', dest='snapshot',
+                         help="use partitioned data files")
+    parser.add_argument('--json', action='store_true', help="print the result as JSON")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+    parsers = {name: commands.add_parser(name, help=text) for name, (function, changes, text) in COMMANDS.items()}
+
+    parsers['search'].add_argument('query')
+    parsers['search'].add_argument('--fuzzy', action='store_true', help="typo-tolerant, ranked search")
+    parsers['search'].add_argument('--limit', type=int, default=20)
+    for name in ('issue', 'return'):
+        parsers[name].add_argument('book_id')
+        parsers[name].add_argument('member_id')
+    for field in ('title', 'author', 'category', 'isbn'):
+        parsers['add-book'].add_argument(field)
+    for field in ('name', 'email', 'phone'):
+        parsers['add-member'].add_argument(field)
+    for name in ('overdue', 'fees', 'report'):
+        parsers[name].add_argument('--as-of', type=_date, help="YYYY-MM-DD (default: now)")
+    parsers['overdue'].add_argument('--limit', type=int, default=None)
+    parsers['report'].add_argument('report', choices=('books', 'members', 'loans', 'overdue'))
+    parsers['report'].add_argument('path')
+    parsers['report'].add_argument('--format', choices=('csv', 'jsonl', 'html'))
+    parsers['import'].add_argument('path')
+    parsers['import'].add_argument('--format', choices=('csv', 'jsonl', 'mrk'))
+    parsers['import'].add_argument('--default-category')
+    parsers['import'].add_argument('--errors', help="write rejected rows to this CSV file")
+    parsers['import'].add_argument('--dry-run', action='store_true')
+    return parser
+
+
+def _print(result):
+    if isinstance(result, str):
+        print(f"✅ {result}")
+    elif isinstance(result, list):
+        for row in result:
+            print('  '.join(str(value) for value in row.values()))
+        print(f"({len(result)} rows)")
+    else:
+        for key, value in result.items():
+            print(f"{key}: {value}")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    function, changes, text = COMMANDS[args.command]
+    try:
+        lms = LibraryManagementSystem(data_file=args.data_file, journal=args.journal, shared=args.shared,
+                                      snapshot=args.snapshot, strict=True)
+    except (OSError, ValueError) as e:
+        message = f"Cannot open {args.data_file}: {e}"
+        print(json.dumps({'error': message}) if args.json else f"❌ {message}")
+        return 1
+    try:
+        result = function(lms, args)
+        if changes:
+            lms.save_data()
+    except (OSError, ValueError) as e:
+        print(json.dumps({'error': str(e)}) if args.json else f"❌ {e}")
+        return 1
+    finally:
+        lms.close()
+    if args.json:
+        print(json.dumps(result, default=str))
+    else:
+        _print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
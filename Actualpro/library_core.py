@@ -0,0 +1,947 @@
+"""
+Library Management System engine, without the Tk user interface
+
+LibraryManagementSystem keeps the catalogue, members and loans in memory
+with their search and due-date indexes and persists them to
+library_data.json (optionally through the journal, or shared with other
+desks). Nothing here imports tkinter, so batch jobs, the HTTP server and
+library_cli.py start quickly on machines without a display; library.py
+re-exports these names for existing callers and adds LibraryUI.
+"""
+
+from datetime import datetime
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+import binary_snapshot
+from journal import OperationJournal
+from locks import LibraryLock, LockStripes
+from loan_index import DueDateIndex
+from partitions import MANIFEST, PartitionedStore, partition_dir
+from records import Loan, RecordLayout, to_json
+import schema
+from search_index import InvertedIndex, PrefixIndex, TrigramIndex
+from shared_file import ChangeLog, FileLock
+
+CATEGORIES = ('Fiction', 'Non-Fiction', 'Science', 'History', 'Technology', 'Literature')
+LIBRARY_RULES = frozenset({
+    'Maximum 3 books per member',
+    '14 days loan period',
+    'Late fee: $1 per day',
+    'No food or drinks',
+    'Quiet zone'
+})
+
+def _locked(method):
+    """Run a method with lms.lock held exclusively, so no operation runs alongside it."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _striped(*id_params):
+    """Run an operation with lms.lock held shared and the lock stripes of the named
+    book_id / member_id arguments held, so its checks and changes are atomic with
+    respect to every other operation on the same book or member."""
+    def decorate(method):
+        positions = [method.__code__.co_varnames.index(name) - 1 for name in id_params]
+        kinds = [name.split('_')[0] for name in id_params]
+        
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            keys = [(kind, args[position] if position < len(args) else kwargs.get(name))
+                    for kind, position, name in zip(kinds, positions, id_params)]
+            with self.lock.shared(), self.stripes.hold(*keys):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+class LibraryManagementSystem:
+    def __init__(self, data_file='library_data.json', journal=False, compaction_threshold=5000, layout='dict',
+                 shared=False, snapshot='json', partition_by='category', strict=False):
+        if journal and shared:
+            raise ValueError("A shared data file cannot also use the journal")
+        if snapshot not in ('json', 'binary', 'partitioned'):
+            raise ValueError(f"Unknown snapshot format: {snapshot}")
+        if snapshot != 'json' and shared:
+            raise ValueError("Shared desks coordinate through the JSON data file; use snapshot='json'")
+        if snapshot == 'binary' and layout == 'columnar':
+            raise ValueError("Binary snapshots are read through the dict or slots layout")
+        self.layout = RecordLayout(layout)
+        self.books = self.layout.books_table({})
+        self.members = self.layout.members_table({})
+        self.issued_books = {}
+        self.categories = set(CATEGORIES)
+        self.library_rules = LIBRARY_RULES
+        self.data_file = data_file
+        # snapshot='binary' saves to library_data.lmsnap instead and maps it on load;
+        # snapshot='partitioned' saves only the changed files in library_data.parts/
+        self.snapshot_file = None
+        self.partitions = None
+        # The open binary snapshot the books and members overlays read from
+        self._mapped = None
+        if snapshot == 'binary':
+            self.snapshot_file = binary_snapshot.snapshot_path(data_file)
+        elif snapshot == 'partitioned':
+            self.partitions = PartitionedStore(partition_dir(data_file), shard=partition_by)
+            self.snapshot_file = self.partitions.manifest_file
+        # strict=True raises on an unreadable data file instead of starting with an empty library
+        self.strict = strict
+        self.journal = OperationJournal(data_file + '.journal') if journal else None
+        self.compaction_threshold = compaction_threshold
+        # Shared mode: several desks (processes) use one data file through the change log
+        self.shared = shared
+        self.desk_id = uuid.uuid4().hex[:12]
+        self.file_lock = FileLock(data_file + '.lock') if shared else None
+        self.changes = ChangeLog(data_file + '.changes') if shared else None
+        self.synced_seq = 0
+        self.conflicts = []
+        self._unsynced = []
+        # Bumped by every full (re)load, so the UI knows to rebuild its tables
+        self.generation = 0
+        self.search_index = InvertedIndex()
+        self.fuzzy_index = TrigramIndex()
+        self.due_index = DueDateIndex()
+        self.loans_by_book = {}
+        # Autocomplete indexes are built on first use and maintained from then on
+        self._book_completions = None
+        self._member_completions = None
+        self._compactor = None
+        self._transaction = None
+        self._listeners = []
+        # Single-record operations hold self.lock shared plus the stripes of the books and
+        # members they check; the in-memory tables and indexes change only under _index_lock.
+        self.lock = LibraryLock()
+        self.stripes = LockStripes()
+        self._index_lock = threading.RLock()
+        self._version = 0
+        self._write_depth = 0
+        self._save_lock = threading.Lock()
+        self.load_data()
+    
+    def load_data(self):
+        # Locks are always taken in the order file_lock, lock, stripes, _index_lock
+        with self.file_lock if self.shared else nullcontext(), self.lock, self._writing():
+            self._load_data()
+    
+    def _load_data(self):
+        if self.shared:
+            with self.file_lock:
+                data = self._load_snapshot()
+                self.synced_seq = data.get('seq', 0)
+                self._unsynced = []
+                self.changes.forget()
+                records = self.changes.read_new()
+                if self.changes.base_seq is not None and self.changes.base_seq > self.synced_seq:
+                    raise ValueError(f"{self.changes.path} continues from seq {self.changes.base_seq} "
+                                     f"but {self.data_file} is at seq {self.synced_seq}")
+                for record in records:
+                    if record['seq'] > self.synced_seq:
+                        self._apply_record(record)
+                        self.synced_seq = record['seq']
+            self.generation += 1
+            return
+        
+        data = self._load_snapshot()
+        self.generation += 1
+        if self.journal is not None:
+            journal_seq = data.get('journal_seq', 0)
+            self.journal.seq = journal_seq
+            for record in self.journal.read(after_seq=journal_seq):
+                self._apply_record(record)
+            self.journal.open()
+    
+    def _snapshot_is_current(self):
+        # The JSON file wins if it was written after the snapshot (e.g. by a desk using snapshot='json')
+        if self.snapshot_file is None or not os.path.exists(self.snapshot_file):
+            return False
+        return not os.path.exists(self.data_file) or \
+            os.path.getmtime(self.snapshot_file) >= os.path.getmtime(self.data_file)
+    
+    def _newer_snapshot(self):
+        # In JSON mode: a binary or partitioned snapshot saved after library_data.json, or None
+        for snapshot, path in (('binary', binary_snapshot.snapshot_path(self.data_file)),
+                               ('partitioned', os.path.join(partition_dir(self.data_file), MANIFEST))):
+            if os.path.exists(path) and (not os.path.exists(self.data_file)
+                                         or os.path.getmtime(path) >= os.path.getmtime(self.data_file)):
+                return snapshot, path
+        return None
+    
+    def _load_binary(self):
+        mapped = self._mapped = binary_snapshot.Snapshot(self.snapshot_file)
+        self.books = binary_snapshot.Overlay(mapped.books, self.layout.book)
+        self.members = binary_snapshot.Overlay(mapped.members, self.layout.member)
+        self.issued_books = {}
+        for member_id, book_id, issue_ts, due_ts in mapped.loans():
+            self.issued_books.setdefault(member_id, []).append(Loan(book_id, issue_ts, due_ts))
+        return mapped.meta
+    
+    def _load_snapshot(self):
+        # Read library_data.json (or the binary or partitioned snapshot) and rebuild the indexes; returns the file's contents ({} if none)
+        data = {}
+        binary = False
+        partitioned = False
+        newer = self._newer_snapshot() if self.snapshot_file is None else None
+        if newer is not None:
+            # Loading the older JSON file would lose those changes at the next save
+            raise ValueError(f"{newer[1]} is newer than {self.data_file}; open the library with "
+                             f"snapshot='{newer[0]}', or remove it to use the JSON file")
+        try:
+            if self._snapshot_is_current() and self.partitions is None:
+                binary = True
+                data = self._load_binary()
+            else:
+                self._mapped = None
+                if self._snapshot_is_current():
+                    partitioned = True
+                    data = self.partitions.load()
+                elif os.path.exists(self.data_file):
+                    with open(self.data_file, 'r') as f:
+                        data = schema.migrate(json.load(f))
+                self.books = self.layout.books_table(data.get('books', {}))
+                self.members = self.layout.members_table(data.get('members', {}))
+                self.issued_books = {
+                    member_id: [Loan(issued['book_id'], issued['issue_ts'], issued['due_ts']) for issued in issued_list]
+                    for member_id, issued_list in data.get('issued_books', {}).items()
+                }
+        except Exception as e:
+            # An empty library would be saved over the intact snapshot or partitions
+            if binary:
+                raise ValueError(f"Cannot load {self.snapshot_file}: {e}") from e
+            if partitioned:
+                raise ValueError(f"Cannot load {self.partitions.directory}: {e}") from e
+            if self.strict:
+                raise
+            print(f"Error loading data: {e}")
+            data = {}
+            self.books = self.layout.books_table({})
+            self.members = self.layout.members_table({})
+            self.issued_books = {}
+        if self.partitions is not None and not partitioned:
+            self.partitions.touch_all()
+        
+        if binary:
+            # Reading every record would undo the point of mapping them; built on first search instead
+            self.search_index = self.fuzzy_index = None
+        else:
+            self.search_index = InvertedIndex()
+            self.search_index.build(self.books)
+            self.fuzzy_index = TrigramIndex()
+            self.fuzzy_index.build(self.books)
+        self.due_index.build(self.issued_books)
+        self.loans_by_book = {issued['book_id']: (member_id, issued)
+                              for member_id, issued_list in self.issued_books.items() for issued in issued_list}
+        self._book_completions = None
+        self._member_completions = None
+        return data
+    
+    def _serialize(self):
+        serializable_issued_books = {
+            member_id: [issued.to_storage() for issued in issued_list]
+            for member_id, issued_list in self.issued_books.items()
+        }
+        
+        return {
+            'schema_version': schema.SCHEMA_VERSION,
+            'books': self.books,
+            'members': self.members,
+            'issued_books': serializable_issued_books
+        }
+    
+    def _snapshot(self):
+        # Copy the mutable records so the file can be written outside the lock
+        with self.lock:
+            data = self._serialize()
+            if self.partitions is not None:
+                # Only the partitions changed since the last save
+                data['partitions'] = self.partitions.collect(self.books, self.members, data.pop('issued_books'))
+                del data['books'], data['members']
+                return data
+            data['books'] = {book_id: dict(book) for book_id, book in self.books.items()}
+            data['members'] = dict(self.members.items())
+            return data
+    
+    def _write_snapshot(self, data):
+        if self.partitions is not None:
+            self.partitions.write(data['partitions'], {key: value for key, value in data.items() if key != 'partitions'})
+            return
+        if self.snapshot_file is not None:
+            binary_snapshot.write_snapshot(self.snapshot_file, data, replace=self._replace_snapshot)
+            return
+        tmp_file = self.data_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f, indent=2, default=to_json)
+        os.replace(tmp_file, self.data_file)
+    
+    def _replace_snapshot(self, tmp_file, path):
+        # Move the overlays onto the new file so the old one can be released. Where it must be
+        # unmapped before the rename (Windows), readers that hit the closed mapping retry (see _read).
+        with self.lock, self._writing():
+            mapped = self._mapped
+            if mapped is None:
+                os.replace(tmp_file, path)
+                return
+            if binary_snapshot.UNMAP_BEFORE_REPLACE:
+                mapped.close()
+            try:
+                os.replace(tmp_file, path)
+            finally:
+                # If the rename failed this maps the old file again
+                self._mapped = binary_snapshot.Snapshot(path)
+                self.books.rebase(self._mapped.books)
+                self.members.rebase(self._mapped.members)
+    
+    def save_data(self):
+        # Inside a transaction the save happens once at commit; other threads wait for it on the lock
+        if self._transaction is not None and self._transaction['owner'] == threading.get_ident():
+            return
+        if self.journal is not None:
+            with self.lock:
+                self.journal.flush()
+                if self.journal.pending >= self.compaction_threshold:
+                    self.compact()
+            return
+        if self.shared:
+            self.sync()
+            return
+        # Saves may come from the autosave thread; _save_lock keeps them in order
+        with self._save_lock:
+            self._write_snapshot(self._snapshot())
+    
+    @_locked
+    def compact(self, background=True):
+        """Fold the journal into a fresh snapshot of library_data.json.
+        
+        The snapshot payload is copied here; the (slow) file write runs on a background thread.
+        """
+        if self.journal is None or (self._compactor is not None and self._compactor.is_alive()):
+            return
+        data = self._snapshot()
+        data['journal_seq'] = self.journal.seq
+        self.journal.rotate()
+        
+        def write():
+            self._write_snapshot(data)
+            self.journal.discard_rotated()
+        
+        if background:
+            self._compactor = threading.Thread(target=write, daemon=True)
+            self._compactor.start()
+        else:
+            write()
+    
+    def sync(self, timeout=30.0):
+        """Shared mode: pull other desks' changes and push ours, under the data file lock.
+        
+        Records from other desks that touch none of the books or members we have
+        unpushed changes for are applied in place. Otherwise (or if the change
+        log was compacted past what we read) the data is reloaded and our
+        changes are replayed through the normal operations; any that no longer
+        apply, e.g. a book another desk issued first, are dropped and listed in
+        self.conflicts. Returns the number of records pulled, or None if the
+        lock was not free within timeout.
+        """
+        if not self.file_lock.acquire(timeout):
+            return None
+        try:
+            with self.lock:
+                remote = self._pull()
+                if remote is None or self._overlaps(remote):
+                    self._rebase()
+                    pulled = len(remote or ())
+                else:
+                    with self._writing():
+                        for record in remote:
+                            self._apply_record(record)
+                            self._notify(record)
+                    pulled = len(remote)
+                if self._unsynced:
+                    for record in self._unsynced:
+                        self.synced_seq += 1
+                        record['seq'] = self.synced_seq
+                        record['desk'] = self.desk_id
+                    self.changes.append(self._unsynced, self.synced_seq - len(self._unsynced))
+                    self._unsynced = []
+                snapshot = None
+                if self.synced_seq - (self.changes.base_seq or 0) >= self.compaction_threshold:
+                    snapshot = self._snapshot()
+                    snapshot['seq'] = self.synced_seq
+            if snapshot is not None:
+                # Fold the log into the data file; other desks see the new log header and carry on
+                self._write_snapshot(snapshot)
+                self.changes.reset(snapshot['seq'])
+        finally:
+            self.file_lock.release()
+        return pulled
+    
+    def poll_changes(self):
+        """Shared mode: sync() without waiting if another desk holds the lock."""
+        return self.sync(timeout=0)
+    
+    def take_conflicts(self):
+        with self.lock:
+            conflicts, self.conflicts = self.conflicts, []
+            return conflicts
+    
+    def _pull(self):
+        # Other desks' records since our last sync, or None if we cannot catch up incrementally
+        records = self.changes.read_new()
+        if self.changes.base_seq is not None and self.changes.base_seq > self.synced_seq:
+            return None
+        records = [record for record in records if record['seq'] > self.synced_seq]
+        if records and records[0]['seq'] != self.synced_seq + 1:
+            return None
+        if records:
+            self.synced_seq = records[-1]['seq']
+        return [record for record in records if record.get('desk') != self.desk_id]
+    
+    @staticmethod
+    def _touches(records):
+        keys = set()
+        for record in records:
+            if 'book_id' in record:
+                keys.add(('book', record['book_id']))
+            if 'member_id' in record:
+                keys.add(('member', record['member_id']))
+        return keys
+    
+    def _overlaps(self, remote):
+        return bool(self._unsynced) and not self._touches(remote).isdisjoint(self._touches(self._unsynced))
+    
+    def _rebase(self):
+        unsynced = self._unsynced
+        self.load_data()
+        ids = {}
+        for record in unsynced:
+            op = record['op']
+            book_id = ids.get(('book', record.get('book_id')), record.get('book_id'))
+            member_id = ids.get(('member', record.get('member_id')), record.get('member_id'))
+            try:
+                if op == 'add_book':
+                    book = record['book']
+                    ids[('book', book_id)] = self.add_book(book['title'], book['author'], book['category'], book['isbn'])
+                elif op == 'delete_book':
+                    self.delete_book(book_id)
+                elif op == 'add_member':
+                    member = record['member']
+                    ids[('member', member_id)] = self.add_member(member['name'], member['email'], member['phone'])
+                elif op == 'delete_member':
+                    self.delete_member(member_id)
+                elif op == 'issue_book':
+                    self.issue_book(book_id, member_id)
+                elif op == 'return_book':
+                    self.return_book(book_id, member_id)
+            except ValueError as e:
+                self.conflicts.append(f"{op.replace('_', ' ').capitalize()} "
+                                      f"{book_id or member_id}: {e} (changed at another desk)")
+    
+    def close(self):
+        if self.shared and self._unsynced:
+            self.sync()
+        if self.journal is not None:
+            self.journal.flush(sync=True)
+            if self._compactor is not None:
+                self._compactor.join()
+            self.journal.close()
+    
+    def _record(self, op, **fields):
+        fields['op'] = op
+        if self._transaction is not None:
+            self._transaction['records'].append(fields)
+            return
+        self._commit_record(fields)
+    
+    def _commit_record(self, record):
+        if self.journal is not None:
+            self.journal.append(record)
+        elif self.shared:
+            self._unsynced.append(record)
+        if self.partitions is not None:
+            self._touch_partitions(record)
+        self._notify(record)
+    
+    def _touch_partitions(self, record):
+        # Mark the partition files a change has to rewrite
+        if 'book_id' in record:
+            self.partitions.touch_book(record['book_id'], self.books.get(record['book_id']))
+        if record['op'] in ('add_member', 'delete_member'):
+            self.partitions.touch('members')
+        elif record['op'] in ('issue_book', 'return_book'):
+            self.partitions.touch('loans')
+    
+    @contextmanager
+    def _writing(self):
+        """Change the tables and indexes; readers that overlap a change retry (see _read)."""
+        with self._index_lock:
+            self._write_depth += 1
+            if self._write_depth == 1:
+                self._version += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._version += 1
+    
+    READ_RETRIES = 3
+    
+    def _read(self, function, *args):
+        """Run a read-only function without locking (a seqlock read).
+        
+        _version is odd while a change is being applied and bumped again when it
+        is done, so a read that started and finished on the same even version saw
+        a consistent state. One that overlapped a change, or tripped over a table
+        resized under it, is retried, and after READ_RETRIES runs under
+        _index_lock instead.
+        """
+        for _ in range(self.READ_RETRIES):
+            version = self._version
+            if not version % 2:
+                try:
+                    result = function(*args)
+                except (RuntimeError, LookupError, ValueError):
+                    result = version = None
+                if version is not None and self._version == version:
+                    return result
+            time.sleep(0)
+        with self._index_lock:
+            return function(*args)
+    
+    def subscribe(self, listener):
+        """Call listener(record) after each committed change; records are the journal's op dicts."""
+        self._listeners.append(listener)
+    
+    def _notify(self, record):
+        for listener in self._listeners:
+            listener(record)
+    
+    def _on_rollback(self, undo, *args):
+        if self._transaction is not None:
+            self._transaction['undo'].append((undo, args))
+    
+    def _apply_record(self, record):
+        op = record['op']
+        if op == 'add_book':
+            if record['book_id'] in self.books:
+                self._remove_book(record['book_id'])
+            self._insert_book(record['book_id'], record['book'])
+        elif op == 'delete_book':
+            if record['book_id'] in self.books:
+                self._remove_book(record['book_id'])
+        elif op == 'add_member':
+            if record['member_id'] in self.members:
+                self._remove_member(record['member_id'])
+            self._insert_member(record['member_id'], record['member'])
+        elif op == 'delete_member':
+            if record['member_id'] in self.members:
+                self._remove_member(record['member_id'])
+        elif op == 'issue_book':
+            # Journals written before schema version 2 carry date strings instead of issue_ts/due_ts
+            self._insert_loan(record['member_id'], self.layout.loan(record))
+        elif op == 'return_book':
+            if record['book_id'] in self.loans_by_book:
+                self._remove_loan(record['book_id'])
+        if self.partitions is not None:
+            self._touch_partitions(record)
+    
+    @contextmanager
+    def transaction(self):
+        """Group mutations: save_data is deferred to a single save at the end, and
+        if the block raises, every change made inside it is rolled back.
+        
+        Nested transactions join the outermost one.
+        """
+        with self.lock:
+            if self._transaction is not None:
+                yield self
+                return
+            self._transaction = {'records': [], 'undo': [], 'owner': threading.get_ident()}
+            try:
+                yield self
+            except BaseException:
+                undo_log = self._transaction['undo']
+                self._transaction = None
+                with self._writing():
+                    for undo, args in reversed(undo_log):
+                        undo(*args)
+                raise
+            records = self._transaction['records']
+            self._transaction = None
+            for record in records:
+                self._commit_record(record)
+        if records:
+            self.save_data()
+    
+    def _insert_book(self, book_id, book):
+        self.books[book_id] = self.layout.book(book)
+        if self.search_index is not None:
+            self.search_index.add(book_id, book)
+            self.fuzzy_index.add(book_id, book)
+        if self._book_completions is not None:
+            self._book_completions.add(book_id, book_id, book['title'])
+    
+    def _remove_book(self, book_id):
+        book = self.books.pop(book_id)
+        if self.search_index is not None:
+            self.search_index.remove(book_id, book)
+            self.fuzzy_index.remove(book_id, book)
+        if self._book_completions is not None:
+            self._book_completions.remove(book_id)
+        return book
+    
+    def _insert_member(self, member_id, member):
+        self.members[member_id] = self.layout.member(member)
+        if self._member_completions is not None:
+            self._member_completions.add(member_id, member_id, member['name'])
+    
+    def _remove_member(self, member_id):
+        self.issued_books.pop(member_id, None)
+        if self._member_completions is not None:
+            self._member_completions.remove(member_id)
+        return self.members.pop(member_id)
+    
+    def _insert_loan(self, member_id, issued):
+        self.issued_books.setdefault(member_id, []).append(issued)
+        self.due_index.add(issued)
+        self.loans_by_book[issued.book_id] = (member_id, issued)
+        book = self.books[issued.book_id]
+        book['status'] = 'Issued'
+        book['issued_to'] = member_id
+    
+    def _remove_loan(self, book_id):
+        member_id, issued = self.loans_by_book.pop(book_id)
+        self.issued_books[member_id].remove(issued)
+        self.due_index.remove(book_id)
+        book = self.books[book_id]
+        book['status'] = 'Available'
+        book['issued_to'] = None
+        return member_id, issued
+    
+    def get_overdue_books(self, as_of=None):
+        return self._read(self.due_index.overdue, as_of or datetime.now())
+    
+    def calculate_total_late_fees(self, as_of=None):
+        return self._read(self.due_index.total_late_fees, as_of or datetime.now())
+    
+    def late_fee_report(self, as_of=None):
+        # Imported here: fee_engine loads NumPy when it is installed
+        import fee_engine
+        return self._read(fee_engine.late_fee_report, self, as_of)
+    
+    def loan_for_book(self, book_id):
+        """Return (member_id, loan) for an issued book, or None."""
+        return self.loans_by_book.get(book_id)
+    
+    def _text_indexes(self):
+        # After a binary load the search indexes are built by the first search (under _index_lock,
+        # like the completion indexes) and kept up to date from then on
+        if self.search_index is None:
+            with self._index_lock:
+                if self.search_index is None:
+                    fuzzy_index = TrigramIndex()
+                    fuzzy_index.build(self.books)
+                    search_index = InvertedIndex()
+                    search_index.build(self.books)
+                    self.fuzzy_index = fuzzy_index
+                    self.search_index = search_index
+        return self.search_index, self.fuzzy_index
+    
+    def search_books(self, query):
+        if self.search_index is None:
+            self._text_indexes()
+        return self._read(self.search_index.search, query)
+    
+    def book_ids(self):
+        """A snapshot list of the catalogue's ids, taken without blocking writers."""
+        return self._read(list, self.books)
+    
+    def member_ids(self):
+        return self._read(list, self.members)
+    
+    def _completion_index(self, name, table, field):
+        index = getattr(self, name)
+        if index is None:
+            # Built under _index_lock so no change slips in between the build and the first update
+            with self._index_lock:
+                if getattr(self, name) is None:
+                    index = PrefixIndex()
+                    index.build((key, (key, record[field])) for key, record in table.items())
+                    setattr(self, name, index)
+                index = getattr(self, name)
+        return index
+    
+    def complete_books(self, text, limit=20, status=None):
+        """Up to limit (book_id, title) pairs whose id or title words start with the typed words."""
+        def complete():
+            index = self._completion_index('_book_completions', self.books, 'title')
+            accept = None if status is None else (lambda book_id: self.books[book_id]['status'] == status)
+            # Issued books are few next to the catalogue, so start from the loans rather than every title
+            candidates = self.loans_by_book if status == 'Issued' else None
+            return [(book_id, self.books[book_id]['title'])
+                    for book_id in index.complete(text, limit, accept, candidates)]
+        return self._read(complete)
+    
+    def complete_members(self, text, limit=20, borrowers_only=False):
+        """Up to limit (member_id, name) pairs; borrowers_only keeps members with books issued."""
+        def complete():
+            index = self._completion_index('_member_completions', self.members, 'name')
+            accept = (lambda member_id: bool(self.issued_books.get(member_id))) if borrowers_only else None
+            candidates = self.issued_books if borrowers_only else None
+            return [(member_id, self.members[member_id]['name'])
+                    for member_id in index.complete(text, limit, accept, candidates)]
+        return self._read(complete)
+    
+    def fuzzy_search(self, query, limit=10):
+        if self.fuzzy_index is None:
+            self._text_indexes()
+        return self._read(self.fuzzy_index.search, query, limit)
+    
+    def search_books_recursive(self, query):
+        """Book ids whose title, author or category contains query, ignoring case, in catalogue order.
+
+        Kept with its substring match for existing callers; it reads every book,
+        so new code should use search_books.
+        """
+        query = query.lower()
+        def scan():
+            return [book_id for book_id, book in self.books.items()
+                    if query in book['title'].lower() or query in book['author'].lower()
+                    or query in book['category'].lower()]
+        return self._read(scan)
+    
+    @_striped('book_id', 'member_id')
+    def issue_book(self, book_id, member_id):
+        if member_id not in self.members:
+            raise ValueError("Member not found")
+        
+        if len(self.issued_books.get(member_id, ())) >= 3:
+            raise ValueError("Maximum book limit reached (3 books)")
+        
+        if book_id not in self.books:
+            raise ValueError("Book not found")
+        
+        if self.books[book_id]['status'] != 'Available':
+            raise ValueError("Book not available")
+        
+        issue_ts = schema.to_epoch(datetime.now())
+        issued = Loan(book_id, issue_ts, issue_ts + 14 * schema.SECONDS_PER_DAY)
+        with self._writing():
+            self._insert_loan(member_id, issued)
+            self._on_rollback(self._remove_loan, book_id)
+            self._record('issue_book', book_id=book_id, member_id=member_id,
+                         issue_ts=issued.issue_ts, due_ts=issued.due_ts)
+        
+        return f"Book '{self.books[book_id]['title']}' issued to {self.members[member_id]['name']}"
+    
+    @_striped('book_id', 'member_id')
+    def return_book(self, book_id, member_id):
+        if member_id not in self.issued_books:
+            raise ValueError("No books issued to this member")
+        
+        loan = self.loans_by_book.get(book_id)
+        if loan is None or loan[0] != member_id:
+            raise ValueError("Book not issued to this member")
+        
+        issued = loan[1]
+        days_overdue = (schema.to_epoch(datetime.now()) - issued.issue_ts) // schema.SECONDS_PER_DAY - 14
+        late_fee = max(0, days_overdue) * 1.0
+        
+        with self._writing():
+            self._remove_loan(book_id)
+            self._on_rollback(self._insert_loan, member_id, issued)
+            self._record('return_book', book_id=book_id, member_id=member_id)
+        
+        return f"Book returned. Late fee: ${late_fee:.2f}" if late_fee > 0 else "Book returned on time"
+    
+    def _new_id(self, table):
+        # len + 1 can collide with an existing id once records have been deleted
+        number = len(table) + 1
+        while str(number).zfill(4) in table:
+            number += 1
+        return str(number).zfill(4)
+    
+    @_striped()
+    def add_book(self, title, author, category, isbn):
+        book = {
+            'title': title,
+            'author': author,
+            'category': category,
+            'isbn': isbn,
+            'status': 'Available',
+            'issued_to': None
+        }
+        with self._writing():
+            # The id is only free until the next insert, so it is taken under the same lock
+            book_id = self._new_id(self.books)
+            self._insert_book(book_id, book)
+            self._on_rollback(self._remove_book, book_id)
+            self._record('add_book', book_id=book_id, book=book)
+        return book_id
+    
+    @_striped('book_id')
+    def delete_book(self, book_id):
+        if book_id not in self.books:
+            raise ValueError("Book not found")
+        
+        book = self.books[book_id]
+        
+        if book['status'] == 'Issued' or book_id in self.loans_by_book:
+            raise ValueError("Cannot delete book that is currently issued")
+        
+        with self._writing():
+            deleted_book = self._remove_book(book_id)
+            self._on_rollback(self._insert_book, book_id, deleted_book)
+            self._record('delete_book', book_id=book_id)
+        return f"Book '{deleted_book['title']}' has been deleted from the library"
+    
+    @_striped()
+    def add_member(self, name, email, phone):
+        member = {
+            'name': name,
+            'email': email,
+            'phone': phone,
+            'join_date': datetime.now().strftime('%Y-%m-%d')
+        }
+        with self._writing():
+            member_id = self._new_id(self.members)
+            self._insert_member(member_id, member)
+            self._on_rollback(self._remove_member, member_id)
+            self._record('add_member', member_id=member_id, member=member)
+        return member_id
+    
+    @_striped('member_id')
+    def delete_member(self, member_id):
+        if member_id not in self.members:
+            raise ValueError("Member not found")
+        
+        if member_id in self.issued_books and len(self.issued_books[member_id]) > 0:
+            raise ValueError("Cannot delete member who has books currently issued")
+        
+        with self._writing():
+            deleted_member = self._remove_member(member_id)
+            self._on_rollback(self._insert_member, member_id, deleted_member)
+            self._record('delete_member', member_id=member_id)
+        
+        return f"Member '{deleted_member['name']}' has been deleted from the library"
+    
+    def bulk_add_books(self, rows):
+        """Add many books at once and return their ids.
+        
+        rows are (title, author, category, isbn) tuples or mappings with those keys.
+        Every row is validated before anything changes, the search indexes are
+        updated in one pass and the data is saved once.
+        """
+        books = []
+        for i, row in enumerate(rows, 1):
+            if not isinstance(row, dict):
+                row = dict(zip(('title', 'author', 'category', 'isbn'), row))
+            book = {field: str(row.get(field) or '').strip() for field in ('title', 'author', 'category', 'isbn')}
+            missing = [field for field, value in book.items() if not value]
+            if missing:
+                raise ValueError(f"Row {i}: missing {', '.join(missing)}")
+            if book['category'] not in self.categories:
+                raise ValueError(f"Row {i}: unknown category '{book['category']}'")
+            book['status'] = 'Available'
+            book['issued_to'] = None
+            books.append(book)
+        
+        book_ids, searchable, fuzzy = [], [], []
+        with self.transaction(), self._writing():
+            # One undo for the whole batch, registered before anything changes; the lists say how far each book got
+            self._on_rollback(self._remove_bulk_books, book_ids, searchable, fuzzy)
+            for book in books:
+                book_id = self._new_id(self.books)
+                self.books[book_id] = self.layout.book(book)
+                book_ids.append(book_id)
+                self._record('add_book', book_id=book_id, book=book)
+            if self.search_index is not None:
+                added = [(book_id, self.books[book_id]) for book_id in book_ids]
+                self.search_index.add_many(added)
+                searchable.extend(book_ids)
+                for book_id, book in added:
+                    self.fuzzy_index.add(book_id, book)
+                    fuzzy.append(book_id)
+            # Rebuilt on next use rather than insorted row by row
+            self._book_completions = None
+        return book_ids
+    
+    def _remove_bulk_books(self, book_ids, searchable, fuzzy):
+        # Undo for bulk_add_books: each book leaves the table and only the indexes it was added to
+        for book_id in fuzzy:
+            self.fuzzy_index.remove(book_id, self.books[book_id])
+        for book_id in searchable:
+            self.search_index.remove(book_id, self.books[book_id])
+        for book_id in book_ids:
+            del self.books[book_id]
+        self._book_completions = None
+    
+    def bulk_add_members(self, rows):
+        """Add many members at once and return their ids; rows are (name, email, phone)."""
+        members = []
+        join_date = datetime.now().strftime('%Y-%m-%d')
+        for i, row in enumerate(rows, 1):
+            if not isinstance(row, dict):
+                row = dict(zip(('name', 'email', 'phone'), row))
+            member = {field: str(row.get(field) or '').strip() for field in ('name', 'email', 'phone')}
+            missing = [field for field, value in member.items() if not value]
+            if missing:
+                raise ValueError(f"Row {i}: missing {', '.join(missing)}")
+            member['join_date'] = join_date
+            members.append(member)
+        
+        member_ids = []
+        with self.transaction(), self._writing():
+            for member in members:
+                member_id = self._new_id(self.members)
+                self._insert_member(member_id, member)
+                self._on_rollback(self._remove_member, member_id)
+                self._record('add_member', member_id=member_id, member=member)
+                member_ids.append(member_id)
+        return member_ids
+    
+    def bulk_issue(self, pairs):
+        """Issue many (book_id, member_id) pairs at once; all of them or none are issued."""
+        pairs = list(pairs)
+        issue_ts = schema.to_epoch(datetime.now())
+        # Checked inside the transaction so no other desk thread issues one of the books in between
+        with self.transaction():
+            batch_counts = {}
+            batch_books = set()
+            for i, (book_id, member_id) in enumerate(pairs, 1):
+                if member_id not in self.members:
+                    raise ValueError(f"Row {i}: Member not found")
+                batch_counts[member_id] = batch_counts.get(member_id, 0) + 1
+                if len(self.issued_books.get(member_id, ())) + batch_counts[member_id] > 3:
+                    raise ValueError(f"Row {i}: Maximum book limit reached (3 books)")
+                if book_id not in self.books:
+                    raise ValueError(f"Row {i}: Book not found")
+                if self.books[book_id]['status'] != 'Available' or book_id in batch_books:
+                    raise ValueError(f"Row {i}: Book not available")
+                batch_books.add(book_id)
+            
+            with self._writing():
+                for book_id, member_id in pairs:
+                    issued = Loan(book_id, issue_ts, issue_ts + 14 * schema.SECONDS_PER_DAY)
+                    self._insert_loan(member_id, issued)
+                    self._on_rollback(self._remove_loan, book_id)
+                    self._record('issue_book', book_id=book_id, member_id=member_id,
+                                 issue_ts=issued.issue_ts, due_ts=issued.due_ts)
+        return len(pairs)
+
+def manage_library(backend='json', **options):
+    if backend == 'sqlite':
+        from sqlite_backend import SQLiteLibraryManagementSystem
+        lms = SQLiteLibraryManagementSystem(**options)
+    else:
+        lms = LibraryManagementSystem(**options)
+    
+    def issue_book_nested(book_id, member_id):
+        return lms.issue_book(book_id, member_id)
+    
+    return lms, issue_book_nested
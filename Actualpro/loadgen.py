@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Load generator for the library HTTP server (server.py)
+
+Usage: python loadgen.py [--host 127.0.0.1] [--port 8080] [--connections 32] [--duration 10]
+                         [--pipeline 1] [--mix search=60,book=15,issue=10,return=10,overdue=5]
+                         [--spawn BOOKS] [--output loadgen.json]
+
+Every connection is kept alive and sends `pipeline` requests before reading
+their responses. Each request is picked from the mix by weight: searches
+use words from the catalogue, issues go to random books and members, and a
+connection returns the books it issued. Latency percentiles per operation
+come from the same histogram the Diagnostics panel uses. --spawn starts a
+server in its own process (so it does not share the client's GIL) on a
+generated library of that many books and stops it afterwards.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from instrumentation import OperationStats
+
+OPERATIONS = ('search', 'book', 'issue', 'return', 'overdue', 'fees')
+DEFAULT_MIX = {'search': 60, 'book': 15, 'issue': 10, 'return': 10, 'overdue': 5}
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection; send() may be called several times before receive()."""
+
+    def __init__(self, reader, writer, host):
+        self.reader = reader
+        self.writer = writer
+        self.host = host
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, host)
+
+    def send(self, method, path, body=None):
+        data = b'' if body is None else json.dumps(body).encode('utf-8')
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(data)}\r\n"
+        if data:
+            head += "Content-Type: application/json\r\n"
+        self.writer.write(head.encode('latin-1') + b'\r\n' + data)
+
+    async def receive(self):
+        """(status, payload) of the next response."""
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head[:-4].decode('latin-1').split('\r\n')
+        length = 0
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        body = await self.reader.readexactly(length) if length else b''
+        return int(status_line.split(' ', 2)[1]), json.loads(body) if body else None
+
+    async def request(self, method, path, body=None):
+        self.send(method, path, body)
+        await self.writer.drain()
+        return await self.receive()
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class Client:
+    """Picks requests from the mix for one connection and tracks the books it has issued."""
+
+    def __init__(self, mix, book_ids, member_ids, words, seed):
+        self.operations = list(mix)
+        self.weights = [mix[op] for op in self.operations]
+        self.book_ids = book_ids
+        self.member_ids = member_ids
+        self.words = words
+        self.rng = random.Random(seed)
+        self.issued = []
+
+    def next_request(self):
+        """(operation, method, path, body) for the next request."""
+        op = self.rng.choices(self.operations, self.weights)[0]
+        if op == 'return' and not self.issued:
+            op = 'issue'
+        if op == 'search':
+            return op, 'GET', f"/books?q={self.rng.choice(self.words)}&limit=20", None
+        if op == 'book':
+            return op, 'GET', f"/books/{self.rng.choice(self.book_ids)}", None
+        if op == 'issue':
+            return op, 'POST', '/loans', {'book_id': self.rng.choice(self.book_ids),
+                                          'member_id': self.rng.choice(self.member_ids)}
+        if op == 'return':
+            book_id, member_id = self.issued.pop(self.rng.randrange(len(self.issued)))
+            return op, 'POST', f"/loans/{book_id}/return", {'member_id': member_id}
+        if op == 'overdue':
+            return op, 'GET', '/overdue?limit=20', None
+        return op, 'GET', '/fees', None
+
+    def on_response(self, op, body, status):
+        if op == 'issue' and status == 201:
+            self.issued.append((body['book_id'], body['member_id']))
+
+
+async def _catalogue(host, port):
+    # Ids and title words to build requests from
+    connection = await Connection.open(host, port)
+    try:
+        status, books = await connection.request('GET', '/books?limit=1000')
+        status, members = await connection.request('GET', '/members?limit=1000')
+    finally:
+        await connection.close()
+    book_ids = [book['book_id'] for book in books['books']]
+    member_ids = [member['member_id'] for member in members['members']]
+    if not book_ids or not member_ids:
+        raise ValueError("The server's library needs at least one book and one member")
+    counts = Counter(word.lower() for book in books['books'] for word in set(re.findall(r'[A-Za-z]{3,}', book['title'])))
+    # Words in most titles ("the") would turn every search into a catalogue dump
+    words = sorted(word for word, count in counts.items() if count <= max(1, len(book_ids) // 10))
+    return book_ids, member_ids, words or sorted(counts) or ['book']
+
+
+async def run_load(host='127.0.0.1', port=8080, connections=32, duration=10.0, pipeline=1, mix=None, seed=0):
+    """Drive the server for `duration` seconds and return throughput and per-operation latencies."""
+    mix = mix or DEFAULT_MIX
+    book_ids, member_ids, words = await _catalogue(host, port)
+    stats = {}
+    statuses = {}
+    deadline = time.perf_counter() + duration
+
+    async def drive(number):
+        client = Client(mix, book_ids, member_ids, words, seed * 1000 + number)
+        connection = await Connection.open(host, port)
+        clock = time.perf_counter
+        try:
+            while clock() < deadline:
+                batch = [client.next_request() for _ in range(pipeline)]
+                start = clock()
+                for op, method, path, body in batch:
+                    connection.send(method, path, body)
+                await connection.writer.drain()
+                for op, method, path, body in batch:
+                    status, payload = await connection.receive()
+                    statuses[status] = statuses.get(status, 0) + 1
+                    stats.setdefault(op, OperationStats()).add(clock() - start, status >= 500, None)
+                    client.on_response(op, body, status)
+        finally:
+            await connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(drive(number) for number in range(connections)))
+    elapsed = time.perf_counter() - start
+    total = sum(statuses.values())
+    return {
+        'connections': connections,
+        'pipeline': pipeline,
+        'duration_s': round(elapsed, 2),
+        'requests': total,
+        'requests_per_s': round(total / elapsed, 1),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'operations': {op: stats[op].to_dict() for op in sorted(stats)}
+    }
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        op, _, weight = part.partition('=')
+        op = op.strip()
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{op}' (use {', '.join(OPERATIONS)})")
+        try:
+            mix[op] = float(weight)
+        except ValueError:
+            raise ValueError(f"Bad mix entry '{part}' (expected op=weight)")
+    return mix
+
+
+@contextmanager
+def spawned_server(books, members=None):
+    """Run server.py on a generated library in a temp directory; yields its port."""
+    from benchmark import write_library
+    directory = tempfile.mkdtemp(prefix='library-loadgen-')
+    data_file = write_library(os.path.join(directory, 'library_data.json'), books, members=members)
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py'),
+         '--data-file', data_file, '--port', '0'],
+        stdout=subprocess.PIPE, env=dict(os.environ, PYTHONIOENCODING='utf-8'))
+    try:
+        line = process.stdout.readline().decode('utf-8')
+        match = re.search(r':(\d+)\s*$', line)
+        if match is None:
+            raise RuntimeError(f"server.py did not start: {line.strip() or 'no output'}")
+        yield int(match.group(1))
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def print_results(results):
+    print(f"✅ {results['requests']:,} requests in {results['duration_s']}s over {results['connections']} "
+          f"connections (pipeline {results['pipeline']}): {results['requests_per_s']:,.0f} req/s")
+    print(f"   status codes: {', '.join(f'{status}={count:,}' for status, count in results['statuses'].items())}")
+    print(f"   {'operation':<10}{'count':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for op, stats in results['operations'].items():
+        print(f"   {op:<10}{stats['count']:>9,}{stats['errors']:>8}{stats['p50_ms']:>9.2f}"
+              f"{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['max_ms']:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the library HTTP server under load")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds")
+    parser.add_argument('--pipeline', type=int, default=1, help="requests sent per connection before reading")
+    parser.add_argument('--mix', default=','.join(f"{op}={weight}" for op, weight in DEFAULT_MIX.items()),
+                        help="operation weights from: " + ', '.join(OPERATIONS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', type=int, metavar='BOOKS', help="start a server on a generated library of BOOKS books")
+    parser.add_argument('--output', help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+        if args.spawn:
+            with spawned_server(args.spawn) as port:
+                print(f"📡 Spawned a server with {args.spawn:,} books on port {port}")
+                results = asyncio.run(run_load(args.host, port, args.connections, args.duration,
+                                               args.pipeline, mix, args.seed))
+        else:
+            results = asyncio.run(run_load(args.host, args.port, args.connections, args.duration,
+                                           args.pipeline, mix, args.seed))
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"❌ Load test failed: {e}")
+        return 1
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Indexes over active loans for the Library Management System
+"""
+
+from bisect import bisect_left, bisect_right
+
+from schema import SECONDS_PER_DAY, to_epoch
+
+
+class DueDateIndex:
+    """Active loans kept ordered by due date (epoch seconds).
+
+    A loan is overdue once it is a full day past its due date, so the loans
+    overdue as of T are a prefix of the ordering and need no full scan.
+    """
+
+    def __init__(self):
+        self.due_timestamps = []
+        self.book_ids = []
+        self.loans = {}
+
+    def build(self, issued_books):
+        entries = sorted((issued.due_ts, issued.book_id, issued)
+                         for issued_list in issued_books.values() for issued in issued_list)
+        self.due_timestamps = [entry[0] for entry in entries]
+        self.book_ids = [entry[1] for entry in entries]
+        self.loans = {entry[1]: entry[2] for entry in entries}
+
+    def add(self, issued):
+        i = bisect_right(self.due_timestamps, issued.due_ts)
+        self.due_timestamps.insert(i, issued.due_ts)
+        self.book_ids.insert(i, issued.book_id)
+        self.loans[issued.book_id] = issued
+
+    def remove(self, book_id):
+        issued = self.loans.pop(book_id, None)
+        if issued is None:
+            return
+        i = bisect_left(self.due_timestamps, issued.due_ts)
+        while self.book_ids[i] != book_id:
+            i += 1
+        del self.due_timestamps[i]
+        del self.book_ids[i]
+
+    def overdue_count(self, as_of):
+        return bisect_right(self.due_timestamps, to_epoch(as_of) - SECONDS_PER_DAY)
+
+    def overdue(self, as_of):
+        loans = self.loans
+        return [loans[book_id] for book_id in self.book_ids[:self.overdue_count(as_of)]]
+
+    def total_late_fees(self, as_of, fee_per_day=1.0):
+        now = to_epoch(as_of)
+        count = self.overdue_count(as_of)
+        return sum((now - due_ts) // SECONDS_PER_DAY for due_ts in self.due_timestamps[:count]) * fee_per_day
+
+    def __len__(self):
+        return len(self.book_ids)
@@ -0,0 +1,105 @@
+"""
+Locks for sharing one LibraryManagementSystem between threads
+
+LibraryLock is lms.lock. `with lms.lock:` takes it exclusively (re-entrant,
+as before) for transactions, snapshots and syncs; single-record operations
+take it shared with `lms.lock.shared()`, so any number of them run at once
+and wait only for an exclusive holder. Within shared mode LockStripes
+serializes operations on the same book or member: a key hashes to one of
+`count` locks, and several keys are always taken in stripe order so two
+operations cannot deadlock.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class LibraryLock:
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._owner = None
+        self._depth = 0
+        self._readers = {}
+        self._waiting_writers = 0
+
+    def acquire(self, blocking=True, timeout=-1):
+        me = threading.get_ident()
+        with self._condition:
+            if self._owner == me:
+                self._depth += 1
+                return True
+            if me in self._readers:
+                raise RuntimeError("Cannot take the library lock exclusively while holding it shared")
+            self._waiting_writers += 1
+            try:
+                free = lambda: self._owner is None and not self._readers
+                if not blocking:
+                    acquired = free()
+                else:
+                    acquired = self._condition.wait_for(free, None if timeout < 0 else timeout)
+            finally:
+                self._waiting_writers -= 1
+            if not acquired:
+                # Readers held back by this writer can go ahead again
+                self._condition.notify_all()
+                return False
+            self._owner = me
+            self._depth = 1
+            return True
+
+    def release(self):
+        with self._condition:
+            if self._owner != threading.get_ident():
+                raise RuntimeError("Cannot release a library lock held by another thread")
+            self._depth -= 1
+            if not self._depth:
+                self._owner = None
+                self._condition.notify_all()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def acquire_shared(self):
+        me = threading.get_ident()
+        with self._condition:
+            # Re-entry never waits, or a queued writer would deadlock with us
+            if self._owner != me and me not in self._readers:
+                self._condition.wait_for(lambda: self._owner is None and not self._waiting_writers)
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_shared(self):
+        me = threading.get_ident()
+        with self._condition:
+            depth = self._readers[me] - 1
+            if depth:
+                self._readers[me] = depth
+            else:
+                del self._readers[me]
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def shared(self):
+        self.acquire_shared()
+        try:
+            yield
+        finally:
+            self.release_shared()
+
+
+class LockStripes:
+    def __init__(self, count=64):
+        self._locks = [threading.RLock() for _ in range(count)]
+
+    @contextmanager
+    def hold(self, *keys):
+        stripes = sorted({hash(key) % len(self._locks) for key in keys})
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
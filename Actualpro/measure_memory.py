@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Measure resident memory of a synthetic catalogue in each record layout
+
+Usage: python measure_memory.py [number_of_books]
+
+Each layout is built in a fresh interpreter so the numbers do not interfere.
+"""
+
+import json
+import resource
+import subprocess
+import sys
+
+from library_core import CATEGORIES
+from records import LAYOUTS, RecordLayout
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def build_catalogue(layout_name, count):
+    layout = RecordLayout(layout_name)
+    books = layout.books_table({})
+    for i in range(count):
+        books[str(i + 1).zfill(7)] = layout.book({
+            'title': f"Title {i}",
+            'author': f"Author {i % 50000}",
+            'category': CATEGORIES[i % len(CATEGORIES)],
+            'isbn': f"978{i:010d}",
+            'status': 'Issued' if i % 10 == 0 else 'Available',
+            'issued_to': None
+        })
+    return books
+
+
+def measure(layout_name, count):
+    baseline = peak_rss_mb()
+    books = build_catalogue(layout_name, count)
+    return {'layout': layout_name, 'books': len(books), 'rss_mb': round(peak_rss_mb() - baseline, 1)}
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        print(json.dumps(measure(sys.argv[2], int(sys.argv[3]))))
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"📏 Resident memory for {count:,} books")
+    results = []
+    for layout_name in LAYOUTS:
+        output = subprocess.run([sys.executable, __file__, '--child', layout_name, str(count)],
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output))
+    baseline = results[0]['rss_mb']
+    for result in results:
+        change = 100 * (result['rss_mb'] / baseline - 1) if baseline else 0
+        print(f"   {result['layout']:<9} {result['rss_mb']:>8.1f} MB  ({change:+.0f}% vs dict)")
+
+
+if __name__ == "__main__":
+    main()
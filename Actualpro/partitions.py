@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Partitioned data files: the library split into separately loaded and saved files
+
+Usage: python partitions.py library_data.json [--shard category|range] [--range-size 1000]
+
+library_data.parts/ holds
+
+    manifest.json               schema_version and journal seq, plus every partition's
+                                current file, record count and the categories it holds
+    books-fiction.<n>.json      books, one partition per category (shard='category')
+                                or per block of range_size ids (shard='range': books-0000, books-1000, ...)
+    members.<n>.json            members
+    loans.<n>.json              active loans (issued_books)
+
+Changes are tracked per partition (touch/touch_book), and write() saves only
+the dirty partitions: issuing a book rewrites its category's books file and
+loans.json, not the whole catalogue. Partition files are written under a new
+name and the manifest is replaced last, so a crash part-way through a save
+leaves the previous set of files in use. load() reads only the tables (and
+book categories) a caller asks for, e.g. SimpleLibrary skips the loans.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import schema
+from records import to_json
+
+SHARDS = ('category', 'range')
+RANGE_SIZE = 1000
+MANIFEST = 'manifest.json'
+TABLES = ('books', 'members', 'issued_books')
+
+
+def partition_dir(data_file):
+    """library_data.json -> library_data.parts"""
+    return os.path.splitext(data_file)[0] + '.parts'
+
+
+class PartitionedStore:
+    def __init__(self, directory, shard='category', range_size=RANGE_SIZE):
+        if shard not in SHARDS:
+            raise ValueError(f"Unknown shard scheme: {shard} (use {' or '.join(SHARDS)})")
+        if range_size < 1:
+            raise ValueError("range_size must be at least 1")
+        self.directory = directory
+        self.manifest_file = os.path.join(directory, MANIFEST)
+        self.shard = shard
+        self.range_size = range_size
+        self.manifest = {'generation': 0, 'meta': {}, 'partitions': {}}
+        # book_id -> partition, and partition -> book ids, for the books loaded so far
+        self.locations = {}
+        self.book_ids = {}
+        self.loaded = set()
+        self.dirty = set()
+        self._everything = False
+
+    def exists(self):
+        return os.path.exists(self.manifest_file)
+
+    def partition_of(self, book_id, book):
+        if self.shard == 'category':
+            return 'books-' + (re.sub(r'[^a-z0-9]+', '-', str(book['category']).lower()).strip('-') or 'none')
+        if not book_id.isdigit():
+            return 'books-other'
+        return 'books-' + str(int(book_id) // self.range_size * self.range_size).zfill(4)
+
+    def touch(self, *names):
+        """Mark partitions as changed; a partition that exists but was not loaded cannot be saved."""
+        for name in names:
+            if not self._everything and name not in self.loaded and name in self.manifest['partitions']:
+                raise ValueError(f"Partition {name} was not loaded, so it cannot be saved")
+            self.dirty.add(name)
+
+    def touch_book(self, book_id, book):
+        """Mark the partition a book is in (book=None: it was deleted); moves it if its category changed."""
+        old = self.locations.pop(book_id, None)
+        if old is not None:
+            self.book_ids[old].discard(book_id)
+            self.touch(old)
+        if book is not None:
+            name = self.locations[book_id] = self.partition_of(book_id, book)
+            self.book_ids.setdefault(name, set()).add(book_id)
+            self.touch(name)
+
+    def touch_all(self):
+        """Rewrite every partition on the next save (after loading from library_data.json)."""
+        if self.exists():
+            # Carry on from the files on disk so they are replaced (and removed) rather than clashed with
+            with open(self.manifest_file, 'r') as f:
+                self.manifest = json.load(f)
+        self._everything = True
+        self.loaded.update(('members', 'loans'))
+
+    def _file(self, name):
+        return os.path.join(self.directory, self.manifest['partitions'][name]['file'])
+
+    def _read(self, name):
+        with open(self._file(name), 'r') as f:
+            return json.load(f)
+
+    def load(self, books=True, members=True, loans=True, categories=None):
+        """Read the manifest and the requested tables; returns them in the library_data.json layout.
+
+        With categories, only the book partitions holding those categories are read
+        (and only their books returned); partitions read in part cannot be saved.
+        """
+        with open(self.manifest_file, 'r') as f:
+            self.manifest = json.load(f)
+        data = dict(self.manifest['meta'])
+        if data.get('schema_version') != schema.SCHEMA_VERSION:
+            raise ValueError(f"{self.manifest_file} has schema version {data.get('schema_version')}, "
+                             f"expected {schema.SCHEMA_VERSION}; convert it from the JSON file again")
+        partitions = self.manifest['partitions']
+        self.locations, self.book_ids, self.loaded, self.dirty = {}, {}, set(), set()
+        self._everything = False
+        if (self.manifest.get('shard'), self.manifest.get('range_size')) != (self.shard, self.range_size):
+            if books and categories is None:
+                # Files sharded another way are re-sharded on the next save
+                self._everything = True
+            else:
+                # ... which needs every book, so a partial load keeps the files' scheme
+                self.shard, self.range_size = self.manifest['shard'], self.manifest['range_size']
+        if books:
+            data['books'] = {}
+            wanted = None if categories is None else set(categories)
+            for name, entry in partitions.items():
+                if entry['table'] != 'books' or (wanted is not None and wanted.isdisjoint(entry['categories'])):
+                    continue
+                records = self._read(name)
+                if wanted is not None and not wanted.issuperset(entry['categories']):
+                    records = {book_id: book for book_id, book in records.items() if book['category'] in wanted}
+                else:
+                    self.loaded.add(name)
+                data['books'].update(records)
+                self.book_ids[name] = set(records)
+                self.locations.update(dict.fromkeys(records, name))
+        if members:
+            data['members'] = self._read('members') if 'members' in partitions else {}
+            self.loaded.add('members')
+        if loans:
+            data['issued_books'] = self._read('loans') if 'loans' in partitions else {}
+            self.loaded.add('loans')
+        return data
+
+    def collect(self, books, members, issued_books=None):
+        """{partition: records} for every dirty partition, copied so they can be written
+        outside the caller's lock; clears the dirty set."""
+        if self._everything:
+            self.locations = {book_id: self.partition_of(book_id, book) for book_id, book in books.items()}
+            self.book_ids = {}
+            for book_id, name in self.locations.items():
+                self.book_ids.setdefault(name, set()).add(book_id)
+            # Partitions that no longer hold anything are written empty, which drops them
+            dirty = set(self.book_ids) | {name for name in self.manifest['partitions'] if name.startswith('books-')}
+            dirty |= self.loaded & {'members', 'loans'}
+            self.loaded.update(dirty)
+            self._everything = False
+        else:
+            dirty = self.dirty
+        self.dirty = set()
+        collected = {}
+        for name in dirty:
+            if name == 'members':
+                collected[name] = dict(members.items())
+            elif name == 'loans':
+                if issued_books is None:
+                    raise ValueError("The loans partition changed but no loans were given")
+                collected[name] = dict(issued_books)
+            else:
+                collected[name] = {book_id: dict(books[book_id]) for book_id in sorted(self.book_ids.get(name, ()))}
+        return collected
+
+    def write(self, collected, meta=None):
+        """Save the partitions collect() returned, then the manifest; returns the partitions written.
+
+        meta (schema_version, journal_seq, ...) replaces the manifest's; None keeps it.
+        """
+        if not collected and meta in (None, self.manifest['meta']) and self.exists():
+            return []
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            manifest = {key: value for key, value in self.manifest.items() if key != 'partitions'}
+            manifest['partitions'] = partitions = dict(self.manifest['partitions'])
+            manifest['generation'] = generation = self.manifest['generation'] + 1
+            manifest['shard'], manifest['range_size'] = self.shard, self.range_size
+            if meta is not None:
+                manifest['meta'] = meta
+            for name, records in collected.items():
+                if not records and name.startswith('books-'):
+                    partitions.pop(name, None)
+                    continue
+                file = f"{name}.{generation}.json"
+                with open(os.path.join(self.directory, file), 'w') as f:
+                    json.dump(records, f, indent=2, default=to_json)
+                entry = {'table': 'books', 'categories': sorted({book['category'] for book in records.values()})} \
+                    if name.startswith('books-') else {'table': name}
+                partitions[name] = dict(entry, file=file, count=len(records))
+            tmp_file = self.manifest_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_file, self.manifest_file)
+        except BaseException:
+            # Still unsaved: the next write tries them again
+            self.dirty.update(collected)
+            raise
+        previous, self.manifest = self.manifest, manifest
+        self.loaded.update(collected)
+        for name, entry in previous['partitions'].items():
+            if partitions.get(name, {}).get('file') != entry['file']:
+                try:
+                    os.remove(os.path.join(self.directory, entry['file']))
+                except OSError:
+                    pass
+        return sorted(collected)
+
+
+def convert(data_file, shard='category', range_size=RANGE_SIZE):
+    """Split library_data.json into library_data.parts/; returns the store."""
+    with open(data_file, 'r') as f:
+        data = schema.migrate(json.load(f))
+    store = PartitionedStore(partition_dir(data_file), shard, range_size)
+    store.touch_all()
+    store.write(store.collect(data.get('books', {}), data.get('members', {}), data.get('issued_books', {})),
+                {key: value for key, value in data.items() if key not in TABLES})
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split library_data.json into partition files")
+    parser.add_argument('data_file')
+    parser.add_argument('--shard', choices=SHARDS, default='category')
+    parser.add_argument('--range-size', type=int, default=RANGE_SIZE)
+    args = parser.parse_args(argv)
+    try:
+        store = convert(args.data_file, args.shard, args.range_size)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot convert {args.data_file}: {e}")
+        return 1
+    for name, entry in sorted(store.manifest['partitions'].items()):
+        print(f"   {entry['file']:<32}{entry['count']:>9,}")
+    print(f"✅ Wrote {len(store.manifest['partitions'])} partitions to {store.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
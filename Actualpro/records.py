@@ -0,0 +1,330 @@
+"""
+Compact record types for books, members and loans
+
+Book, Member and Loan use __slots__ instead of a per-record dict, and
+ColumnarBooks stores the whole catalogue as columns with category and status
+interned as small integers. All of them keep a dict-compatible interface
+(record['title'], record.get(...), dict(record)), so LibraryManagementSystem
+and LibraryUI work unchanged whichever layout is chosen.
+"""
+
+from array import array
+from collections.abc import MutableMapping
+
+from schema import from_epoch, to_epoch
+
+LAYOUTS = ('dict', 'slots', 'columnar')
+
+
+class Record:
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init__(self, *args, **fields):
+        for name, value in zip(self.FIELDS, args):
+            setattr(self, name, value)
+        for name in self.FIELDS[len(args):]:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        return cls(**mapping)
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __eq__(self, other):
+        try:
+            return dict(self) == dict(other)
+        except (TypeError, ValueError):
+            return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def values(self):
+        return [getattr(self, name) for name in self.FIELDS]
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.FIELDS]
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    # Callers copy a record to build its serializable form, so a copy is a plain dict
+    copy = to_dict
+
+
+class Book(Record):
+    __slots__ = ('title', 'author', 'category', 'isbn', 'status', 'issued_to')
+    FIELDS = __slots__
+
+    def __init__(self, title, author, category, isbn, status='Available', issued_to=None):
+        self.title = title
+        self.author = author
+        self.category = category
+        self.isbn = isbn
+        self.status = status
+        self.issued_to = issued_to
+
+
+class Member(Record):
+    __slots__ = ('name', 'email', 'phone', 'join_date')
+    FIELDS = __slots__
+
+
+class Loan(Record):
+    """An active loan; dates are kept as epoch seconds and built into datetimes on access."""
+
+    __slots__ = ('book_id', 'issue_ts', 'due_ts')
+    FIELDS = ('book_id', 'issue_date', 'due_date')
+
+    def __init__(self, book_id, issue_ts, due_ts):
+        self.book_id = book_id
+        self.issue_ts = issue_ts
+        self.due_ts = due_ts
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        if 'issue_ts' in mapping:
+            return cls(mapping['book_id'], mapping['issue_ts'], mapping['due_ts'])
+        return cls(mapping['book_id'], to_epoch(mapping['issue_date']), to_epoch(mapping['due_date']))
+
+    def __getitem__(self, key):
+        if key == 'issue_date':
+            return from_epoch(self.issue_ts)
+        if key == 'due_date':
+            return from_epoch(self.due_ts)
+        if key == 'book_id':
+            return self.book_id
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'issue_date':
+            self.issue_ts = to_epoch(value)
+        elif key == 'due_date':
+            self.due_ts = to_epoch(value)
+        elif key == 'book_id':
+            self.book_id = value
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.FIELDS else default
+
+    def values(self):
+        return [self[name] for name in self.FIELDS]
+
+    def items(self):
+        return [(name, self[name]) for name in self.FIELDS]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    copy = to_dict
+
+    def to_storage(self):
+        return {'book_id': self.book_id, 'issue_ts': self.issue_ts, 'due_ts': self.due_ts}
+
+
+class _Interned:
+    """Small-int codes for a low-cardinality string column."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class BookView(Record):
+    """A row of ColumnarBooks; reads and writes go straight to the columns."""
+
+    __slots__ = ('_store', '_row')
+    FIELDS = Book.FIELDS
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._store._get(self._row, key)
+
+    def __setitem__(self, key, value):
+        self._store._set(self._row, key, value)
+
+    def get(self, key, default=None):
+        return self._store._get(self._row, key) if key in self.FIELDS else default
+
+    def values(self):
+        return [self._store._get(self._row, name) for name in self.FIELDS]
+
+    def items(self):
+        return [(name, self._store._get(self._row, name)) for name in self.FIELDS]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    copy = to_dict
+
+
+class ColumnarBooks(MutableMapping):
+    """book_id -> book mapping stored as parallel columns.
+
+    Category and status are interned into array('H') columns; deleted rows
+    are recycled through a free list.
+    """
+
+    def __init__(self, rows=None):
+        self._rows = {}
+        self._free = []
+        self.title = []
+        self.author = []
+        self.isbn = []
+        self.issued_to = []
+        self._categories = _Interned()
+        self._statuses = _Interned()
+        self.category = array('H')
+        self.status = array('H')
+        if rows:
+            for book_id, book in rows.items():
+                self[book_id] = book
+
+    def _get(self, row, key):
+        if key == 'category':
+            return self._categories.values[self.category[row]]
+        if key == 'status':
+            return self._statuses.values[self.status[row]]
+        if key in Book.FIELDS:
+            return getattr(self, key)[row]
+        raise KeyError(key)
+
+    def _set(self, row, key, value):
+        if key == 'category':
+            self.category[row] = self._categories.code(value)
+        elif key == 'status':
+            self.status[row] = self._statuses.code(value)
+        elif key in Book.FIELDS:
+            getattr(self, key)[row] = value
+        else:
+            raise KeyError(key)
+
+    def __getitem__(self, book_id):
+        return BookView(self, self._rows[book_id])
+
+    def __setitem__(self, book_id, book):
+        row = self._rows.get(book_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                row = len(self.title)
+                for column in (self.title, self.author, self.isbn, self.issued_to):
+                    column.append(None)
+                self.category.append(0)
+                self.status.append(0)
+            self._rows[book_id] = row
+        for key in Book.FIELDS:
+            self._set(row, key, book.get(key, 'Available' if key == 'status' else None))
+
+    def __delitem__(self, book_id):
+        row = self._rows.pop(book_id)
+        for column in (self.title, self.author, self.isbn, self.issued_to):
+            column[row] = None
+        self._free.append(row)
+
+    def pop(self, book_id, *default):
+        # The row is recycled on delete, so hand back a detached copy
+        if book_id not in self._rows:
+            if default:
+                return default[0]
+            raise KeyError(book_id)
+        book = self[book_id].to_dict()
+        del self[book_id]
+        return book
+
+    def __contains__(self, book_id):
+        return book_id in self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def items(self):
+        for book_id, row in self._rows.items():
+            yield book_id, BookView(self, row)
+
+    def values(self):
+        for row in self._rows.values():
+            yield BookView(self, row)
+
+
+class RecordLayout:
+    """Creates records and tables for one of LAYOUTS ('dict' is the original representation)."""
+
+    def __init__(self, name='dict'):
+        if name not in LAYOUTS:
+            raise ValueError(f"Unknown record layout: {name}")
+        self.name = name
+
+    def book(self, book):
+        return Book.from_mapping(book) if self.name == 'slots' else book
+
+    def member(self, member):
+        return member if self.name == 'dict' else Member.from_mapping(member)
+
+    def loan(self, loan):
+        # Loans are Loan records in every layout so their dates can stay epoch seconds
+        return Loan.from_mapping(loan)
+
+    def books_table(self, rows):
+        if self.name == 'columnar':
+            return ColumnarBooks(rows)
+        if self.name == 'slots':
+            return {book_id: Book.from_mapping(book) for book_id, book in rows.items()}
+        return rows
+
+    def members_table(self, rows):
+        if self.name == 'dict':
+            return rows
+        return {member_id: Member.from_mapping(member) for member_id, member in rows.items()}
+
+
+def to_json(value):
+    """json.dump default= hook for records and record tables."""
+    if isinstance(value, Loan):
+        return value.to_storage()
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, MutableMapping):
+        return {key: item.to_dict() for key, item in value.items()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
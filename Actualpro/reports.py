@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Streaming reports for the Library Management System
+
+Usage: python reports.py {books,members,loans,overdue} report.csv
+                         [--format csv|jsonl|html] [--data-file library_data.json]
+
+Each report is a generator of row tuples over the live library, and each
+writer consumes it `chunk_rows` rows at a time, so memory use stays flat
+however large the catalogue is. Only the keys are copied up front (under
+lms.lock) so the Tk thread can keep issuing and returning books while an
+export runs; rows removed in the meantime are skipped. The output is
+written to a temp file and renamed, like the data file.
+"""
+
+import argparse
+import csv
+import html
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+from records import Loan
+from schema import SECONDS_PER_DAY, from_epoch, to_epoch
+
+FORMATS = ('csv', 'jsonl', 'html')
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.html': 'html', '.htm': 'html'}
+
+BOOK_COLUMNS = ('book_id', 'title', 'author', 'category', 'isbn', 'status', 'issued_to')
+MEMBER_COLUMNS = ('member_id', 'name', 'email', 'phone', 'join_date', 'books_issued')
+LOAN_COLUMNS = ('book_id', 'title', 'member_id', 'member_name', 'issue_date', 'due_date',
+                'days_overdue', 'late_fee')
+
+
+def _records(lms, table):
+    """(key, record) pairs of lms.books or lms.members without holding the lock for the whole export."""
+    lock = getattr(lms, 'lock', None)
+    if lock is None:
+        # SQLite tables stream from a cursor
+        yield from table.items()
+        return
+    with lock:
+        keys = list(table)
+    for key in keys:
+        record = table.get(key)
+        if record is not None:
+            yield key, record
+
+
+def _loans(lms):
+    """(member_id, loan) pairs for every active loan, oldest due date first."""
+    due_index = getattr(lms, 'due_index', None)
+    if due_index is None:
+        # SQLite streams them from a cursor over its due_date index
+        yield from lms.loans_by_due_date()
+        return
+    with lms.lock:
+        book_ids = list(due_index.book_ids)
+    loans_by_book = lms.loans_by_book
+    for book_id in book_ids:
+        entry = loans_by_book.get(book_id)
+        if entry is not None:
+            yield entry
+
+
+def _due_ts(loan):
+    return loan.due_ts if isinstance(loan, Loan) else to_epoch(loan['due_date'])
+
+
+def _issue_ts(loan):
+    return loan.issue_ts if isinstance(loan, Loan) else to_epoch(loan['issue_date'])
+
+
+@lru_cache(maxsize=4096)
+def _format_day(day):
+    return from_epoch(day * SECONDS_PER_DAY).strftime('%Y-%m-%d')
+
+
+def _format_ts(timestamp):
+    # DATE_FORMAT, with strftime only run once per calendar day
+    day, seconds = divmod(timestamp, SECONDS_PER_DAY)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{_format_day(day)} {hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def book_rows(lms, as_of=None):
+    for book_id, book in _records(lms, lms.books):
+        yield (book_id, book['title'], book['author'], book['category'], book['isbn'],
+               book['status'], book['issued_to'])
+
+
+def member_rows(lms, as_of=None):
+    issued_books = lms.issued_books
+    for member_id, member in _records(lms, lms.members):
+        loans = issued_books.get(member_id)
+        yield (member_id, member['name'], member['email'], member['phone'], member['join_date'],
+               len(loans) if loans else 0)
+
+
+def loan_rows(lms, as_of=None, overdue_only=False):
+    """Active loans with days overdue and the late fee as of `as_of` (now by default)."""
+    # Imported here, as in library_core: fee_engine loads NumPy when it is installed
+    from fee_engine import FEE_PER_DAY
+    now = to_epoch(as_of or datetime.now())
+    books, members = lms.books, lms.members
+    for member_id, loan in _loans(lms):
+        due_ts = _due_ts(loan)
+        days_overdue = max(0, (now - due_ts) // SECONDS_PER_DAY)
+        if overdue_only and not days_overdue:
+            # Loans come in due-date order, so the rest are not overdue either
+            return
+        book = books.get(loan['book_id'])
+        member = members.get(member_id)
+        yield (loan['book_id'], book['title'] if book else None, member_id, member['name'] if member else None,
+               _format_ts(_issue_ts(loan)), _format_ts(due_ts),
+               days_overdue, days_overdue * FEE_PER_DAY)
+
+
+def overdue_rows(lms, as_of=None):
+    return loan_rows(lms, as_of, overdue_only=True)
+
+
+REPORTS = {
+    'books': ("Catalogue", BOOK_COLUMNS, book_rows),
+    'members': ("Members", MEMBER_COLUMNS, member_rows),
+    'loans': ("Active Loans", LOAN_COLUMNS, loan_rows),
+    'overdue': ("Overdue Loans and Late Fees", LOAN_COLUMNS, overdue_rows)
+}
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_csv(file, title, columns, rows, chunk_rows):
+    writer = csv.writer(file)
+    writer.writerow(columns)
+    for chunk in chunks(rows, chunk_rows):
+        writer.writerows(chunk)
+        yield len(chunk)
+
+
+def write_jsonl(file, title, columns, rows, chunk_rows):
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    for chunk in chunks(rows, chunk_rows):
+        file.write(''.join([encode(dict(zip(columns, row))) + '\n' for row in chunk]))
+        yield len(chunk)
+
+
+def _cell(value):
+    return '' if value is None else html.escape(str(value), quote=False)
+
+
+def write_html(file, title, columns, rows, chunk_rows):
+    title = html.escape(title)
+    file.write(f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{title}</title>\n"
+               "<style>table{border-collapse:collapse;font-family:Arial,sans-serif;font-size:13px}"
+               "th,td{border:1px solid #bdc3c7;padding:2px 6px}th{background:#2c3e50;color:white}</style>\n"
+               f"</head>\n<body>\n<h1>{title}</h1>\n<table>\n<tr>"
+               + ''.join(f"<th>{html.escape(column)}</th>" for column in columns) + "</tr>\n")
+    for chunk in chunks(rows, chunk_rows):
+        file.write(''.join(['<tr><td>' + '</td><td>'.join(map(_cell, row)) + '</td></tr>\n' for row in chunk]))
+        yield len(chunk)
+    file.write("</table>\n</body>\n</html>\n")
+
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl, 'html': write_html}
+
+
+def export_report(lms, report, path, fmt=None, as_of=None, chunk_rows=10000, progress=None):
+    """Write one of REPORTS to path and return the number of rows written.
+
+    The format comes from the file extension unless given; progress(rows)
+    is called after each chunk.
+    """
+    if report not in REPORTS:
+        raise ValueError(f"Unknown report '{report}' (expected one of: {', '.join(REPORTS)})")
+    fmt = fmt or EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt not in WRITERS:
+        raise ValueError(f"Cannot tell the report format of {path}; use one of: {', '.join(FORMATS)}")
+    title, columns, rows = REPORTS[report]
+
+    count = 0
+    temp_file = path + '.tmp'
+    try:
+        with open(temp_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+            for written in WRITERS[fmt](f, title, columns, rows(lms, as_of), chunk_rows):
+                count += written
+                if progress:
+                    progress(count)
+        os.replace(temp_file, path)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a library report")
+    parser.add_argument('report', choices=list(REPORTS))
+    parser.add_argument('path', help="output file (.csv, .jsonl or .html)")
+    parser.add_argument('--format', choices=FORMATS, help="output format (default: from the file extension)")
+    parser.add_argument('--data-file', default='library_data.json')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    args = parser.parse_args(argv)
+
+    if args.backend == 'sqlite':
+        from sqlite_backend import SQLiteLibraryManagementSystem
+        lms = SQLiteLibraryManagementSystem(os.path.splitext(args.data_file)[0] + '.db')
+    else:
+        from library_core import LibraryManagementSystem
+        lms = LibraryManagementSystem(data_file=args.data_file)
+
+    start = time.perf_counter()
+    try:
+        count = export_report(lms, args.report, args.path, fmt=args.format,
+                              progress=lambda rows: print(f"\r📤 {rows:,} rows", end='', flush=True))
+    except (OSError, ValueError) as e:
+        print(f"\n❌ Export failed: {e}")
+        return 1
+    finally:
+        lms.close()
+    print(f"\r✅ Wrote {count:,} rows to {args.path} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
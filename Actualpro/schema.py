@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Versioned schema for library_data.json
+
+Version 1 stored loan dates as '%Y-%m-%d %H:%M:%S' strings. Version 2 stores
+them as integer epoch seconds ('issue_ts' / 'due_ts'), so loading and saving
+no longer run strptime/strftime per loan; datetimes are only built when a
+date is actually displayed.
+
+Timestamps count seconds since the naive 1970-01-01, the same local
+wall-clock time the application has always used, so no time zone or DST
+conversion is involved.
+
+Usage: python schema.py [library_data.json]   (one-shot migration in place)
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+SCHEMA_VERSION = 2
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+SECONDS_PER_DAY = 86400
+
+
+def to_epoch(value):
+    if isinstance(value, str):
+        value = datetime.strptime(value, DATE_FORMAT)
+    return (value - EPOCH) // ONE_SECOND
+
+
+def from_epoch(timestamp):
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+def data_version(data):
+    return data.get('schema_version', 1)
+
+
+def migrate(data):
+    """Upgrade a loaded data document to SCHEMA_VERSION in place and return it."""
+    version = data_version(data)
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"Data file schema version {version} is newer than supported ({SCHEMA_VERSION})")
+    if version < 2:
+        for issued_list in data.get('issued_books', {}).values():
+            for i, issued in enumerate(issued_list):
+                issued_list[i] = {
+                    'book_id': issued['book_id'],
+                    'issue_ts': to_epoch(issued['issue_date']),
+                    'due_ts': to_epoch(issued['due_date'])
+                }
+    data['schema_version'] = SCHEMA_VERSION
+    return data
+
+
+def migrate_data_file(path='library_data.json'):
+    """Rewrite path in the current schema; returns the version it was upgraded from."""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    version = data_version(data)
+    if version == SCHEMA_VERSION:
+        return version
+    migrate(data)
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_file, path)
+    return version
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else 'library_data.json'
+    old_version = migrate_data_file(path)
+    if old_version == SCHEMA_VERSION:
+        print(f"✅ {path} is already at schema version {SCHEMA_VERSION}")
+    else:
+        print(f"✅ Migrated {path} from schema version {old_version} to {SCHEMA_VERSION}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+In-memory search indexes for the Library Management System
+"""
+
+import heapq
+import re
+import sys
+from bisect import bisect_left, insort
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r'\w+')
+# Re-tokenizing one candidate costs roughly this many set insertions
+FORWARD_CHECK_COST = 64
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def trigrams(text):
+    grams = set()
+    for token in tokenize(text):
+        padded = f"  {token} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class InvertedIndex:
+    """Token -> book_id postings over title, author and category.
+
+    Every query term is matched as a token prefix and the terms are ANDed,
+    so "tolk hob" finds "The Hobbit" by J.R.R. Tolkien.
+    """
+
+    FIELDS = ('title', 'author', 'category')
+
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.books = {}
+
+    def _tokens(self, book):
+        tokens = set()
+        for field in self.FIELDS:
+            tokens.update(tokenize(book[field]))
+        return tokens
+
+    def build(self, books):
+        self.books = books
+        self.postings = {}
+        postings = self.postings
+        for book_id, book in books.items():
+            for token in self._tokens(book):
+                posting = postings.get(token)
+                if posting is None:
+                    postings[token] = {book_id}
+                else:
+                    posting.add(book_id)
+        self.vocabulary = sorted(postings)
+
+    def add(self, book_id, book):
+        for token in self._tokens(book):
+            posting = self.postings.get(token)
+            if posting is None:
+                self.postings[token] = {book_id}
+                insort(self.vocabulary, token)
+            else:
+                posting.add(book_id)
+
+    def add_many(self, items):
+        """Add (book_id, book) pairs, merging new tokens into the vocabulary once instead of per token."""
+        postings = self.postings
+        new_tokens = []
+        for book_id, book in items:
+            for token in self._tokens(book):
+                posting = postings.get(token)
+                if posting is None:
+                    postings[token] = {book_id}
+                    new_tokens.append(token)
+                else:
+                    posting.add(book_id)
+        if new_tokens:
+            # Two sorted runs: list.sort merges them in linear time
+            self.vocabulary.extend(sorted(new_tokens))
+            self.vocabulary.sort()
+
+    def remove(self, book_id, book):
+        for token in self._tokens(book):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(book_id)
+            if not posting:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def _prefix_postings(self, term):
+        vocabulary = self.vocabulary
+        i = bisect_left(vocabulary, term)
+        postings = []
+        while i < len(vocabulary) and vocabulary[i].startswith(term):
+            postings.append(self.postings[vocabulary[i]])
+            i += 1
+        return postings
+
+    def _matches_prefix(self, book_id, term):
+        return any(token.startswith(term) for token in self._tokens(self.books[book_id]))
+
+    def search(self, query):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Only the rarest term's postings are materialized; the remaining terms are
+        # checked against each candidate's own tokens when that is cheaper than a union.
+        terms = sorted(((term, self._prefix_postings(term)) for term in set(terms)),
+                       key=lambda item: sum(map(len, item[1])))
+        result = set().union(*terms[0][1])
+        for term, postings in terms[1:]:
+            if not result:
+                break
+            if len(postings) == 1:
+                result &= postings[0]
+            elif len(result) * FORWARD_CHECK_COST < sum(map(len, postings)):
+                result = {book_id for book_id in result if self._matches_prefix(book_id, term)}
+            else:
+                result &= set().union(*postings)
+        return sorted(result)
+
+
+class TrigramIndex:
+    """Typo-tolerant, ranked search over title and author words.
+
+    Trigrams index the vocabulary rather than the books: each query word is
+    matched to similar vocabulary words (Dice similarity of their trigrams,
+    "orwel" ~ "orwell" = 0.77), candidate books come from the postings of the
+    rarest query word, and the remaining words are scored per candidate. A
+    book's score is the mean of the best similarity for each query word.
+    """
+
+    FIELDS = ('title', 'author')
+
+    def __init__(self):
+        self.books = {}
+        self.word_postings = {}
+        self.gram_words = {}
+        self.word_sizes = {}
+
+    def _words(self, book):
+        words = set()
+        for field in self.FIELDS:
+            words.update(tokenize(book[field]))
+        return words
+
+    def build(self, books):
+        self.__init__()
+        self.books = books
+        for book_id, book in books.items():
+            self.add(book_id, book)
+
+    def add(self, book_id, book):
+        for word in self._words(book):
+            posting = self.word_postings.get(word)
+            if posting is not None:
+                posting.add(book_id)
+                continue
+            self.word_postings[word] = {book_id}
+            self.add_word(word)
+
+    def add_word(self, word):
+        """Make word findable by similar_words (add() does this for every new word)."""
+        grams = trigrams(word)
+        self.word_sizes[word] = len(grams)
+        for gram in grams:
+            self.gram_words.setdefault(gram, set()).add(word)
+
+    def remove(self, book_id, book):
+        for word in self._words(book):
+            posting = self.word_postings.get(word)
+            if posting is None:
+                continue
+            posting.discard(book_id)
+            if posting:
+                continue
+            del self.word_postings[word]
+            del self.word_sizes[word]
+            for gram in trigrams(word):
+                words = self.gram_words[gram]
+                words.discard(word)
+                if not words:
+                    del self.gram_words[gram]
+
+    def similar_words(self, word, threshold):
+        grams = trigrams(word)
+        common_counts = Counter()
+        for gram in grams:
+            common_counts.update(self.gram_words.get(gram, ()))
+        similar = {}
+        for candidate, common in common_counts.items():
+            score = 2 * common / (len(grams) + self.word_sizes[candidate])
+            if score >= threshold:
+                similar[candidate] = score
+        return similar
+
+    def search(self, query, limit=10, threshold=0.45):
+        """Return up to limit (book_id, score) pairs, best first."""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words or limit <= 0:
+            return []
+        matches = []
+        for word in words:
+            similar = self.similar_words(word, threshold)
+            if similar:
+                cost = sum(len(self.word_postings[candidate]) for candidate in similar)
+                matches.append((cost, similar))
+        if not matches:
+            return []
+        matches.sort(key=lambda match: match[0])
+
+        scores = {}
+        for candidate, score in matches[0][1].items():
+            for book_id in self.word_postings[candidate]:
+                if score > scores.get(book_id, 0):
+                    scores[book_id] = score
+        for cost, similar in matches[1:]:
+            if len(scores) * FORWARD_CHECK_COST < cost:
+                for book_id in scores:
+                    scores[book_id] += max((similar.get(word, 0) for word in self._words(self.books[book_id])),
+                                           default=0)
+            else:
+                best = {}
+                for candidate, score in similar.items():
+                    for book_id in self.word_postings[candidate]:
+                        if book_id in scores and score > best.get(book_id, 0):
+                            best[book_id] = score
+                for book_id, score in best.items():
+                    scores[book_id] += score
+
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(book_id, round(score / len(words), 3)) for book_id, score in ranked
+                if score / len(words) >= threshold]
+
+
+class PrefixIndex:
+    """Sorted (token, item_id) pairs for type-ahead completion over ids, titles and names.
+
+    complete() bisects to the query word with the fewest entries and walks
+    forward only until `limit` items match, so a completion never touches
+    more than it returns plus the entries it skips.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.tokens = {}
+
+    def _tokens(self, texts):
+        return tuple(sys.intern(token) for token in dict.fromkeys(tokenize(' '.join(texts))))
+
+    def build(self, items):
+        """items yields (item_id, texts) pairs."""
+        self.tokens = {item_id: self._tokens(texts) for item_id, texts in items}
+        self.entries = sorted((token, item_id) for item_id, tokens in self.tokens.items() for token in tokens)
+
+    def add(self, item_id, *texts):
+        tokens = self.tokens[item_id] = self._tokens(texts)
+        for token in tokens:
+            insort(self.entries, (token, item_id))
+
+    def remove(self, item_id):
+        for token in self.tokens.pop(item_id, ()):
+            i = bisect_left(self.entries, (token, item_id))
+            if i < len(self.entries) and self.entries[i] == (token, item_id):
+                del self.entries[i]
+
+    def _complete_among(self, candidates, key, others, limit, accept):
+        # Same order as the walk in complete(): by each item's first word matching key
+        matches = []
+        for item_id in candidates:
+            tokens = self.tokens.get(item_id)
+            if tokens is None:
+                continue
+            first = min((token for token in tokens if token.startswith(key)), default=None)
+            if first is not None and all(any(token.startswith(term) for token in tokens) for term in others) and \
+                    (accept is None or accept(item_id)):
+                matches.append((first, item_id))
+        return [item_id for token, item_id in heapq.nsmallest(limit, matches)]
+
+    def _prefix_range(self, term):
+        start = bisect_left(self.entries, (term,))
+        stop = bisect_left(self.entries, (term + '\uffff',), start)
+        return start, stop
+
+    def complete(self, query, limit=10, accept=None, candidates=None):
+        """Up to limit item ids with a word starting with each query word, in token order.
+
+        candidates (a collection of item ids, e.g. the issued books) restricts the
+        result to those items; when they are fewer than the entries a short query
+        would walk, they are matched directly instead.
+        """
+        terms = list(dict.fromkeys(tokenize(query))) or ['']
+        ranges = {term: self._prefix_range(term) for term in terms}
+        key = min(terms, key=lambda term: ranges[term][1] - ranges[term][0])
+        others = [term for term in terms if term != key]
+        if candidates is not None and len(candidates) < ranges[key][1] - ranges[key][0]:
+            return self._complete_among(candidates, key, others, limit, accept)
+        if candidates is not None:
+            accept = (lambda item_id, accept=accept: item_id in candidates and (accept is None or accept(item_id)))
+        entries = self.entries
+        results = []
+        seen = set()
+        i = ranges[key][0]
+        while i < len(entries) and len(results) < limit:
+            token, item_id = entries[i]
+            i += 1
+            if not token.startswith(key):
+                break
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            tokens = self.tokens[item_id]
+            if all(any(other.startswith(term) for other in tokens) for term in others) and \
+                    (accept is None or accept(item_id)):
+                results.append(item_id)
+        return results
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+HTTP/JSON service for the Library Management System
+
+Usage: python server.py [--host 127.0.0.1] [--port 8080] [--data-file library_data.json]
+                        [--journal | --shared] [--max-concurrency 64] [--durable]
+
+A stdlib-only asyncio server around one LibraryManagementSystem, so any
+number of desks (or scripts) can share a single in-memory library:
+
+    GET    /books?q=words&offset=0&limit=50   search (without q, pages through the catalogue)
+    POST   /books                             {"title", "author", "category", "isbn"} -> {"book_id"}
+    GET    /books/<id>
+    DELETE /books/<id>
+    GET    /members?offset=0&limit=50
+    POST   /members                           {"name", "email", "phone"} -> {"member_id"}
+    GET    /members/<id>                      the member and their loans
+    DELETE /members/<id>
+    POST   /loans                             {"book_id", "member_id"} issues the book
+    POST   /loans/<book_id>/return            {"member_id"}
+    GET    /overdue?limit=100                 overdue loans, longest overdue first
+    GET    /fees                              total late fees
+    GET    /stats                             request counts and autosave state
+
+Connections are kept alive (HTTP/1.1 and pipelined requests), at most
+`max_concurrency` requests are handled at once and the rest wait their turn.
+Lookups by id and the stats are plain dictionary reads and run on the event
+loop. Everything else runs on a thread pool. Searches, catalogue pages and
+the fee total can touch every book. Issue, return, add, delete and the
+overdue list take the library lock, which a save holds while it copies the
+records. Running them off the loop means neither a large result nor a save
+holds up other connections.
+
+Changes are saved by an AutoSaver, which folds each burst of writes into
+one save. With --durable a write is only answered once the save containing
+it has finished.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import parse_qsl, unquote
+
+from autosave import AutoSaver
+from reports import LOAN_COLUMNS, loan_rows
+
+MAX_BODY = 1024 * 1024
+MAX_LIMIT = 1000
+STATUS_TEXT = {
+    200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    409: 'Conflict', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(params, name, default, maximum=None):
+    try:
+        value = max(0, int(params.get(name, default)))
+    except ValueError:
+        raise HTTPError(400, f"'{name}' must be a whole number")
+    return value if maximum is None else min(value, maximum)
+
+
+def _fields(body, names):
+    """The named non-empty string fields of a JSON object body."""
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Expected a JSON object")
+    values = {name: str(body.get(name) or '').strip() for name in names}
+    missing = [name for name, value in values.items() if not value]
+    if missing:
+        raise HTTPError(400, f"Missing {', '.join(missing)}")
+    return values
+
+
+class LibraryServer:
+    def __init__(self, lms, host='127.0.0.1', port=8080, max_concurrency=64, durable=False,
+                 autosave_interval=0.5, keepalive_timeout=15.0, shared_poll_interval=1.0):
+        self.lms = lms
+        self.host = host
+        self.port = port
+        self.durable = durable
+        self.keepalive_timeout = keepalive_timeout
+        self.shared_poll_interval = shared_poll_interval
+        self.autosaver = AutoSaver(lms, interval=autosave_interval)
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        self.started = time.time()
+        self._max_concurrency = max_concurrency
+        self._slots = None
+        self._executor = ThreadPoolExecutor(max_workers=min(max_concurrency, 8), thread_name_prefix='library-http')
+        self._server = None
+        self._poller = None
+        # (method, path pattern, handler, runs on the thread pool); None in a pattern matches any segment
+        self._routes = [
+            ('GET', ('books',), self.list_books, True),
+            ('POST', ('books',), self.add_book, True),
+            ('GET', ('books', None), self.get_book, False),
+            ('DELETE', ('books', None), self.delete_book, True),
+            ('GET', ('members',), self.list_members, True),
+            ('POST', ('members',), self.add_member, True),
+            ('GET', ('members', None), self.get_member, False),
+            ('DELETE', ('members', None), self.delete_member, True),
+            ('POST', ('loans',), self.issue_book, True),
+            ('POST', ('loans', None, 'return'), self.return_book, True),
+            ('GET', ('overdue',), self.overdue, True),
+            ('GET', ('fees',), self.fees, True),
+            ('GET', ('stats',), self.stats, False)
+        ]
+
+    # Handlers take (path arguments, query parameters, JSON body) and return (status, payload)
+
+    def _book(self, book_id):
+        book = self.lms.books.get(book_id)
+        if book is None:
+            raise HTTPError(404, "Book not found")
+        return dict(book, book_id=book_id)
+
+    def list_books(self, args, params, body):
+        query = params.get('q', '').strip()
+        book_ids = self.lms.search_books(query) if query else self.lms.book_ids()
+        page = book_ids[_int_param(params, 'offset', 0):][:_int_param(params, 'limit', 50, MAX_LIMIT)]
+        books = self.lms.books
+        return 200, {'count': len(book_ids),
+                     'books': [dict(books[book_id], book_id=book_id) for book_id in page if book_id in books]}
+
+    def get_book(self, args, params, body):
+        return 200, self._book(args[0])
+
+    def add_book(self, args, params, body):
+        book = _fields(body, ('title', 'author', 'category', 'isbn'))
+        if book['category'] not in self.lms.categories:
+            raise HTTPError(400, f"Unknown category '{book['category']}'")
+        return 201, {'book_id': self.lms.add_book(**book)}
+
+    def delete_book(self, args, params, body):
+        return 200, {'message': self.lms.delete_book(args[0])}
+
+    def list_members(self, args, params, body):
+        member_ids = self.lms.member_ids()
+        page = member_ids[_int_param(params, 'offset', 0):][:_int_param(params, 'limit', 50, MAX_LIMIT)]
+        members = self.lms.members
+        return 200, {'count': len(member_ids),
+                     'members': [dict(members[member_id], member_id=member_id)
+                                 for member_id in page if member_id in members]}
+
+    def get_member(self, args, params, body):
+        member = self.lms.members.get(args[0])
+        if member is None:
+            raise HTTPError(404, "Member not found")
+        loans = [{'book_id': loan.book_id, 'issue_ts': loan.issue_ts, 'due_ts': loan.due_ts}
+                 for loan in self.lms.issued_books.get(args[0], ())]
+        return 200, dict(member, member_id=args[0], loans=loans)
+
+    def add_member(self, args, params, body):
+        return 201, {'member_id': self.lms.add_member(**_fields(body, ('name', 'email', 'phone')))}
+
+    def delete_member(self, args, params, body):
+        return 200, {'message': self.lms.delete_member(args[0])}
+
+    def issue_book(self, args, params, body):
+        loan = _fields(body, ('book_id', 'member_id'))
+        return 201, {'message': self.lms.issue_book(loan['book_id'], loan['member_id'])}
+
+    def return_book(self, args, params, body):
+        member_id = _fields(body, ('member_id',))['member_id']
+        return 200, {'message': self.lms.return_book(args[0], member_id)}
+
+    def overdue(self, args, params, body):
+        rows = islice(loan_rows(self.lms, overdue_only=True), _int_param(params, 'limit', 100, MAX_LIMIT))
+        return 200, {'loans': [dict(zip(LOAN_COLUMNS, row)) for row in rows]}
+
+    def fees(self, args, params, body):
+        return 200, {'total_fees': self.lms.calculate_total_late_fees(),
+                     'overdue_loans': len(self.lms.get_overdue_books())}
+
+    def stats(self, args, params, body):
+        return 200, {
+            'uptime_s': round(time.time() - self.started, 1),
+            'requests': self.requests,
+            'errors': self.errors,
+            'connections': self.connections,
+            'books': len(self.lms.books),
+            'members': len(self.lms.members),
+            'loans': len(self.lms.loans_by_book),
+            'autosave': self.autosaver.stats()
+        }
+
+    def _route(self, method, path):
+        segments = tuple(unquote(segment) for segment in path.strip('/').split('/'))
+        allowed = False
+        for route_method, pattern, handler, blocking in self._routes:
+            if len(pattern) != len(segments) or any(p is not None and p != s for p, s in zip(pattern, segments)):
+                continue
+            if route_method == method:
+                args = [s for p, s in zip(pattern, segments) if p is None]
+                return handler, args, blocking
+            allowed = True
+        raise HTTPError(405 if allowed else 404, "Method not allowed" if allowed else "No such endpoint")
+
+    async def dispatch(self, method, target, body):
+        """Run one request and return (status, payload)."""
+        try:
+            path, _, query = target.partition('?')
+            handler, args, blocking = self._route(method, path)
+            params = dict(parse_qsl(query))
+            try:
+                body = json.loads(body) if body else None
+            except ValueError:
+                raise HTTPError(400, "Body is not valid JSON")
+            async with self._slots:
+                if blocking:
+                    status, payload = await asyncio.get_running_loop().run_in_executor(
+                        self._executor, handler, args, params, body)
+                else:
+                    status, payload = handler(args, params, body)
+            if method != 'GET':
+                self.autosaver.request()
+                if self.durable and not await asyncio.get_running_loop().run_in_executor(
+                        self._executor, self.autosaver.flush):
+                    raise HTTPError(500, f"Save failed: {self.autosaver.stats()['last_error']}")
+        except HTTPError as e:
+            status, payload = e.status, {'error': str(e)}
+        except ValueError as e:
+            # The library's own checks: unknown ids, books already issued, loan limits
+            status, payload = 404 if 'not found' in str(e).lower() else 409, {'error': str(e)}
+        except Exception as e:
+            status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+        self.requests += 1
+        if status >= 400:
+            self.errors += 1
+        return status, payload
+
+    async def _read_request(self, reader):
+        """(method, target, headers, body) of the next request; None once the client is done."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "Request headers too large")
+        request_line, *header_lines = head[:-4].decode('latin-1').split('\r\n')
+        try:
+            method, target, version = request_line.split(' ')
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {'version': version}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Bad Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, "Request body too large")
+        try:
+            body = await reader.readexactly(length) if length else b''
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        return method, target, headers, body
+
+    @staticmethod
+    def _response(status, payload, keep_alive):
+        body = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode('latin-1') + body
+
+    async def _serve_connection(self, reader, writer):
+        self.connections += 1
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # Idle keep-alive connections are dropped; a timer is cheaper than wait_for per request
+                idle = loop.call_later(self.keepalive_timeout, writer.transport.abort)
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    writer.write(self._response(e.status, {'error': str(e)}, False))
+                    break
+                finally:
+                    idle.cancel()
+                if request is None:
+                    break
+                method, target, headers, body = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if headers['version'] == 'HTTP/1.0' else connection != 'close'
+                status, payload = await self.dispatch(method, target, body)
+                writer.write(self._response(status, payload, keep_alive))
+                if not keep_alive:
+                    break
+                # Only waits when the client is not reading its responses
+                await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _poll_shared(self):
+        # Another desk's saves reach this server's memory the same way they reach a Tk desk
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.shared_poll_interval)
+            await loop.run_in_executor(self._executor, self.lms.poll_changes)
+
+    async def start(self):
+        self._slots = asyncio.Semaphore(self._max_concurrency)
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port, limit=64 * 1024)
+        # With port 0 the OS picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        if getattr(self.lms, 'shared', False):
+            self._poller = asyncio.create_task(self._poll_shared())
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop accepting connections and save every change that was answered."""
+        if self._poller is not None:
+            self._poller.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.autosaver.close)
+        self._executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the library over HTTP/JSON")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--data-file', default='library_data.json')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--journal', action='store_true', help="append changes to the journal instead of rewriting the data file")
+    mode.add_argument('--shared', action='store_true', help="share the data file with other desks")
+    parser.add_argument('--max-concurrency', type=int, default=64, help="requests handled at once")
+    parser.add_argument('--durable', action='store_true', help="answer writes only once they are saved")
+    args = parser.parse_args(argv)
+
+    from library_core import LibraryManagementSystem
+    lms = LibraryManagementSystem(data_file=args.data_file, journal=args.journal, shared=args.shared)
+    server = LibraryServer(lms, args.host, args.port, max_concurrency=args.max_concurrency, durable=args.durable)
+
+    async def run():
+        await server.start()
+        print(f"📡 Serving {os.path.abspath(args.data_file)} on http://{args.host}:{server.port}", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        lms.close()
+    print("👋 Server stopped, changes saved")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Cross-process coordination for desks sharing one library_data.json
+
+FileLock is an advisory lock on library_data.json.lock (fcntl.flock on
+POSIX, msvcrt.locking on Windows); it is re-entrant within a process and
+serializes threads as well. ChangeLog is the append-only
+library_data.json.changes file every desk writes its committed records to,
+one JSON line each with a global `seq`. Its first line is a header naming
+the snapshot seq it continues from, so a desk can tell when the log was
+compacted past records it never read. Desks remember their read offset, so
+polling for other desks' changes only reads the new lines.
+"""
+
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    def __init__(self, path, poll_interval=0.01):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def _try_lock(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, timeout=None):
+        """Take the lock; False if timeout (seconds, 0 = don't wait) passes first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._thread_lock.acquire(timeout=-1 if timeout is None else timeout):
+            return False
+        if self._depth:
+            self._depth += 1
+            return True
+        self._file = open(self.path, 'a+')
+        while not self._try_lock():
+            if deadline is not None and time.monotonic() >= deadline:
+                self._file.close()
+                self._file = None
+                self._thread_lock.release()
+                return False
+            time.sleep(self.poll_interval)
+        self._depth = 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if not self._depth:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        if not self.acquire(timeout=30.0):
+            raise TimeoutError(f"Timed out waiting for {self.path}")
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class ChangeLog:
+    """The shared change log; callers hold the FileLock around every method."""
+
+    def __init__(self, path):
+        self.path = path
+        self.base_seq = None
+        self.offset = 0
+        self._inode = None
+
+    def forget(self):
+        """Read the log from the start on the next read_new()."""
+        self.base_seq = None
+        self.offset = 0
+        self._inode = None
+
+    def read_new(self):
+        """Records appended since the last call, oldest first.
+
+        When the log has been replaced (compacted) it is read again from its
+        header, and base_seq is updated to the snapshot it continues from.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if stat.st_ino == self._inode and stat.st_size == self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            if stat.st_ino != self._inode or stat.st_size < self.offset:
+                self.base_seq = json.loads(f.readline())['base_seq']
+                self.offset = f.tell()
+                self._inode = stat.st_ino
+            f.seek(self.offset)
+            data = f.read()
+        records = []
+        for line in data.splitlines(keepends=True):
+            # A desk that crashed mid-write leaves a torn last line
+            if not line.endswith(b'\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            self.offset += len(line)
+        return records
+
+    def append(self, records, base_seq):
+        """Append records after everything read so far; base_seq heads a new log."""
+        if not os.path.exists(self.path):
+            self.reset(base_seq)
+        data = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records).encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.offset += len(data)
+
+    def reset(self, base_seq):
+        """Start an empty log continuing from the snapshot at base_seq."""
+        tmp_file = self.path + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(json.dumps({'base_seq': base_seq}).encode('utf-8') + b'\n')
+            offset = f.tell()
+        os.replace(tmp_file, self.path)
+        self.base_seq = base_seq
+        self.offset = offset
+        self._inode = os.stat(self.path).st_ino
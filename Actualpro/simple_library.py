@@ -4,36 +4,64 @@ from datetime import datetime, timedelta
 import json
 import os
 
+from partitions import PartitionedStore, partition_dir
+
 class SimpleLibrary:
-    def __init__(self):
+    def __init__(self, data_file='library_data.json'):
+        self.data_file = data_file
         self.books = {}
         self.members = {}
-        self.issued_books = {}
+        # The rest of the JSON file (loans, schema_version), written back unchanged
+        self.other_data = {}
+        self.store = PartitionedStore(partition_dir(data_file))
+        self.partitioned = False
         self.load_data()
     
+    def _partitions_current(self):
+        # Same rule as the full app: a JSON file written after the partitions wins
+        if not self.store.exists():
+            return False
+        return not os.path.exists(self.data_file) or \
+            os.path.getmtime(self.store.manifest_file) >= os.path.getmtime(self.data_file)
+    
     def load_data(self):
-        if os.path.exists('library_data.json'):
+        # Partitioned data files let us skip the loans, which this app never shows
+        self.partitioned = self._partitions_current()
+        if self.partitioned:
+            # Not caught: saving after a failed load would empty the intact partitions
+            data = self.store.load(loans=False)
+            self.books = data['books']
+            self.members = data['members']
+            return
+        if os.path.exists(self.data_file):
             try:
-                with open('library_data.json', 'r') as f:
+                with open(self.data_file, 'r') as f:
                     data = json.load(f)
-                    self.books = data.get('books', {})
-                    self.members = data.get('members', {})
+                    self.books = data.pop('books', {})
+                    self.members = data.pop('members', {})
+                    self.other_data = data
             except:
                 pass
     
     def save_data(self):
-        data = {'books': self.books, 'members': self.members}
-        with open('library_data.json', 'w') as f:
+        if self.partitioned:
+            # Only the partitions add_book/add_member touched are rewritten
+            self.store.write(self.store.collect(self.books, self.members))
+            return
+        data = dict(self.other_data, books=self.books, members=self.members)
+        with open(self.data_file, 'w') as f:
             json.dump(data, f, indent=2)
     
     def add_book(self, title, author, category):
         book_id = str(len(self.books) + 1).zfill(4)
         self.books[book_id] = {'title': title, 'author': author, 'category': category, 'status': 'Available'}
+        self.store.touch_book(book_id, self.books[book_id])
         return book_id
     
     def add_member(self, name, email, phone):
         member_id = str(len(self.members) + 1).zfill(4)
         self.members[member_id] = {'name': name, 'email': email, 'phone': phone, 'join_date': datetime.now().strftime('%Y-%m-%d')}
+        self.store.touch('members')
         return member_id
 
 class LibraryApp:
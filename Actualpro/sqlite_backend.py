@@ -0,0 +1,513 @@
+"""
+SQLite storage backend for the Library Management System
+
+SQLiteLibraryManagementSystem exposes the same API as LibraryManagementSystem,
+but every query and mutation runs as indexed SQL inside a transaction, so
+startup time and memory use do not grow with the size of the catalogue.
+"""
+
+import json
+import os
+import sqlite3
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from library_core import CATEGORIES, LIBRARY_RULES
+import schema
+from schema import DATE_FORMAT
+from search_index import TrigramIndex, tokenize
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS books (
+    book_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    category TEXT NOT NULL,
+    isbn TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Available',
+    issued_to TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_books_title ON books (title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_books_author ON books (author COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_books_category ON books (category);
+CREATE INDEX IF NOT EXISTS idx_books_isbn ON books (isbn);
+CREATE INDEX IF NOT EXISTS idx_books_status ON books (status);
+
+CREATE TABLE IF NOT EXISTS members (
+    member_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    join_date TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS loans (
+    book_id TEXT PRIMARY KEY REFERENCES books (book_id),
+    member_id TEXT NOT NULL REFERENCES members (member_id),
+    issue_date TEXT NOT NULL,
+    due_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_loans_member ON loans (member_id);
+CREATE INDEX IF NOT EXISTS idx_loans_due_date ON loans (due_date);
+
+-- Token index for search_books, kept in step with books by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5 (
+    title, author, category, content='books', tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+    INSERT INTO books_fts (rowid, title, author, category) VALUES (new.rowid, new.title, new.author, new.category);
+END;
+CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+    INSERT INTO books_fts (books_fts, rowid, title, author, category)
+    VALUES ('delete', old.rowid, old.title, old.author, old.category);
+END;
+CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author, category ON books BEGIN
+    INSERT INTO books_fts (books_fts, rowid, title, author, category)
+    VALUES ('delete', old.rowid, old.title, old.author, old.category);
+    INSERT INTO books_fts (rowid, title, author, category) VALUES (new.rowid, new.title, new.author, new.category);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts_words USING fts5vocab (books_fts, 'col');
+'''
+
+BOOK_COLUMNS = ('title', 'author', 'category', 'isbn', 'status', 'issued_to')
+MEMBER_COLUMNS = ('name', 'email', 'phone', 'join_date')
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _loan(row):
+    return {
+        'book_id': row[0],
+        'issue_date': datetime.strptime(row[1], DATE_FORMAT),
+        'due_date': datetime.strptime(row[2], DATE_FORMAT)
+    }
+
+
+class _TableView(Mapping):
+    """Read-only dict view of a table, so LibraryUI can keep using lms.books / lms.members."""
+
+    def __init__(self, conn, table, key, columns):
+        self._conn = conn
+        self._table = table
+        self._key = key
+        self._columns = columns
+        self._select = f"SELECT {key}, {', '.join(columns)} FROM {table}"
+
+    def __getitem__(self, key):
+        row = self._conn.execute(f"{self._select} WHERE {self._key} = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return dict(zip(self._columns, row[1:]))
+
+    def __contains__(self, key):
+        return self._conn.execute(
+            f"SELECT 1 FROM {self._table} WHERE {self._key} = ?", (key,)).fetchone() is not None
+
+    def __iter__(self):
+        for (key,) in self._conn.execute(f"SELECT {self._key} FROM {self._table} ORDER BY rowid"):
+            yield key
+
+    def __len__(self):
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+    def items(self):
+        for row in self._conn.execute(f"{self._select} ORDER BY rowid"):
+            yield row[0], dict(zip(self._columns, row[1:]))
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+
+class _LoansView(Mapping):
+    """member_id -> list of active loans, the shape LibraryManagementSystem.issued_books has."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getitem__(self, member_id):
+        rows = self._conn.execute(
+            "SELECT book_id, issue_date, due_date FROM loans WHERE member_id = ? ORDER BY issue_date",
+            (member_id,)).fetchall()
+        if not rows:
+            raise KeyError(member_id)
+        return [_loan(row) for row in rows]
+
+    def __iter__(self):
+        for (member_id,) in self._conn.execute("SELECT DISTINCT member_id FROM loans ORDER BY member_id"):
+            yield member_id
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(DISTINCT member_id) FROM loans").fetchone()[0]
+
+    def items(self):
+        current, loans = None, []
+        for row in self._conn.execute(
+                "SELECT member_id, book_id, issue_date, due_date FROM loans ORDER BY member_id, issue_date"):
+            if row[0] != current and loans:
+                yield current, loans
+                loans = []
+            current = row[0]
+            loans.append(_loan(row[1:]))
+        if loans:
+            yield current, loans
+
+    def values(self):
+        for _, loans in self.items():
+            yield loans
+
+
+class SQLiteLibraryManagementSystem:
+    def __init__(self, db_file='library_data.db'):
+        self.db_file = db_file
+        self.categories = set(CATEGORIES)
+        self.library_rules = LIBRARY_RULES
+        self.conn = None
+        # Trigrams of the title/author vocabulary for fuzzy_search, and the data_version they were read at
+        self._vocabulary = None
+        self._vocabulary_version = None
+        self.load_data()
+
+    def load_data(self):
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = sqlite3.connect(self.db_file, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        indexed = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'").fetchone() is not None
+        self.conn.executescript(SCHEMA)
+        if not indexed:
+            # Databases created before the token index existed
+            self.conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+        self.books = _TableView(self.conn, 'books', 'book_id', BOOK_COLUMNS)
+        self.members = _TableView(self.conn, 'members', 'member_id', MEMBER_COLUMNS)
+        self.issued_books = _LoansView(self.conn)
+        self._vocabulary = None
+
+    def save_data(self):
+        # Every mutation is committed by its own transaction.
+        pass
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        if self.conn.in_transaction:
+            # Nested blocks join the outer transaction
+            yield self.conn
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def import_json(self, json_file='library_data.json'):
+        """One-shot migration of an existing library_data.json into the database."""
+        if not os.path.exists(json_file):
+            return 0
+        with open(json_file, 'r') as f:
+            data = schema.migrate(json.load(f))
+        books = data.get('books', {})
+        self._vocabulary = None
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO books VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((book_id,) + tuple(book.get(column) for column in BOOK_COLUMNS) for book_id, book in books.items()))
+            conn.executemany(
+                "INSERT OR REPLACE INTO members VALUES (?, ?, ?, ?, ?)",
+                ((member_id,) + tuple(member[column] for column in MEMBER_COLUMNS)
+                 for member_id, member in data.get('members', {}).items()))
+            conn.executemany(
+                "INSERT OR REPLACE INTO loans VALUES (?, ?, ?, ?)",
+                ((issued['book_id'], member_id, schema.from_epoch(issued['issue_ts']).strftime(DATE_FORMAT),
+                  schema.from_epoch(issued['due_ts']).strftime(DATE_FORMAT))
+                 for member_id, issued_list in data.get('issued_books', {}).items() for issued in issued_list))
+        return len(books)
+
+    def get_overdue_books(self, as_of=None):
+        cutoff = ((as_of or datetime.now()) - timedelta(days=1)).strftime(DATE_FORMAT)
+        rows = self.conn.execute(
+            "SELECT book_id, issue_date, due_date FROM loans WHERE due_date <= ? ORDER BY due_date", (cutoff,))
+        return [_loan(row) for row in rows]
+
+    def calculate_total_late_fees(self, as_of=None):
+        now = as_of or datetime.now()
+        cutoff = (now - timedelta(days=1)).strftime(DATE_FORMAT)
+        total = self.conn.execute(
+            "SELECT SUM(CAST(julianday(?) - julianday(due_date) AS INTEGER)) FROM loans WHERE due_date <= ?",
+            (now.strftime(DATE_FORMAT), cutoff)).fetchone()[0]
+        return total * 1.0 if total else 0
+
+    def search_books(self, query):
+        """Book ids whose title, author or category has a word starting with every query word."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        match = ' AND '.join(f'"{term}"*' for term in dict.fromkeys(terms))
+        rows = self.conn.execute(
+            "SELECT books.book_id FROM books_fts JOIN books ON books.rowid = books_fts.rowid "
+            "WHERE books_fts MATCH ? ORDER BY books.book_id", (match,))
+        return [book_id for (book_id,) in rows]
+
+    def loan_for_book(self, book_id):
+        """Return (member_id, loan) for an issued book, or None."""
+        row = self.conn.execute(
+            "SELECT member_id, book_id, issue_date, due_date FROM loans WHERE book_id = ?", (book_id,)).fetchone()
+        return None if row is None else (row[0], _loan(row[1:]))
+
+    def loans_by_due_date(self):
+        """(member_id, loan) for every active loan, oldest due date first, read from a cursor."""
+        for row in self.conn.execute("SELECT member_id, book_id, issue_date, due_date FROM loans ORDER BY due_date"):
+            yield row[0], _loan(row[1:])
+
+    def late_fee_report(self, as_of=None, fee_per_day=None):
+        """The fee_engine.late_fee_report summary, aggregated in SQL."""
+        # Imported here, as in library_core: fee_engine loads NumPy when it is installed
+        from fee_engine import FEE_PER_DAY, HISTOGRAM_EDGES, histogram_labels
+        as_of = as_of or datetime.now()
+        fee_per_day = FEE_PER_DAY if fee_per_day is None else fee_per_day
+        days = "CAST(julianday(?1) - julianday(due_date) AS INTEGER)"
+        bounds = list(zip(HISTOGRAM_EDGES, HISTOGRAM_EDGES[1:] + (None,)))
+        buckets = ', '.join(f"SUM(days >= {low})" if high is None else f"SUM(days >= {low} AND days < {high})"
+                            for low, high in bounds)
+        params = (as_of.strftime(DATE_FORMAT),)
+        active_loans = self.conn.execute("SELECT COUNT(*) FROM loans").fetchone()[0]
+        overdue = self.conn.execute(
+            f"SELECT COUNT(*), SUM(days), {buckets} FROM (SELECT {days} AS days FROM loans) WHERE days > 0",
+            params).fetchone()
+        member_totals = self.conn.execute(
+            f"SELECT member_id, SUM({days}) FROM loans WHERE {days} > 0 GROUP BY member_id", params)
+        return {
+            'as_of': as_of,
+            'active_loans': active_loans,
+            'overdue_loans': overdue[0],
+            'total_fees': float((overdue[1] or 0) * fee_per_day),
+            'member_totals': {member_id: float(total * fee_per_day) for member_id, total in member_totals},
+            'histogram': list(zip(histogram_labels(HISTOGRAM_EDGES), (count or 0 for count in overdue[2:])))
+        }
+
+    def _similar_words(self):
+        # Re-read after our own book changes (which clear it) or another connection's (data_version)
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._vocabulary is None or version != self._vocabulary_version:
+            vocabulary = TrigramIndex()
+            for (word,) in self.conn.execute(
+                    "SELECT DISTINCT term FROM books_fts_words WHERE col IN ('title', 'author')"):
+                vocabulary.add_word(word)
+            self._vocabulary, self._vocabulary_version = vocabulary, version
+        return self._vocabulary.similar_words
+
+    def fuzzy_search(self, query, limit=10, threshold=0.45):
+        """Up to limit (book_id, score) pairs, best first, scored like TrigramIndex.search."""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words or limit <= 0:
+            return []
+        similar_words = self._similar_words()
+        scores = {}
+        for i, word in enumerate(words):
+            best = {}
+            for candidate, score in similar_words(word, threshold).items():
+                for (book_id,) in self.conn.execute(
+                        "SELECT books.book_id FROM books_fts JOIN books ON books.rowid = books_fts.rowid "
+                        "WHERE books_fts MATCH ?", (f'{{title author}} : "{candidate}"',)):
+                    if score > best.get(book_id, 0):
+                        best[book_id] = score
+            for book_id, score in best.items():
+                scores[book_id] = scores.get(book_id, 0) + score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(book_id, round(score / len(words), 3)) for book_id, score in ranked
+                if score / len(words) >= threshold]
+
+    def search_books_recursive(self, query):
+        pattern = '%' + _escape_like(query) + '%'
+        rows = self.conn.execute(
+            "SELECT book_id FROM books WHERE title LIKE ?1 ESCAPE '\\' OR author LIKE ?1 ESCAPE '\\' "
+            "OR category LIKE ?1 ESCAPE '\\' ORDER BY rowid", (pattern,))
+        return [book_id for (book_id,) in rows]
+
+    def complete_books(self, text, limit=20, status=None):
+        prefix = _escape_like(text.strip()) + '%'
+        sql = ("SELECT book_id, title FROM books WHERE (book_id LIKE ?1 ESCAPE '\\' OR title LIKE ?1 ESCAPE '\\' "
+               "OR title LIKE '% ' || ?1 ESCAPE '\\')")
+        params = [prefix, limit]
+        if status is not None:
+            sql += " AND status = ?3"
+            params.append(status)
+        return self.conn.execute(sql + " ORDER BY book_id LIMIT ?2", params).fetchall()
+
+    def complete_members(self, text, limit=20, borrowers_only=False):
+        prefix = _escape_like(text.strip()) + '%'
+        sql = ("SELECT member_id, name FROM members WHERE (member_id LIKE ?1 ESCAPE '\\' OR name LIKE ?1 ESCAPE '\\' "
+               "OR name LIKE '% ' || ?1 ESCAPE '\\')")
+        if borrowers_only:
+            sql += " AND member_id IN (SELECT member_id FROM loans)"
+        return self.conn.execute(sql + " ORDER BY member_id LIMIT ?2", (prefix, limit)).fetchall()
+
+    def issue_book(self, book_id, member_id):
+        with self.transaction() as conn:
+            member = conn.execute("SELECT name FROM members WHERE member_id = ?", (member_id,)).fetchone()
+            if member is None:
+                raise ValueError("Member not found")
+            if conn.execute("SELECT COUNT(*) FROM loans WHERE member_id = ?", (member_id,)).fetchone()[0] >= 3:
+                raise ValueError("Maximum book limit reached (3 books)")
+            book = conn.execute("SELECT title, status FROM books WHERE book_id = ?", (book_id,)).fetchone()
+            if book is None:
+                raise ValueError("Book not found")
+            if book[1] != 'Available':
+                raise ValueError("Book not available")
+
+            issue_date = datetime.now()
+            conn.execute("INSERT INTO loans VALUES (?, ?, ?, ?)", (
+                book_id, member_id, issue_date.strftime(DATE_FORMAT),
+                (issue_date + timedelta(days=14)).strftime(DATE_FORMAT)))
+            conn.execute("UPDATE books SET status = 'Issued', issued_to = ? WHERE book_id = ?", (member_id, book_id))
+
+        return f"Book '{book[0]}' issued to {member[0]}"
+
+    def return_book(self, book_id, member_id):
+        with self.transaction() as conn:
+            if conn.execute("SELECT 1 FROM loans WHERE member_id = ?", (member_id,)).fetchone() is None:
+                raise ValueError("No books issued to this member")
+            loan = conn.execute(
+                "SELECT issue_date FROM loans WHERE book_id = ? AND member_id = ?", (book_id, member_id)).fetchone()
+            if loan is None:
+                raise ValueError("Book not issued to this member")
+
+            days_overdue = (datetime.now() - datetime.strptime(loan[0], DATE_FORMAT)).days - 14
+            late_fee = max(0, days_overdue) * 1.0
+            conn.execute("DELETE FROM loans WHERE book_id = ?", (book_id,))
+            conn.execute("UPDATE books SET status = 'Available', issued_to = NULL WHERE book_id = ?", (book_id,))
+
+        return f"Book returned. Late fee: ${late_fee:.2f}" if late_fee > 0 else "Book returned on time"
+
+    def _next_id(self, conn, table, key):
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        new_id = str(count + 1).zfill(4)
+        while conn.execute(f"SELECT 1 FROM {table} WHERE {key} = ?", (new_id,)).fetchone() is not None:
+            count += 1
+            new_id = str(count + 1).zfill(4)
+        return new_id
+
+    def _new_ids(self, conn, table, key, count):
+        # The next count free ids after the table's size, as _next_id picks them one at a time
+        ids = []
+        number = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        while len(ids) < count:
+            number += 1
+            if conn.execute(f"SELECT 1 FROM {table} WHERE {key} = ?", (str(number).zfill(4),)).fetchone() is None:
+                ids.append(str(number).zfill(4))
+        return ids
+
+    def add_book(self, title, author, category, isbn):
+        self._vocabulary = None
+        with self.transaction() as conn:
+            book_id = self._next_id(conn, 'books', 'book_id')
+            conn.execute("INSERT INTO books VALUES (?, ?, ?, ?, ?, 'Available', NULL)",
+                         (book_id, title, author, category, isbn))
+        return book_id
+
+    def bulk_add_books(self, rows):
+        """Add many books in one transaction; rows are (title, author, category, isbn) or mappings."""
+        books = []
+        for i, row in enumerate(rows, 1):
+            if not isinstance(row, dict):
+                row = dict(zip(('title', 'author', 'category', 'isbn'), row))
+            book = tuple(str(row.get(field) or '').strip() for field in ('title', 'author', 'category', 'isbn'))
+            if not all(book):
+                raise ValueError(f"Row {i}: missing fields")
+            if book[2] not in self.categories:
+                raise ValueError(f"Row {i}: unknown category '{book[2]}'")
+            books.append(book)
+
+        self._vocabulary = None
+        with self.transaction() as conn:
+            book_ids = self._new_ids(conn, 'books', 'book_id', len(books))
+            conn.executemany("INSERT INTO books VALUES (?, ?, ?, ?, ?, 'Available', NULL)",
+                             ((book_id,) + book for book_id, book in zip(book_ids, books)))
+        return book_ids
+
+    def delete_book(self, book_id):
+        self._vocabulary = None
+        with self.transaction() as conn:
+            book = conn.execute("SELECT title, status FROM books WHERE book_id = ?", (book_id,)).fetchone()
+            if book is None:
+                raise ValueError("Book not found")
+            if book[1] == 'Issued' or conn.execute(
+                    "SELECT 1 FROM loans WHERE book_id = ?", (book_id,)).fetchone() is not None:
+                raise ValueError("Cannot delete book that is currently issued")
+            conn.execute("DELETE FROM books WHERE book_id = ?", (book_id,))
+        return f"Book '{book[0]}' has been deleted from the library"
+
+    def add_member(self, name, email, phone):
+        with self.transaction() as conn:
+            member_id = self._next_id(conn, 'members', 'member_id')
+            conn.execute("INSERT INTO members VALUES (?, ?, ?, ?, ?)",
+                         (member_id, name, email, phone, datetime.now().strftime('%Y-%m-%d')))
+        return member_id
+
+    def delete_member(self, member_id):
+        with self.transaction() as conn:
+            member = conn.execute("SELECT name FROM members WHERE member_id = ?", (member_id,)).fetchone()
+            if member is None:
+                raise ValueError("Member not found")
+            if conn.execute("SELECT 1 FROM loans WHERE member_id = ?", (member_id,)).fetchone() is not None:
+                raise ValueError("Cannot delete member who has books currently issued")
+            conn.execute("DELETE FROM members WHERE member_id = ?", (member_id,))
+        return f"Member '{member[0]}' has been deleted from the library"
+
+    def bulk_add_members(self, rows):
+        """Add many members in one transaction and return their ids; rows are (name, email, phone) or mappings."""
+        members = []
+        join_date = datetime.now().strftime('%Y-%m-%d')
+        for i, row in enumerate(rows, 1):
+            if not isinstance(row, dict):
+                row = dict(zip(('name', 'email', 'phone'), row))
+            member = tuple(str(row.get(field) or '').strip() for field in ('name', 'email', 'phone'))
+            missing = [field for field, value in zip(('name', 'email', 'phone'), member) if not value]
+            if missing:
+                raise ValueError(f"Row {i}: missing {', '.join(missing)}")
+            members.append(member + (join_date,))
+
+        with self.transaction() as conn:
+            member_ids = self._new_ids(conn, 'members', 'member_id', len(members))
+            conn.executemany("INSERT INTO members VALUES (?, ?, ?, ?, ?)",
+                             ((member_id,) + member for member_id, member in zip(member_ids, members)))
+        return member_ids
+
+    def bulk_issue(self, pairs):
+        """Issue many (book_id, member_id) pairs in one transaction; all of them or none are issued."""
+        pairs = list(pairs)
+        issue_date = datetime.now()
+        loan_dates = (issue_date.strftime(DATE_FORMAT), (issue_date + timedelta(days=14)).strftime(DATE_FORMAT))
+        with self.transaction() as conn:
+            batch_counts = {}
+            batch_books = set()
+            for i, (book_id, member_id) in enumerate(pairs, 1):
+                if conn.execute("SELECT 1 FROM members WHERE member_id = ?", (member_id,)).fetchone() is None:
+                    raise ValueError(f"Row {i}: Member not found")
+                if member_id not in batch_counts:
+                    batch_counts[member_id] = conn.execute(
+                        "SELECT COUNT(*) FROM loans WHERE member_id = ?", (member_id,)).fetchone()[0]
+                batch_counts[member_id] += 1
+                if batch_counts[member_id] > 3:
+                    raise ValueError(f"Row {i}: Maximum book limit reached (3 books)")
+                book = conn.execute("SELECT status FROM books WHERE book_id = ?", (book_id,)).fetchone()
+                if book is None:
+                    raise ValueError(f"Row {i}: Book not found")
+                if book[0] != 'Available' or book_id in batch_books:
+                    raise ValueError(f"Row {i}: Book not available")
+                batch_books.add(book_id)
+
+            conn.executemany("INSERT INTO loans VALUES (?, ?, ?, ?)",
+                             ((book_id, member_id) + loan_dates for book_id, member_id in pairs))
+            conn.executemany("UPDATE books SET status = 'Issued', issued_to = ? WHERE book_id = ?",
+                             ((member_id, book_id) for book_id, member_id in pairs))
+        return len(pairs)
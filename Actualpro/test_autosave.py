@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test the background autosave writer
+"""
+
+import json
+import os
+import tempfile
+
+from autosave import AutoSaver
+from library_core import LibraryManagementSystem
+
+def test_autosave_coalesces_and_flushes(tmp_path):
+    """A burst of requests becomes one save, and close() writes anything still pending"""
+    print("🧪 Testing autosave...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    lms = LibraryManagementSystem(data_file=data_file)
+    saver = AutoSaver(lms, interval=0.2)
+    for i in range(20):
+        lms.add_book(f"Autosave Book {i}", "Author", "Fiction", str(i))
+        saver.request()
+    assert saver.stats()['queue_depth'] == 20
+    assert not os.path.exists(data_file), "nothing is written before the debounce interval"
+    assert saver.flush(timeout=5)
+    stats = saver.stats()
+    assert stats['saves'] == 1 and stats['coalesced'] == 19 and stats['queue_depth'] == 0
+    with open(data_file) as f:
+        assert len(json.load(f)['books']) == 20
+    print(f"✅ 20 changes saved once in {stats['last_latency_ms']} ms")
+
+    lms.add_member("Late Member", "late@test.com", "555")
+    saver.request()
+    assert saver.close(timeout=5)
+    assert len(LibraryManagementSystem(data_file=data_file).members) == 1
+    print("✅ Pending change written on close")
+
+    def failing_save():
+        raise OSError("disk full")
+    saver = AutoSaver(lms, interval=0.2)
+    lms.save_data = failing_save
+    lms.add_member("Unsaved Member", "unsaved@test.com", "555")
+    saver.request()
+    assert not saver.close(timeout=5)
+    stats = saver.stats()
+    assert stats['queue_depth'] == 1 and stats['last_error'] == "disk full"
+    print("✅ A failed final save is reported by close()")
+
+def test_autosave_during_mutations(tmp_path):
+    """Saves on the writer thread see consistent data while the main thread keeps mutating"""
+    print("🧪 Testing autosave under concurrent changes...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    lms = LibraryManagementSystem(data_file=data_file)
+    member_id = lms.add_member("Busy Reader", "busy@test.com", "555")
+    saver = AutoSaver(lms, interval=0, max_delay=0)
+    book_ids = []
+    for i in range(500):
+        book_ids.append(lms.add_book(f"Busy Book {i}", "Author", "Science", str(i)))
+        if i % 100 == 0:
+            lms.issue_book(book_ids[-1], member_id)
+        elif i % 100 == 50:
+            lms.return_book(book_ids[-51], member_id)
+        saver.request()
+    assert saver.close(timeout=10)
+    stats = saver.stats()
+    assert stats['errors'] == 0, stats['last_error']
+    reloaded = LibraryManagementSystem(data_file=data_file)
+    assert len(reloaded.books) == 500
+    assert reloaded.loans_by_book.keys() == lms.loans_by_book.keys()
+    assert not os.path.exists(data_file + '.tmp')
+    print(f"✅ {stats['saves']} background saves, max latency {stats['max_latency_ms']} ms")
+
+if __name__ == "__main__":
+    for test in (test_autosave_coalesces_and_flushes, test_autosave_during_mutations):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test the synthetic library generator and the benchmark baseline check
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from benchmark import compare, generate_library, run_size, write_library
+from library_core import LibraryManagementSystem
+
+def test_generator(tmp_path):
+    """The same seed gives the same library, and the loans respect the library rules"""
+    print("🧪 Testing the synthetic library generator...")
+
+    as_of = datetime(2024, 6, 1)
+    data = generate_library(2000, seed=7, as_of=as_of)
+    assert data == generate_library(2000, seed=7, as_of=as_of)
+    assert data != generate_library(2000, seed=8, as_of=as_of)
+    assert len(data['books']) == 2000 and len(data['members']) == 200
+    assert sum(len(loans) for loans in data['issued_books'].values()) == 400
+    assert max(len(loans) for loans in data['issued_books'].values()) <= 3
+    print("✅ Deterministic, 3 loans per member at most")
+
+    data_file = write_library(os.path.join(tmp_path, 'library_data.json'), 2000, seed=7, as_of=as_of)
+    lms = LibraryManagementSystem(data_file=data_file)
+    overdue = lms.get_overdue_books(as_of)
+    assert 0 < len(overdue) < 400
+    assert all(lms.books[issued['book_id']]['status'] == 'Issued' for issued in overdue)
+    print(f"✅ Loads cleanly with {len(overdue)} of 400 loans overdue")
+
+    try:
+        generate_library(10, members=1, loans=5)
+        assert False, "more loans than members can hold should fail"
+    except ValueError as e:
+        print(f"✅ Expected error: {e}")
+
+def test_run_and_compare(tmp_path):
+    """Every case is timed, and only real slowdowns count as regressions"""
+    print("🧪 Testing a benchmark run...")
+
+    results = run_size(1000, tmp_path, ops=20)
+    assert set(results) == {'load_data', 'save_data', 'search_books_recursive', 'get_overdue_books',
+                            'calculate_total_late_fees', 'issue_book', 'return_book', 'ui_load_data',
+                            'ui_apply_changes', 'ui_virtual_refresh', 'delete_book'}
+    assert results['issue_book']['ops'] == 20 and results['ui_apply_changes']['ops'] == 40
+    json.dumps(results)
+    print("✅ All cases timed")
+
+    baseline = {'results': {'1k': {'load_data': {'ms': 10.0, 'ops': 1}, 'issue_book': {'ms': 0.01, 'ops': 20}}}}
+    current = {'results': {'1k': {'load_data': {'ms': 20.0, 'ops': 1}, 'issue_book': {'ms': 0.03, 'ops': 20},
+                                  'new_case': {'ms': 5.0, 'ops': 1}}}}
+    assert compare(current, baseline) == [('1k', 'load_data', 10.0, 20.0)]
+    assert compare(current, baseline, tolerance=1.5) == []
+    print("✅ Slowdowns beyond the tolerance reported, sub-0.05 ms noise ignored")
+
+if __name__ == "__main__":
+    for test in (test_generator, test_run_and_compare):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test the memory-mapped binary snapshot format
+"""
+
+import json
+import os
+import tempfile
+import time
+
+import binary_snapshot
+from benchmark import write_library
+from library_core import LibraryManagementSystem
+
+def new_library(directory, **options):
+    data_file = os.path.join(tempfile.mkdtemp(dir=directory), 'library_data.json')
+    return LibraryManagementSystem(data_file=data_file, snapshot='binary', **options)
+
+def test_round_trip(tmp_path):
+    """Books, members and loans saved as a snapshot read back the same"""
+    print("🧪 Testing a snapshot round trip...")
+
+    lms = new_library(tmp_path)
+    dune = lms.add_book("Dune", "Frank Herbert", "Fiction", "123")
+    lms.add_book("Café Ünïcode", "Zoë", "History", "456")
+    paul = lms.add_member("Paul", "paul@test.com", "555")
+    lms.issue_book(dune, paul)
+    lms.save_data()
+    assert os.path.exists(lms.snapshot_file) and not os.path.exists(lms.data_file)
+
+    reopened = LibraryManagementSystem(data_file=lms.data_file, snapshot='binary')
+    assert isinstance(reopened.books, binary_snapshot.Overlay)
+    assert dict(reopened.books.items()) == dict(lms.books.items())
+    assert dict(reopened.members.items()) == dict(lms.members.items())
+    assert [(loan.book_id, loan.due_ts) for loan in reopened.issued_books[paul]] == \
+        [(loan.book_id, loan.due_ts) for loan in lms.issued_books[paul]]
+    assert reopened.loans_by_book[dune][0] == paul
+    assert reopened.search_books("café") == ['0002']
+    print("✅ Records, loans and searches match after reopening")
+
+def test_lazy_access(tmp_path):
+    """Opening a snapshot decodes nothing until a record is read"""
+    print("🧪 Testing lazy record decoding...")
+
+    lms = new_library(tmp_path)
+    lms.bulk_add_books([(f"Lazy Book {i}", "Author", "Fiction", str(i)) for i in range(500)])
+    lms.save_data()
+
+    reopened = LibraryManagementSystem(data_file=lms.data_file, snapshot='binary')
+    assert reopened.search_index is None and not reopened.books._records
+    assert reopened.books['0250']['title'] == "Lazy Book 249"
+    assert '0501' not in reopened.books and len(reopened.books) == 500
+    assert list(reopened.books._records) == ['0250']
+    print("✅ One lookup decoded one record")
+
+    assert reopened.search_books("249") == ['0250']
+    assert reopened.search_index is not None and len(reopened.books._records) == 1
+    print("✅ First search built the index without keeping the records")
+
+def test_changes_persist(tmp_path):
+    """Issue, return, add and delete on a mapped library are saved into the next snapshot"""
+    print("🧪 Testing changes on top of a snapshot...")
+
+    lms = new_library(tmp_path)
+    lms.bulk_add_books([(f"Book {i}", "Author", "Science", str(i)) for i in range(20)])
+    lms.bulk_add_members([(f"Member {i}", f"m{i}@test.com", "555") for i in range(3)])
+    lms.save_data()
+
+    lms = LibraryManagementSystem(data_file=lms.data_file, snapshot='binary')
+    lms.issue_book('0001', '0001')
+    lms.issue_book('0002', '0001')
+    lms.return_book('0002', '0001')
+    lms.delete_book('0005')
+    new_book = lms.add_book("Added Later", "Author", "Fiction", "99")
+    assert lms.search_books("added") == [new_book]
+    lms.save_data()
+
+    reopened = LibraryManagementSystem(data_file=lms.data_file, snapshot='binary')
+    assert reopened.books['0001']['status'] == 'Issued' and reopened.books['0002']['status'] == 'Available'
+    assert '0005' not in reopened.books and reopened.books[new_book]['title'] == "Added Later"
+    assert [loan.book_id for loan in reopened.issued_books['0001']] == ['0001']
+    assert len(reopened.books) == 20
+    print("✅ Issue, return, delete and add survived the reopen")
+
+def test_journal_and_json(tmp_path):
+    """Journal replay works on top of a snapshot, and a newer JSON file takes precedence"""
+    print("🧪 Testing the journal and the JSON fallback...")
+
+    lms = new_library(tmp_path, journal=True)
+    lms.add_book("Journaled", "Author", "Fiction", "1")
+    lms.compact(background=False)
+    lms.add_member("After Compaction", "a@test.com", "555")
+    lms.close()
+
+    reopened = LibraryManagementSystem(data_file=lms.data_file, journal=True, snapshot='binary')
+    assert reopened.books['0001']['title'] == "Journaled" and len(reopened.members) == 1
+    reopened.close()
+    print("✅ The snapshot plus the journal replay hold every change")
+
+    data_file = write_library(os.path.join(tmp_path, 'library_data.json'), 30)
+    converted = LibraryManagementSystem(data_file=data_file, snapshot='binary')
+    assert len(converted.books) == 30 and not isinstance(converted.books, binary_snapshot.Overlay)
+    converted.save_data()
+    assert binary_snapshot.main([data_file, os.path.join(os.path.dirname(data_file), 'copy.lmsnap')]) == 0
+    print("✅ A JSON data file is read and then saved as a snapshot")
+
+    for options in ({'snapshot': 'xml'}, {'snapshot': 'binary', 'layout': 'columnar'},
+                    {'snapshot': 'binary', 'shared': True}):
+        try:
+            LibraryManagementSystem(data_file=data_file, **options)
+            assert False, options
+        except ValueError:
+            pass
+    with open(converted.snapshot_file, 'r+b') as f:
+        f.write(b'NOTASNAP')
+    try:
+        binary_snapshot.Snapshot(converted.snapshot_file)
+        assert False
+    except ValueError as e:
+        assert "not a library snapshot" in str(e)
+    print("✅ Unknown formats, unsupported combinations and foreign files are rejected")
+
+def test_save_while_mapped(tmp_path):
+    """A save closes the mapping before replacing the file and moves the overlays onto the new one"""
+    print("🧪 Testing a save over the mapped snapshot...")
+
+    lms = new_library(tmp_path)
+    lms.bulk_add_books([(f"Mapped Book {i}", "Author", "Science", str(i)) for i in range(10)])
+    lms.save_data()
+    lms = LibraryManagementSystem(data_file=lms.data_file, snapshot='binary')
+    old = lms._mapped
+    added = lms.add_book("Before the copy", "Author", "Fiction", "a")
+    lms.delete_book('0001')
+    lms.books['0002']['status'] = 'Lost'
+
+    real_replace, closed = os.replace, []
+    def replace(source, target):
+        closed.append(old._map.closed)
+        real_replace(source, target)
+    data = lms._snapshot()
+    # Changes made while the snapshot is being written are kept on top of it
+    later = lms.add_book("After the copy", "Author", "Fiction", "b")
+    lms.delete_book(added)
+    lms.delete_book('0003')
+    # What a save does on Windows, where a mapped file cannot be replaced
+    os.replace, binary_snapshot.UNMAP_BEFORE_REPLACE = replace, True
+    try:
+        lms._write_snapshot(data)
+    finally:
+        os.replace, binary_snapshot.UNMAP_BEFORE_REPLACE = real_replace, os.name == 'nt'
+    assert closed == [True] and lms._mapped is not old and lms.books.base is lms._mapped.books
+    assert added not in lms.books and later in lms.books and '0001' not in lms.books and '0003' not in lms.books
+    assert len(lms.books) == 9 and sorted(lms.books) == sorted(lms.books.keys())
+    assert lms.books['0002']['status'] == 'Lost' and lms.books['0004']['title'] == "Mapped Book 3"
+    print("✅ Old mapping closed before the rename; later changes still on top")
+
+    lms.save_data()
+    reopened = LibraryManagementSystem(data_file=lms.data_file, snapshot='binary')
+    assert dict(reopened.books.items()) == dict(lms.books.items())
+    print("✅ The next save holds every change")
+
+def test_unreadable_files(tmp_path):
+    """A damaged snapshot, or one newer than the JSON file, is never replaced by an empty library"""
+    print("🧪 Testing damaged and newer snapshots...")
+
+    lms = new_library(tmp_path)
+    lms.bulk_add_books([(f"Kept Book {i}", "Author", "History", str(i)) for i in range(100)])
+    lms.save_data()
+    with open(lms.snapshot_file, 'r+b') as f:
+        f.seek(binary_snapshot.HEADER.size)
+        f.write(b'{broken')
+    with open(lms.snapshot_file, 'rb') as f:
+        damaged = f.read()
+    try:
+        LibraryManagementSystem(data_file=lms.data_file, snapshot='binary')
+        assert False, "a damaged snapshot should not load as an empty library"
+    except ValueError as e:
+        assert str(e).startswith(f"Cannot load {lms.snapshot_file}")
+    with open(lms.snapshot_file, 'rb') as f:
+        assert f.read() == damaged
+    print("✅ A damaged snapshot raises instead of loading empty")
+
+    data_file = write_library(os.path.join(tmp_path, 'library_data.json'), 10)
+    binary_snapshot.main([data_file])
+    try:
+        LibraryManagementSystem(data_file=data_file)
+        assert False, "the newer snapshot should not be ignored"
+    except ValueError as e:
+        assert "is newer than" in str(e) and "snapshot='binary'" in str(e)
+    os.remove(binary_snapshot.snapshot_path(data_file))
+    assert len(LibraryManagementSystem(data_file=data_file).books) == 10
+    print("✅ JSON mode refuses a newer binary snapshot")
+
+def test_startup_time(tmp_path):
+    """Opening a large snapshot, compared with parsing the same library from JSON"""
+    print("🧪 Timing startup on 100,000 books...")
+
+    data_file = write_library(os.path.join(tmp_path, 'library_data.json'), 100000)
+    start = time.perf_counter()
+    LibraryManagementSystem(data_file=data_file)
+    json_seconds = time.perf_counter() - start
+    with open(data_file) as f:
+        snapshot_file = binary_snapshot.snapshot_path(data_file)
+        binary_snapshot.write_snapshot(snapshot_file, json.load(f))
+
+    start = time.perf_counter()
+    lms = LibraryManagementSystem(data_file=data_file, snapshot='binary')
+    title = lms.books['50000']['title']
+    binary_seconds = time.perf_counter() - start
+    assert title and binary_seconds < json_seconds
+    print(f"✅ JSON: {json_seconds * 1000:.0f} ms; binary: {binary_seconds * 1000:.0f} ms "
+          f"({os.path.getsize(snapshot_file) / 1e6:.1f} MB mapped)")
+
+if __name__ == "__main__":
+    for test in (test_round_trip, test_lazy_access, test_changes_persist, test_journal_and_json,
+                 test_save_while_mapped, test_unreadable_files, test_startup_time):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test transactions and bulk add/issue
+"""
+
+import os
+import tempfile
+import time
+
+from library_core import LibraryManagementSystem
+
+def new_library(directory, **options):
+    directory = tempfile.mkdtemp(dir=directory)
+    return LibraryManagementSystem(data_file=os.path.join(directory, 'library_data.json'), **options)
+
+def test_transaction_rollback(tmp_path):
+    """A failing transaction leaves books, loans and indexes untouched"""
+    print("🧪 Testing transaction rollback...")
+
+    lms = new_library(tmp_path)
+    book_id = lms.add_book("Kept Book", "Author", "Fiction", "1")
+    member_id = lms.add_member("Reader", "reader@test.com", "555")
+    try:
+        with lms.transaction():
+            lms.add_book("Rolled Back", "Author", "Science", "2")
+            lms.issue_book(book_id, member_id)
+            lms.delete_member(lms.add_member("Temp", "temp@test.com", "555"))
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert list(lms.books) == [book_id] and list(lms.members) == [member_id]
+    assert lms.books[book_id]['status'] == 'Available' and not lms.loans_by_book
+    assert lms.search_books("rolled") == [] and len(lms.due_index) == 0
+    assert not os.path.exists(lms.data_file)
+    print("✅ Changes rolled back and nothing saved")
+
+    with lms.transaction():
+        lms.issue_book(book_id, member_id)
+        with lms.transaction():
+            lms.add_book("Nested", "Author", "History", "3")
+        assert not os.path.exists(lms.data_file), "save is deferred to the outer commit"
+    reloaded = LibraryManagementSystem(data_file=lms.data_file)
+    assert reloaded.books[book_id]['status'] == 'Issued' and len(reloaded.books) == 2
+    print("✅ Nested transaction committed once")
+
+    fuzzy_add, added = lms.fuzzy_index.add, []
+    def failing_add(book_id, book):
+        if len(added) == 2:
+            raise MemoryError("fuzzy index full")
+        fuzzy_add(book_id, book)
+        added.append(book_id)
+    lms.fuzzy_index.add = failing_add
+    try:
+        lms.bulk_add_books([(f"Partway {i}", "Halfway", "Science", str(i)) for i in range(4)])
+        assert False, "the batch should fail"
+    except MemoryError:
+        pass
+    lms.fuzzy_index.add = fuzzy_add
+    assert len(lms.books) == 2 and lms.search_books("partway") == [] and lms.fuzzy_search("halfway") == []
+    assert 'partway' not in lms.search_index.postings and 'halfway' not in lms.fuzzy_index.word_postings
+    assert len(lms.search_books("nested")) == 1
+    print("✅ A batch that failed while indexing was taken back out of the table and indexes")
+
+def test_bulk_operations(tmp_path):
+    """Bulk methods validate every row first and match the single-item results"""
+    print("🧪 Testing bulk operations...")
+
+    lms = new_library(tmp_path, journal=True)
+    try:
+        lms.bulk_add_books([("Good", "Author", "Fiction", "1"), ("Bad", "Author", "Cooking", "2")])
+        assert False, "unknown category should be rejected"
+    except ValueError as e:
+        assert str(e).startswith("Row 2")
+    assert not lms.books
+    print("✅ Invalid batch rejected before any change")
+
+    book_ids = lms.bulk_add_books([("Bulk Book %d" % i, "Bulk Author", "Science", str(i)) for i in range(6)])
+    member_ids = lms.bulk_add_members([{'name': "Bulk Reader", 'email': "bulk@test.com", 'phone': "555"}])
+    try:
+        lms.bulk_issue([(book_id, member_ids[0]) for book_id in book_ids[:4]])
+        assert False, "the 3-book limit counts the whole batch"
+    except ValueError as e:
+        assert str(e) == "Row 4: Maximum book limit reached (3 books)"
+    assert lms.bulk_issue([(book_id, member_ids[0]) for book_id in book_ids[:3]]) == 3
+    assert lms.search_books("bulk book") == book_ids
+    assert [issued['book_id'] for issued in lms.issued_books[member_ids[0]]] == book_ids[:3]
+    lms.close()
+
+    reloaded = LibraryManagementSystem(data_file=lms.data_file, journal=True)
+    assert reloaded.books[book_ids[0]]['issued_to'] == member_ids[0]
+    assert len(reloaded.books) == 6 and len(reloaded.due_index) == 3
+    reloaded.close()
+    print("✅ Bulk add and issue journaled and replayed")
+
+def test_bulk_speed(tmp_path):
+    """bulk_add_books beats add_book + save_data per row by at least 10x"""
+    print("🧪 Timing 500 books...")
+
+    rows = [(f"Speed Book {i}", f"Author {i % 50}", "Technology", str(i)) for i in range(500)]
+    lms = new_library(tmp_path)
+    start = time.perf_counter()
+    for row in rows:
+        lms.add_book(*row)
+        lms.save_data()
+    loop_time = time.perf_counter() - start
+
+    lms = new_library(tmp_path)
+    start = time.perf_counter()
+    lms.bulk_add_books(rows)
+    bulk_time = time.perf_counter() - start
+    print(f"✅ loop {loop_time * 1000:.0f} ms, bulk {bulk_time * 1000:.0f} ms ({loop_time / bulk_time:.0f}x)")
+    assert loop_time > 10 * bulk_time
+
+if __name__ == "__main__":
+    for test in (test_transaction_rollback, test_bulk_operations, test_bulk_speed):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
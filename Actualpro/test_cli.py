@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the headless engine module and the library-cli commands
+"""
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import library_cli
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def run(data_file, *argv):
+    """(exit code, stdout) of library_cli.main with --json output."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        code = library_cli.main(['--data-file', data_file, '--json', *argv])
+    return code, json.loads(out.getvalue())
+
+def test_no_tkinter():
+    """Importing library_core or library_cli does not load tkinter"""
+    print("🧪 Testing the engine imports without Tk...")
+
+    for module in ('library_core', 'library_cli'):
+        result = subprocess.run([sys.executable, '-c', f"import sys, {module}; print('tkinter' in sys.modules)"],
+                                cwd=HERE, capture_output=True, text=True)
+        assert result.stdout.strip() == 'False', result.stdout + result.stderr
+    result = subprocess.run([sys.executable, '-c', "import library, library_core; "
+                             "print(library.LibraryManagementSystem is library_core.LibraryManagementSystem)"],
+                            cwd=HERE, capture_output=True, text=True)
+    assert result.stdout.strip() == 'True', result.stderr
+    print("✅ tkinter stays unloaded; library still re-exports the engine")
+
+def test_commands(tmp_path):
+    """Add, issue, search, fees, overdue, return and report from the command line"""
+    print("🧪 Testing library-cli commands...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    assert run(data_file, 'add-book', "Dune", "Frank Herbert", "Fiction", "123") == (0, {'book_id': '0001'})
+    assert run(data_file, 'add-member', "Paul", "paul@test.com", "555") == (0, {'member_id': '0001'})
+    code, message = run(data_file, 'issue', '0001', '0001')
+    assert code == 0 and "issued to Paul" in message
+    code, error = run(data_file, 'issue', '0001', '0001')
+    assert code == 1 and error == {'error': "Book not available"}
+    code, error = run(data_file, 'add-book', "Bread", "Baker", "Cookery", "9")
+    assert code == 1 and "Unknown category" in error['error']
+
+    code, books = run(data_file, 'search', 'dune')
+    assert [book['book_id'] for book in books] == ['0001'] and books[0]['status'] == 'Issued'
+    code, fees = run(data_file, 'fees', '--as-of', '2099-01-01')
+    assert fees['overdue_loans'] == 1 and fees['total_fees'] > 0
+    code, loans = run(data_file, 'overdue', '--as-of', '2099-01-01')
+    assert [loan['member_name'] for loan in loans] == ["Paul"]
+    report_file = os.path.join(tmp_path, 'overdue.csv')
+    code, result = run(data_file, 'report', 'overdue', report_file, '--as-of', '2099-01-01')
+    assert code == 0 and result['rows'] == 1 and os.path.exists(report_file)
+    print("✅ Each command read the changes saved by the one before")
+
+    assert run(data_file, 'return', '0001', '0001') == (0, "Book returned on time")
+    assert run(data_file, 'stats') == (0, {'books': 1, 'members': 1, 'loans': 0, 'overdue_loans': 0})
+    print("✅ Return saved; stats agree")
+
+    with open(data_file) as f:
+        saved = f.read()
+    with open(data_file, 'w') as f:
+        f.write(saved[:len(saved) // 2])
+    code, error = run(data_file, 'add-book', "Emma", "Austen", "Fiction", "456")
+    assert code == 1 and error['error'].startswith(f"Cannot open {data_file}")
+    with open(data_file) as f:
+        assert f.read() == saved[:len(saved) // 2]
+    print("✅ A corrupt data file is reported and left as it was")
+
+def test_startup_time(tmp_path):
+    """A command in a fresh process, compared with importing the GUI module"""
+    print("🧪 Timing library-cli startup...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+
+    def timed(*command):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *command], cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+        return (time.perf_counter() - start) * 1000
+    cli = min(timed('library_cli.py', '--data-file', data_file, 'stats') for _ in range(3))
+    gui = min(timed('-c', 'import library') for _ in range(3))
+    print(f"✅ library-cli stats: {cli:.0f} ms; importing library.py with Tk: {gui:.0f} ms")
+
+if __name__ == "__main__":
+    test_no_tkinter()
+    for test in (test_commands, test_startup_time):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
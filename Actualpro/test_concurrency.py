@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test one LibraryManagementSystem shared by many threads
+"""
+
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from library_core import LibraryManagementSystem
+from locks import LibraryLock
+
+def new_library(directory, books=20, members=12):
+    lms = LibraryManagementSystem(data_file=os.path.join(directory, 'library_data.json'))
+    book_ids = lms.bulk_add_books([(f"Stress Book {i}", "Author", "Fiction", str(i)) for i in range(books)])
+    member_ids = lms.bulk_add_members([(f"Member {i}", f"m{i}@test.com", "555") for i in range(members)])
+    return lms, book_ids, member_ids
+
+def run_threads(targets, seconds):
+    stop = threading.Event()
+    errors = []
+
+    def guard(target):
+        try:
+            target(stop)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=guard, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return errors
+
+def check_consistent(lms):
+    loans = [(member_id, loan.book_id) for member_id, issued in lms.issued_books.items() for loan in issued]
+    assert len(loans) == len({book_id for _, book_id in loans}), "a book is on two loans"
+    assert all(len(issued) <= 3 for issued in lms.issued_books.values())
+    assert len(loans) == len(lms.loans_by_book) == len(lms.get_overdue_books(as_of=datetime(2100, 1, 1)))
+    for member_id, book_id in loans:
+        assert lms.loans_by_book[book_id][0] == member_id
+        assert lms.books[book_id]['status'] == 'Issued' and lms.books[book_id]['issued_to'] == member_id
+    issued_ids = {book_id for _, book_id in loans}
+    assert all(book['status'] == 'Available' for book_id, book in lms.books.items() if book_id not in issued_ids)
+
+def test_no_double_issue(tmp_path):
+    """Desk threads racing to issue and return the same few books never double-issue one"""
+    print("🧪 Testing 8 desk threads issuing the same books...")
+
+    lms, book_ids, member_ids = new_library(tmp_path, books=6)
+    issued = {}
+    issued_lock = threading.Lock()
+
+    def desk(stop):
+        rng = random.Random()
+        while not stop.is_set():
+            book_id, member_id = rng.choice(book_ids), rng.choice(member_ids)
+            try:
+                lms.issue_book(book_id, member_id)
+            except ValueError:
+                pass
+            else:
+                with issued_lock:
+                    assert book_id not in issued, f"{book_id} issued twice"
+                    issued[book_id] = member_id
+                # Give the other desks a chance to try the same book
+                time.sleep(0)
+                with issued_lock:
+                    assert issued.pop(book_id) == member_id
+                lms.return_book(book_id, member_id)
+
+    def reader(stop):
+        while not stop.is_set():
+            lms.search_books("stress book")
+            lms.get_overdue_books()
+            lms.complete_books("stress")
+
+    errors = run_threads([desk] * 8 + [reader] * 2, 1.5)
+    assert not errors, errors
+    check_consistent(lms)
+    print("✅ No book was issued twice and the loan indexes agree")
+
+def test_member_limit(tmp_path):
+    """Threads issuing to one member at once stop at the three-book limit"""
+    print("🧪 Testing the loan limit under contention...")
+
+    lms, book_ids, member_ids = new_library(tmp_path, books=16)
+    results = []
+    barrier = threading.Barrier(16)
+
+    def issue(book_id):
+        barrier.wait()
+        try:
+            results.append(lms.issue_book(book_id, member_ids[0]))
+        except ValueError as e:
+            results.append(e)
+    threads = [threading.Thread(target=issue, args=(book_id,)) for book_id in book_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(isinstance(result, str) for result in results) == 3
+    assert len(lms.issued_books[member_ids[0]]) == 3
+    check_consistent(lms)
+    print("✅ Exactly three of sixteen issues went through")
+
+def test_reads_during_writes(tmp_path):
+    """Lock-free searches see whole changes only and keep going while a transaction runs"""
+    print("🧪 Testing reads alongside writers...")
+
+    lms, book_ids, member_ids = new_library(tmp_path, books=200)
+    counts = [0, 0]
+
+    def writer(stop):
+        i = 0
+        while not stop.is_set():
+            book_id = lms.add_book(f"Stress Extra {i}", "Author", "Science", f"x{i}")
+            lms.delete_book(book_id)
+            i += 1
+
+    def searcher(stop):
+        while not stop.is_set():
+            found = lms.search_books("stress")
+            assert 200 <= len(found) <= 202, len(found)
+            counts[0] += 1
+
+    def fees(stop):
+        while not stop.is_set():
+            lms.calculate_total_late_fees()
+            lms.fuzzy_search("strss")
+            counts[1] += 1
+
+    errors = run_threads([writer, writer, searcher, fees], 1.0)
+    assert not errors, errors
+    assert len(lms.books) == 200
+    print(f"✅ {counts[0]} searches and {counts[1]} fee/fuzzy reads, none torn")
+
+    with lms.transaction():
+        reader = threading.Thread(target=lambda: counts.append(len(lms.search_books("stress"))))
+        reader.start()
+        reader.join(5)
+        assert not reader.is_alive(), "search blocked by a transaction"
+    print("✅ A search finished while a transaction held the lock")
+
+def test_read_throughput(tmp_path):
+    """Read throughput with 1 and 4 reader threads while a desk keeps issuing"""
+    print("🧪 Measuring read throughput...")
+
+    lms, book_ids, member_ids = new_library(tmp_path, books=2000, members=50)
+    for readers in (1, 4):
+        done = []
+
+        def reader(stop):
+            count = 0
+            while not stop.is_set():
+                lms.search_books("stress book 1")
+                count += 1
+            done.append(count)
+
+        def desk(stop):
+            rng = random.Random(0)
+            while not stop.is_set():
+                book_id, member_id = rng.choice(book_ids), rng.choice(member_ids)
+                try:
+                    lms.issue_book(book_id, member_id)
+                    lms.return_book(book_id, member_id)
+                except ValueError:
+                    pass
+
+        errors = run_threads([reader] * readers + [desk], 0.5)
+        assert not errors, errors
+        print(f"✅ {readers} reader(s): {sum(done) * 2} searches/s")
+    check_consistent(lms)
+
+def test_library_lock():
+    """Shared and exclusive re-entry, and no upgrade from shared to exclusive"""
+    print("🧪 Testing LibraryLock...")
+
+    lock = LibraryLock()
+    with lock:
+        with lock, lock.shared():
+            pass
+    with lock.shared(), lock.shared():
+        try:
+            lock.acquire()
+            assert False, "upgrading a shared hold should fail"
+        except RuntimeError:
+            pass
+    holding, release = threading.Event(), threading.Event()
+
+    def hold_shared():
+        with lock.shared():
+            holding.set()
+            release.wait()
+    with lock.shared():
+        other = threading.Thread(target=hold_shared)
+        other.start()
+        assert holding.wait(5), "a second shared holder had to wait"
+    assert not lock.acquire(blocking=False)
+    release.set()
+    other.join()
+    assert lock.acquire(blocking=False)
+    lock.release()
+    print("✅ Re-entry, upgrade refusal and concurrent shared holds")
+
+if __name__ == "__main__":
+    for test in (test_no_double_issue, test_member_limit, test_reads_during_writes, test_read_throughput):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
+    test_library_lock()
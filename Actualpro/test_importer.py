@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the bulk catalogue importer
+"""
+
+import csv
+import json
+import os
+import tempfile
+
+from importer import import_books, normalize_isbn
+from library_core import LibraryManagementSystem
+
+def make_isbn(n):
+    """A valid ISBN-13 for n"""
+    digits = f"978{n:09d}"
+    check = (10 - sum(int(c) * (3 if i % 2 else 1) for i, c in enumerate(digits)) % 10) % 10
+    return digits + str(check)
+
+def test_isbn_checksum():
+    """ISBN-10 and ISBN-13 checksums, with hyphens and an X check digit"""
+    print("🧪 Testing ISBN validation...")
+
+    assert normalize_isbn("978-0-261-10221-7") == "9780261102217"
+    assert normalize_isbn("0-261-10221-4") == "0261102214"
+    assert normalize_isbn("0-8044-2957-X") == "080442957X"
+    assert normalize_isbn("9780261102218") is None
+    assert normalize_isbn("12345") is None
+    print("✅ Valid ISBNs normalized, bad checksums rejected")
+
+def test_import_formats(tmp_path):
+    """CSV, JSONL and MARC rows are validated, mapped, deduplicated and saved once"""
+    print("🧪 Testing catalogue import...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    lms.add_book("Already Here", "Author", "Fiction", make_isbn(1))
+
+    csv_file = os.path.join(tmp_path, 'books.csv')
+    with open(csv_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Title', 'Author', 'Category', 'ISBN'])
+        writer.writerow(['Dune', 'Frank Herbert', 'science fiction', make_isbn(2)])
+        writer.writerow(['Cosmos', 'Carl Sagan', 'Science', make_isbn(3)])
+        writer.writerow(['Duplicate of existing', 'Author', 'Fiction', make_isbn(1)])
+        writer.writerow(['Duplicate in file', 'Author', 'Fiction', make_isbn(3)])
+        writer.writerow(['', 'No Title', 'Fiction', make_isbn(4)])
+        writer.writerow(['Bad ISBN', 'Author', 'Fiction', '9780000000000'])
+        writer.writerow(['Cookbook', 'Chef', 'Cooking', make_isbn(5)])
+
+    errors_file = os.path.join(tmp_path, 'bad_rows.csv')
+    progress = []
+    report = import_books(lms, csv_file, workers=0, chunk_size=3, errors_file=errors_file, progress=progress.append)
+    assert (report.read, report.imported, report.duplicates, report.bad) == (7, 2, 2, 3)
+    assert [reason for line, reason, raw in report.bad_rows] == [
+        "missing title", "invalid ISBN '9780000000000'", "unknown category 'Cooking'"]
+    assert report.bad_rows[0][0] == 6, "bad rows report their line number"
+    assert len(progress) == 3
+    with open(errors_file) as f:
+        assert len(list(csv.reader(f))) == 4
+    assert [lms.books[book_id]['category'] for book_id in report.book_ids] == ['Fiction', 'Science']
+    print(f"✅ CSV: {report.summary()}")
+
+    jsonl_file = os.path.join(tmp_path, 'books.jsonl')
+    with open(jsonl_file, 'w') as f:
+        f.write(json.dumps({'title': "Neuromancer", 'author': "William Gibson", 'category': "Cooking",
+                            'isbn': make_isbn(6)}) + "\n")
+        f.write("{not json\n")
+    marc_file = os.path.join(tmp_path, 'books.mrk')
+    with open(marc_file, 'w') as f:
+        f.write("=LDR  00000nam  2200000 a 4500\n"
+                f"=020  \\\\$a{make_isbn(7)} (pbk.)\n"
+                "=082  04$a823.912\n"
+                "=100  1\\$aTolkien, J. R. R.,\n"
+                "=245  14$aThe hobbit /$cJ.R.R. Tolkien.\n"
+                "\n"
+                "=020  \\\\$a0-261-10221-4\n"
+                "=100  1\\$aAuthor, Some.\n"
+                "=245  10$aUnclassified\n")
+
+    report = import_books(lms, jsonl_file, workers=2, default_category='Literature')
+    assert (report.imported, report.bad) == (1, 1) and report.bad_rows[0][0] == 2
+    assert lms.books[report.book_ids[0]]['category'] == 'Literature'
+    report = import_books(lms, marc_file, workers=0)
+    assert report.imported == 1 and report.bad_rows[0][1] == "unknown category ''"
+    hobbit = lms.books[report.book_ids[0]]
+    assert (hobbit['title'], hobbit['author'], hobbit['category']) == ("The hobbit", "Tolkien, J. R. R", "Literature")
+    print("✅ JSONL and MARC records imported with category mapping")
+
+    reloaded = LibraryManagementSystem(data_file=lms.data_file)
+    assert len(reloaded.books) == 5 and reloaded.search_books("hobbit") == report.book_ids
+    print("✅ Imported books saved and indexed")
+
+    more_file = os.path.join(tmp_path, 'more.csv')
+    with open(more_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'author', 'category', 'isbn'])
+        for i in range(10, 16):
+            writer.writerow([f"Chunked {i}", 'Author', 'History', make_isbn(i)])
+    def stop_after_second_chunk(report):
+        if report.read == 4:
+            raise KeyboardInterrupt
+    try:
+        import_books(lms, more_file, workers=0, chunk_size=2, progress=stop_after_second_chunk)
+        assert False, "the import should stop"
+    except KeyboardInterrupt:
+        pass
+    reloaded = LibraryManagementSystem(data_file=lms.data_file)
+    assert len(reloaded.books) == 9, "the chunks before the interruption were committed and saved"
+    report = import_books(lms, more_file, workers=0, chunk_size=2)
+    assert (report.imported, report.duplicates) == (2, 4) and len(lms.books) == 11
+    print("✅ Each chunk committed on its own; a rerun skips what was already imported")
+
+def test_import_throughput(tmp_path):
+    """A 20,000-row CSV goes through the process pool at a healthy rate"""
+    print("🧪 Timing a 20,000-row import...")
+
+    csv_file = os.path.join(tmp_path, 'books.csv')
+    with open(csv_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'author', 'category', 'isbn'])
+        for i in range(20000):
+            writer.writerow([f"Imported Title {i}", f"Author {i % 700}", "History", make_isbn(i)])
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    report = import_books(lms, csv_file, workers=2)
+    assert report.imported == 20000 and len(lms.books) == 20000
+    print(f"✅ {report.summary()}")
+
+if __name__ == "__main__":
+    test_isbn_checksum()
+    for test in (test_import_formats, test_import_throughput):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the operation timing and counters
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from headless import headless_ui
+from instrumentation import LMS_OPERATIONS, UI_OPERATIONS, Metrics, OperationStats
+from library_core import LibraryManagementSystem
+
+def test_operation_metrics(tmp_path):
+    """Calls, errors, latencies and payload sizes are recorded per operation"""
+    print("🧪 Testing LMS instrumentation...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    metrics = Metrics()
+    assert not metrics.enabled and 'issue_book' not in vars(lms)
+    metrics.instrument(lms, LMS_OPERATIONS, 'lms')
+    assert metrics.enabled
+
+    book_ids = lms.bulk_add_books([(f"Book {i}", "Author", "Fiction", str(i)) for i in range(5)])
+    member = lms.add_member("Timed", "timed@test.com", "555")
+    lms.issue_book(book_ids[0], member)
+    try:
+        lms.issue_book(book_ids[0], member)
+        assert False, "issuing an issued book should fail"
+    except ValueError:
+        pass
+    assert len(lms.search_books("book")) == 5
+    lms.save_data()
+
+    operations = metrics.stats()['operations']
+    assert operations['lms.issue_book']['count'] == 2 and operations['lms.issue_book']['errors'] == 1
+    assert operations['lms.bulk_add_books']['payload_mean'] == 5
+    assert operations['lms.search_books']['payload_max'] == 5
+    assert operations['lms.save_data']['payload_max'] == os.path.getsize(lms.data_file)
+    assert 'lms.return_book' not in operations
+    print("✅ Counts, errors and payload sizes recorded")
+
+    metrics.uninstrument()
+    assert not metrics.enabled and 'issue_book' not in vars(lms)
+    lms.return_book(book_ids[0], member)
+    assert 'lms.return_book' not in metrics.stats()['operations']
+    print("✅ Uninstrumented methods are the plain class methods again")
+
+def test_percentiles():
+    """p50/p95/p99 come from the log-scale histogram within its 5% bucket width"""
+    print("🧪 Testing latency percentiles...")
+
+    stats = OperationStats()
+    for i in range(1, 1001):
+        stats.add(i / 1000, False, None)
+    result = stats.to_dict()
+    for key, expected in (('p50_ms', 500), ('p95_ms', 950), ('p99_ms', 990)):
+        assert expected <= result[key] <= expected * 1.06, (key, result[key])
+    assert result['max_ms'] == 1000 and result['count'] == 1000
+    print(f"✅ p50={result['p50_ms']} p95={result['p95_ms']} p99={result['p99_ms']} ms")
+
+def test_ui_refresh_and_dump(tmp_path):
+    """UI refreshes are timed and the periodic dump writes the stats as JSON"""
+    print("🧪 Testing UI instrumentation and the JSON dump...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    lms.bulk_add_books([(f"Book {i}", "Author", "Fiction", str(i)) for i in range(3)])
+    ui = headless_ui(lms)
+    ui.load_data()
+    metrics = Metrics()
+    metrics.instrument(ui, UI_OPERATIONS, 'ui')
+    ui.load_data()
+    operations = metrics.stats()['operations']
+    assert operations['ui.load_data']['count'] == 1
+    assert operations['ui.refresh_books']['payload_max'] == 3
+    print("✅ Nested refresh calls recorded")
+
+    dump_file = os.path.join(tmp_path, 'metrics.json')
+    metrics.start_dump(dump_file, interval=0.05, extra=lambda: {'autosave': {'saves': 0}})
+    time.sleep(0.2)
+    metrics.stop_dump()
+    with open(dump_file) as f:
+        dumped = json.load(f)
+    assert dumped['operations']['ui.load_data']['count'] == 1 and dumped['autosave'] == {'saves': 0}
+    print("✅ Periodic JSON dump written")
+
+def test_disabled_overhead(tmp_path):
+    """Without instrumentation the operations are the undecorated methods"""
+    print("🧪 Timing instrumented vs plain calls...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    calls = 20000
+    start = time.perf_counter()
+    for _ in range(calls):
+        lms.calculate_total_late_fees()
+    plain = time.perf_counter() - start
+
+    metrics = Metrics()
+    metrics.instrument(lms, LMS_OPERATIONS, 'lms')
+    start = time.perf_counter()
+    for _ in range(calls):
+        lms.calculate_total_late_fees()
+    timed = time.perf_counter() - start
+    assert metrics.stats()['operations']['lms.calculate_total_late_fees']['count'] == calls
+    print(f"✅ {plain / calls * 1e6:.2f} µs plain, {timed / calls * 1e6:.2f} µs instrumented per call")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        test_operation_metrics(directory)
+    test_percentiles()
+    for test in (test_ui_refresh_and_dump, test_disabled_overhead):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
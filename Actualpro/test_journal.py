@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test journaled persistence: replay of snapshot + journal, and compaction
+"""
+
+import os
+import tempfile
+
+from library_core import LibraryManagementSystem
+
+def test_journal_replay_and_compaction(tmp_path):
+    """Mutations are appended to the journal and survive a reload and a compaction"""
+    print("🧪 Testing journaled persistence...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    lms = LibraryManagementSystem(data_file=data_file, journal=True)
+
+    book1 = lms.add_book("Journal Book 1", "Author A", "Fiction", "111")
+    book2 = lms.add_book("Journal Book 2", "Author B", "Science", "222")
+    member = lms.add_member("Journal User", "journal@test.com", "555-0100")
+    lms.issue_book(book1, member)
+    lms.issue_book(book2, member)
+    lms.return_book(book2, member)
+    lms.save_data()
+    lms.close()
+    assert not os.path.exists(data_file), "journal mode should not rewrite the snapshot"
+    print("✅ Mutations journaled without rewriting the data file")
+
+    lms2 = LibraryManagementSystem(data_file=data_file, journal=True)
+    assert lms2.books[book1]['status'] == 'Issued'
+    assert lms2.books[book2]['status'] == 'Available'
+    assert [issued['book_id'] for issued in lms2.issued_books[member]] == [book1]
+    print("✅ Journal replayed on load")
+
+    lms2.compact(background=False)
+    lms2.delete_book(book2)
+    lms2.close()
+    lms3 = LibraryManagementSystem(data_file=data_file, journal=True)
+    assert book2 not in lms3.books
+    assert lms3.books[book1]['issued_to'] == member
+    assert lms3.issued_books[member][0]['due_date'] == lms2.issued_books[member][0]['due_date'].replace(microsecond=0)
+    print("✅ Snapshot + post-compaction journal replayed")
+    lms3.close()
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        test_journal_replay_and_compaction(directory)
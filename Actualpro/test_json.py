@@ -3,7 +3,7 @@
 Test JSON serialization with datetime objects
 """
 
-from library import LibraryManagementSystem
+from library_core import LibraryManagementSystem
 from datetime import datetime, timedelta
 
 def test_json_serialization():
@@ -3,7 +3,7 @@
 Simple test script for Library Management System
 """
 
-from library import LibraryManagementSystem
+from library_core import LibraryManagementSystem
 
 def test_library_system():
     """Test basic functionality of the library system"""
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the loan indexes behind overdue reports and late fees
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from library_core import LibraryManagementSystem
+
+def make_library(directory, loans):
+    """Create a library with one member per loan, each loan issued `days_ago` days ago"""
+    lms = LibraryManagementSystem(data_file=os.path.join(directory, 'library_data.json'))
+    now = datetime.now()
+    book_ids = []
+    for i, days_ago in enumerate(loans):
+        book_id = lms.add_book(f"Loan Book {i}", "Author", "Fiction", str(i))
+        member_id = lms.add_member(f"Borrower {i}", f"b{i}@test.com", "555")
+        lms.issue_book(book_id, member_id)
+        issued = lms.issued_books[member_id][0]
+        lms.due_index.remove(book_id)
+        issued['issue_date'] = now - timedelta(days=days_ago)
+        issued['due_date'] = issued['issue_date'] + timedelta(days=14)
+        lms.due_index.add(issued)
+        book_ids.append(book_id)
+    return lms, book_ids, now
+
+def test_overdue_range_query(tmp_path):
+    """Overdue loans and fees match the original per-loan rule"""
+    print("🧪 Testing due-date index...")
+
+    lms, book_ids, now = make_library(tmp_path, [1, 14.5, 15, 20, 40])
+    overdue = lms.get_overdue_books(as_of=now)
+    assert [issued['book_id'] for issued in overdue] == [book_ids[4], book_ids[3], book_ids[2]]
+    for issued in overdue:
+        assert (now - issued['issue_date']).days > 14
+    print(f"✅ {len(overdue)} overdue loans, oldest first")
+
+    assert lms.calculate_total_late_fees(as_of=now) == (40 - 14) + (20 - 14) + (15 - 14)
+    print("✅ Late fees summed from the overdue range")
+
+    lms.return_book(book_ids[4], lms.books[book_ids[4]]['issued_to'])
+    assert lms.calculate_total_late_fees(as_of=now) == 6 + 1
+    assert len(lms.get_overdue_books(as_of=now + timedelta(days=30))) == 4
+    print("✅ Index follows returns and later as-of dates")
+
+def test_late_fee_report(tmp_path):
+    """The batch engine agrees with the per-loan fee rule"""
+    print("🧪 Testing batch late-fee report...")
+
+    lms, book_ids, now = make_library(tmp_path, [3, 15, 20, 40, 70])
+    report = lms.late_fee_report(as_of=now)
+    assert report['active_loans'] == 5
+    assert report['overdue_loans'] == 4
+    assert report['total_fees'] == lms.calculate_total_late_fees(as_of=now) == 1 + 6 + 26 + 56
+    assert report['member_totals'][lms.books[book_ids[3]]['issued_to']] == 26
+    assert dict(report['histogram']) == {'1-7 days': 2, '8-14 days': 0, '15-30 days': 1,
+                                         '31-60 days': 1, '61+ days': 0}
+    print(f"✅ Report: {report['overdue_loans']} overdue, ${report['total_fees']:.2f} owed")
+
+def test_reverse_loan_index(tmp_path):
+    """book_id -> (member_id, loan) stays consistent through issue, return and reload"""
+    print("🧪 Testing reverse loan index...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    lms = LibraryManagementSystem(data_file=data_file)
+    book1 = lms.add_book("Indexed Book 1", "Author", "Fiction", "1")
+    book2 = lms.add_book("Indexed Book 2", "Author", "Fiction", "2")
+    alice = lms.add_member("Alice", "alice@test.com", "555-1")
+    bob = lms.add_member("Bob", "bob@test.com", "555-2")
+    lms.issue_book(book1, alice)
+    lms.issue_book(book2, bob)
+
+    member_id, issued = lms.loan_for_book(book1)
+    assert member_id == alice and issued is lms.issued_books[alice][0]
+    try:
+        lms.return_book(book1, bob)
+        assert False, "returning someone else's loan should fail"
+    except ValueError as e:
+        print(f"✅ Expected error: {e}")
+    try:
+        lms.delete_book(book2)
+        assert False, "deleting an issued book should fail"
+    except ValueError as e:
+        print(f"✅ Expected error: {e}")
+
+    lms.return_book(book1, alice)
+    assert lms.loan_for_book(book1) is None
+    lms.save_data()
+    assert LibraryManagementSystem(data_file=data_file).loan_for_book(book2)[0] == bob
+    print("✅ Loan lookups by book_id survive returns and reloads")
+
+if __name__ == "__main__":
+    for test in (test_overdue_range_query, test_late_fee_report, test_reverse_loan_index):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Test partitioned data files: per-partition saves and selective loading
+"""
+
+import json
+import os
+import tempfile
+
+import partitions
+from benchmark import write_library
+from library_core import LibraryManagementSystem
+from partitions import PartitionedStore
+from simple_library import SimpleLibrary
+
+def new_library(directory, **options):
+    data_file = os.path.join(tempfile.mkdtemp(dir=directory), 'library_data.json')
+    lms = LibraryManagementSystem(data_file=data_file, snapshot='partitioned', **options)
+    lms.bulk_add_books([(f"{category} Book {i}", "Author", category, str(i))
+                        for category in ('Fiction', 'Science', 'History') for i in range(10)])
+    lms.bulk_add_members([(f"Member {i}", f"m{i}@test.com", "555") for i in range(3)])
+    lms.save_data()
+    return lms
+
+def files(lms):
+    return {name: entry['file'] for name, entry in lms.partitions.manifest['partitions'].items()}
+
+def test_layout(tmp_path):
+    """Books are split by category; members and loans get their own files"""
+    print("🧪 Testing the partition layout...")
+
+    lms = new_library(tmp_path)
+    assert sorted(files(lms)) == ['books-fiction', 'books-history', 'books-science', 'loans', 'members']
+    assert not os.path.exists(lms.data_file)
+    with open(os.path.join(lms.partitions.directory, files(lms)['books-science'])) as f:
+        assert {book['category'] for book in json.load(f).values()} == {'Science'}
+    print("✅ One file per category, plus members and loans")
+
+    reopened = LibraryManagementSystem(data_file=lms.data_file, snapshot='partitioned')
+    assert dict(reopened.books) == dict(lms.books) and dict(reopened.members) == dict(lms.members)
+    assert reopened.search_books("science book") == lms.search_books("science book")
+    print("✅ Everything reads back")
+
+def test_dirty_partitions(tmp_path):
+    """A save rewrites only the partitions that changed"""
+    print("🧪 Testing per-partition saves...")
+
+    lms = new_library(tmp_path)
+    before = files(lms)
+    lms.issue_book('0011', '0001')
+    lms.save_data()
+    after = files(lms)
+    assert {name for name in after if after[name] != before[name]} == {'books-science', 'loans'}
+    print("✅ Issuing a Science book rewrote books-science and loans only")
+
+    before = after
+    lms.add_member("New", "new@test.com", "555")
+    lms.delete_book('0001')
+    lms.save_data()
+    after = files(lms)
+    assert {name for name in after if after[name] != before[name]} == {'books-fiction', 'members'}
+    assert sorted(os.listdir(lms.partitions.directory)) == sorted(list(after.values()) + ['manifest.json'])
+    print("✅ Add member + delete book rewrote members and books-fiction; old files removed")
+
+    lms.save_data()
+    assert files(lms) == after
+    print("✅ A save with no changes writes nothing")
+
+    reopened = LibraryManagementSystem(data_file=lms.data_file, snapshot='partitioned')
+    assert reopened.books['0011']['status'] == 'Issued' and '0001' not in reopened.books
+    assert [loan.book_id for loan in reopened.issued_books['0001']] == ['0011'] and len(reopened.members) == 4
+    print("✅ The changes survived the reopen")
+
+def test_selective_load(tmp_path):
+    """Callers can read just the tables and categories they need"""
+    print("🧪 Testing selective loading...")
+
+    lms = new_library(tmp_path)
+    lms.issue_book('0001', '0001')
+    lms.save_data()
+
+    store = PartitionedStore(lms.partitions.directory)
+    data = store.load(members=False, loans=False, categories=['History'])
+    assert set(data) == {'schema_version', 'books'} and len(data['books']) == 10
+    assert {book['category'] for book in data['books'].values()} == {'History'}
+    try:
+        store.touch('members')
+        assert False
+    except ValueError as e:
+        assert "was not loaded" in str(e)
+    print("✅ Loaded one category without members or loans; unloaded partitions are read-only")
+
+    simple = SimpleLibrary(data_file=lms.data_file)
+    assert len(simple.books) == 30 and len(simple.members) == 3 and not hasattr(simple, 'issued_books')
+    simple.add_book("Simple Book", "Author", "History")
+    simple.save_data()
+    reopened = LibraryManagementSystem(data_file=lms.data_file, snapshot='partitioned')
+    assert reopened.books['0031']['title'] == "Simple Book"
+    assert [loan.book_id for loan in reopened.issued_books['0001']] == ['0001']
+    print("✅ SimpleLibrary skips the loans and its save leaves them untouched")
+
+def test_damaged_partition(tmp_path):
+    """A partition that cannot be read stops the load instead of being saved over as empty"""
+    print("🧪 Testing a damaged partition...")
+
+    lms = new_library(tmp_path)
+    science = os.path.join(lms.partitions.directory, files(lms)['books-science'])
+    with open(science) as f:
+        saved = f.read()
+    with open(science, 'w') as f:
+        f.write(saved[:len(saved) // 2])
+    before = sorted(os.listdir(lms.partitions.directory))
+    for open_library in (lambda: LibraryManagementSystem(data_file=lms.data_file, snapshot='partitioned'),
+                         lambda: SimpleLibrary(data_file=lms.data_file)):
+        try:
+            open_library()
+            assert False
+        except ValueError:
+            pass
+    assert sorted(os.listdir(lms.partitions.directory)) == before
+    print("✅ Load refused; the other partitions were left alone")
+
+def test_simple_library_json(tmp_path):
+    """SimpleLibrary follows the newer of the JSON file and the partitions, and keeps the loans in JSON"""
+    print("🧪 Testing SimpleLibrary with a JSON data file...")
+
+    lms = new_library(tmp_path)
+    lms.issue_book('0001', '0001')
+    lms.add_member("JSON Only", "json@test.com", "555")
+    # Saved as library_data.json only, as a desk using snapshot='json' would
+    with open(lms.data_file, 'w') as f:
+        json.dump(lms._serialize(), f)
+
+    simple = SimpleLibrary(data_file=lms.data_file)
+    assert not simple.partitioned and len(simple.members) == 4
+    simple.add_book("Simple Book", "Author", "History")
+    simple.save_data()
+    with open(lms.data_file) as f:
+        saved = json.load(f)
+    assert saved['schema_version'] == lms._serialize()['schema_version']
+    assert [loan['book_id'] for loan in saved['issued_books']['0001']] == ['0001']
+    reopened = LibraryManagementSystem(data_file=lms.data_file, snapshot='partitioned')
+    assert reopened.books['0031']['title'] == "Simple Book" and reopened.loans_by_book['0001'][0] == '0001'
+    print("✅ The newer JSON file was read and saved with its loans and schema version")
+
+def test_range_shards_and_journal(tmp_path):
+    """ID-range sharding, re-sharding, journal compaction and converting a JSON file"""
+    print("🧪 Testing range shards and the journal...")
+
+    lms = new_library(tmp_path, partition_by='range')
+    assert sorted(files(lms)) == ['books-0000', 'loans', 'members']
+    lms.partitions.range_size = 10
+    lms.partitions.touch_all()
+    lms.save_data()
+    assert sorted(files(lms)) == ['books-0000', 'books-0010', 'books-0020', 'books-0030', 'loans', 'members']
+    resharded = LibraryManagementSystem(data_file=lms.data_file, snapshot='partitioned')
+    assert len(resharded.books) == 30
+    resharded.save_data()
+    assert sorted(files(resharded)) == ['books-fiction', 'books-history', 'books-science', 'loans', 'members']
+    print("✅ Range shards, and files re-sharded when opened with another scheme")
+
+    journaled = LibraryManagementSystem(data_file=lms.data_file, snapshot='partitioned', journal=True)
+    journaled.add_book("Journaled", "Author", "Technology", "1")
+    journaled.compact(background=False)
+    journaled.issue_book('0031', '0002')
+    journaled.close()
+    assert 'books-technology' in files(journaled) and journaled.partitions.manifest['meta']['journal_seq'] == 1
+    reopened = LibraryManagementSystem(data_file=lms.data_file, snapshot='partitioned', journal=True)
+    assert reopened.books['0031']['status'] == 'Issued' and reopened.loans_by_book['0031'][0] == '0002'
+    reopened.close()
+    print("✅ Compaction writes the journal's changes to their partitions")
+
+    data_file = write_library(os.path.join(tmp_path, 'library_data.json'), 200)
+    assert partitions.main([data_file, '--shard', 'range', '--range-size', '100']) == 0
+    store = PartitionedStore(partitions.partition_dir(data_file), shard='range', range_size=100)
+    assert len(store.load()['books']) == 200
+    print("✅ partitions.py split an existing data file")
+
+if __name__ == "__main__":
+    for test in (test_layout, test_dirty_partitions, test_selective_load, test_damaged_partition,
+                 test_simple_library_json, test_range_shards_and_journal):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test the compact record layouts
+"""
+
+import json
+import os
+import tempfile
+
+from library_core import LibraryManagementSystem
+from records import Book, ColumnarBooks
+
+def test_record_layouts(tmp_path):
+    """Every layout behaves like the dict layout and round-trips through save/load"""
+    print("🧪 Testing record layouts...")
+
+    for layout in ('slots', 'columnar'):
+        data_file = os.path.join(tmp_path, f'library_data_{layout}.json')
+        lms = LibraryManagementSystem(data_file=data_file, layout=layout)
+        book1 = lms.add_book("Compact Book", "Author A", "Science", "111")
+        book2 = lms.add_book("Another Book", "Author B", "History", "222")
+        member = lms.add_member("Compact User", "compact@test.com", "555")
+        lms.issue_book(book1, member)
+        lms.delete_book(book2)
+
+        assert lms.books[book1]['status'] == 'Issued'
+        assert dict(lms.books[book1])['category'] == 'Science'
+        assert lms.search_books("compact") == [book1]
+        lms.save_data()
+
+        with open(data_file) as f:
+            saved = json.load(f)
+        assert saved['books'] == {book1: {'title': "Compact Book", 'author': "Author A", 'category': "Science",
+                                          'isbn': "111", 'status': "Issued", 'issued_to': member}}
+
+        lms2 = LibraryManagementSystem(data_file=data_file, layout=layout)
+        assert lms2.books[book1]['issued_to'] == member
+        assert lms2.members[member]['name'] == "Compact User"
+        assert lms2.loan_for_book(book1)[1]['book_id'] == book1
+        print(f"✅ '{layout}' layout round-trips through save and load")
+
+    books = ColumnarBooks({'0001': Book("T", "A", "Fiction", "1")})
+    books['0001']['status'] = 'Issued'
+    assert books.pop('0001')['status'] == 'Issued' and len(books) == 0
+    print("✅ Columnar rows write through and detach on delete")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        test_record_layouts(directory)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the streaming report exports
+"""
+
+import csv
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from library_core import LibraryManagementSystem
+from reports import export_report, loan_rows, overdue_rows
+from schema import DATE_FORMAT
+from sqlite_backend import SQLiteLibraryManagementSystem
+
+def make_library(directory, books=5, members=3):
+    lms = LibraryManagementSystem(data_file=os.path.join(directory, 'library_data.json'))
+    lms.bulk_add_books([(f"Title {i}", f"Author {i}", "Fiction", str(i)) for i in range(books)])
+    lms.bulk_add_members([(f"Member {i}", f"m{i}@test.com", "555") for i in range(members)])
+    return lms
+
+def test_report_formats(tmp_path):
+    """Every report writes CSV, JSON Lines and escaped HTML with the same rows"""
+    print("🧪 Testing report formats...")
+
+    lms = make_library(tmp_path)
+    lms.add_book("Tom & Jerry <Annotated>", "Hanna, Barbera", "Fiction", "999")
+    book_ids, member_ids = list(lms.books), list(lms.members)
+    lms.issue_book(book_ids[0], member_ids[0])
+    lms.issue_book(book_ids[1], member_ids[1])
+
+    # Back-date the first loan so it is 3 days overdue
+    issued = lms.loans_by_book[book_ids[0]][1]
+    lms._remove_loan(book_ids[0])
+    issued['issue_date'] = datetime.now() - timedelta(days=17, hours=1)
+    issued['due_date'] = issued['issue_date'] + timedelta(days=14)
+    lms._insert_loan(member_ids[0], issued)
+
+    books_csv = os.path.join(tmp_path, 'books.csv')
+    assert export_report(lms, 'books', books_csv) == 6
+    with open(books_csv, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['book_id'] for row in rows] == book_ids
+    assert rows[0]['status'] == 'Issued' and rows[0]['issued_to'] == member_ids[0]
+    assert rows[-1]['title'] == "Tom & Jerry <Annotated>" and rows[-1]['author'] == "Hanna, Barbera"
+    print("✅ Catalogue CSV round-trips quoted fields")
+
+    members_jsonl = os.path.join(tmp_path, 'members.jsonl')
+    assert export_report(lms, 'members', members_jsonl) == 3
+    with open(members_jsonl) as f:
+        members = [json.loads(line) for line in f]
+    assert [member['books_issued'] for member in members] == [1, 1, 0]
+
+    overdue_jsonl = os.path.join(tmp_path, 'overdue.jsonl')
+    assert export_report(lms, 'overdue', overdue_jsonl) == 1
+    with open(overdue_jsonl) as f:
+        overdue = json.loads(f.readline())
+    assert overdue['book_id'] == book_ids[0] and overdue['member_name'] == "Member 0"
+    assert overdue['days_overdue'] == 3 and overdue['late_fee'] == 3.0
+    assert export_report(lms, 'loans', os.path.join(tmp_path, 'loans.csv')) == 2
+    print("✅ Members, loans and late fees exported as JSON Lines")
+
+    books_html = os.path.join(tmp_path, 'books.html')
+    export_report(lms, 'books', books_html)
+    with open(books_html) as f:
+        page = f.read()
+    assert "<td>Tom &amp; Jerry &lt;Annotated&gt;</td>" in page
+    assert page.count('<tr>') == 7 and page.rstrip().endswith('</html>')
+    print("✅ HTML cells are escaped")
+
+    try:
+        export_report(lms, 'books', os.path.join(tmp_path, 'books.txt'))
+        assert False, "an unknown extension should fail"
+    except ValueError as e:
+        print(f"✅ Expected error: {e}")
+    assert not os.path.exists(os.path.join(tmp_path, 'books.txt.tmp'))
+
+def test_report_streaming(tmp_path):
+    """Reports are generators that tolerate rows being deleted mid-export"""
+    print("🧪 Testing streamed rows...")
+
+    lms = make_library(tmp_path, books=10)
+    rows = overdue_rows(lms)
+    assert iter(rows) is rows
+    assert list(rows) == []
+
+    chunks = []
+    export_report(lms, 'books', os.path.join(tmp_path, 'books.csv'), chunk_rows=3, progress=chunks.append)
+    assert chunks == [3, 6, 9, 10]
+
+    def delete_during_export(count):
+        if count == 3:
+            lms.delete_book(list(lms.books)[-1])
+    assert export_report(lms, 'books', os.path.join(tmp_path, 'books.jsonl'),
+                         chunk_rows=3, progress=delete_during_export) == 9
+    print("✅ Output written chunk by chunk, deleted rows skipped")
+
+def test_report_sqlite(tmp_path):
+    """On SQLite the loan reports come from a due-date ordered cursor"""
+    print("🧪 Testing loan reports on the SQLite backend...")
+
+    lms = SQLiteLibraryManagementSystem(os.path.join(tmp_path, 'library_data.db'))
+    book_ids = lms.bulk_add_books([(f"Title {i}", "Author", "Fiction", str(i)) for i in range(3)])
+    member_ids = lms.bulk_add_members([(f"Member {i}", f"m{i}@test.com", "555") for i in range(3)])
+    for book_id, member_id, days in zip(book_ids, member_ids, (0, 20, 16)):
+        lms.issue_book(book_id, member_id)
+        due_date = (datetime.now() - timedelta(days=days, hours=1) + timedelta(days=14)).strftime(DATE_FORMAT)
+        with lms.transaction() as conn:
+            conn.execute("UPDATE loans SET due_date = ? WHERE book_id = ?", (due_date, book_id))
+
+    rows = loan_rows(lms)
+    assert iter(rows) is rows
+    assert [row[0] for row in rows] == [book_ids[1], book_ids[2], book_ids[0]]
+    assert [(row[0], row[6], row[7]) for row in overdue_rows(lms)] == [(book_ids[1], 6, 6.0), (book_ids[2], 2, 2.0)]
+    assert export_report(lms, 'overdue', os.path.join(tmp_path, 'overdue.csv')) == 2
+    lms.close()
+    print("✅ Loans streamed oldest due date first with their late fees")
+
+def test_report_speed(tmp_path):
+    """A 200,000-title catalogue exports to CSV in a few seconds"""
+    print("🧪 Timing a 200,000-row export...")
+
+    lms = make_library(tmp_path, books=200_000)
+    start = time.perf_counter()
+    count = export_report(lms, 'books', os.path.join(tmp_path, 'books.csv'))
+    elapsed = time.perf_counter() - start
+    assert count == 200_000
+    print(f"✅ {count:,} rows in {elapsed:.2f}s ({count / elapsed:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    for test in (test_report_formats, test_report_streaming, test_report_sqlite, test_report_speed):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
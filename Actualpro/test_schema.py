@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test the versioned data-file schema and the v1 -> v2 migration
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+from library_core import LibraryManagementSystem
+from schema import SCHEMA_VERSION, from_epoch, migrate_data_file, to_epoch
+
+V1_DATA = {
+    'books': {'0001': {'title': "Old Book", 'author': "Old Author", 'category': "History",
+                       'isbn': "1", 'status': "Issued", 'issued_to': "0001"}},
+    'members': {'0001': {'name': "Old Member", 'email': "old@test.com", 'phone': "555",
+                         'join_date': "2024-01-01"}},
+    'issued_books': {'0001': [{'book_id': "0001", 'issue_date': "2024-01-02 10:30:00",
+                               'due_date': "2024-01-16 10:30:00"}]}
+}
+
+def test_schema_migration(tmp_path):
+    """Version 1 files load directly and migrate to epoch timestamps"""
+    print("🧪 Testing schema migration...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    with open(data_file, 'w') as f:
+        json.dump(V1_DATA, f)
+
+    lms = LibraryManagementSystem(data_file=data_file)
+    issued = lms.issued_books['0001'][0]
+    assert issued['issue_date'] == datetime(2024, 1, 2, 10, 30)
+    assert issued.due_ts == to_epoch("2024-01-16 10:30:00")
+    print("✅ Version 1 file loaded without a separate migration step")
+
+    copy_file = data_file + '.copy'
+    shutil.copy(data_file, copy_file)
+    assert migrate_data_file(copy_file) == 1
+    assert migrate_data_file(copy_file) == SCHEMA_VERSION
+    with open(copy_file) as f:
+        migrated = json.load(f)
+    assert migrated['schema_version'] == SCHEMA_VERSION
+    assert migrated['issued_books']['0001'][0] == {'book_id': "0001", 'issue_ts': issued.issue_ts,
+                                                   'due_ts': issued.due_ts}
+    print("✅ One-shot migrator rewrites loans as epoch seconds")
+
+    lms.save_data()
+    with open(data_file) as f:
+        assert json.load(f) == migrated
+    assert from_epoch(to_epoch(datetime(2030, 3, 31, 2, 30))) == datetime(2030, 3, 31, 2, 30)
+    print("✅ Saved files use the current schema")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        test_schema_migration(directory)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test the indexed book search
+"""
+
+import os
+import tempfile
+import time
+
+from library_core import LibraryManagementSystem
+
+def test_inverted_index_search(tmp_path):
+    """Prefix and multi-term AND queries stay in sync with add/delete"""
+    print("🧪 Testing indexed search...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    hobbit = lms.add_book("The Hobbit", "J.R.R. Tolkien", "Fiction", "111")
+    rings = lms.add_book("The Fellowship of the Ring", "J.R.R. Tolkien", "Fiction", "222")
+    cosmos = lms.add_book("Cosmos", "Carl Sagan", "Science", "333")
+
+    assert lms.search_books("tolkien") == [hobbit, rings]
+    assert lms.search_books("tolk hob") == [hobbit]
+    assert lms.search_books("SCIENCE") == [cosmos]
+    assert lms.search_books("dragons") == []
+    print("✅ Prefix and AND queries return the expected books")
+
+    lms.delete_book(hobbit)
+    assert lms.search_books("hobbit") == []
+    assert lms.search_books_recursive("tolkien") == [rings]
+    assert lms.search_books("ellowship of") == [] and lms.search_books_recursive("ellowship of") == [rings]
+    print("✅ Index updated on delete")
+
+    # 5,000 books used to blow the recursion limit
+    for i in range(5000):
+        lms.add_book(f"Volume {i}", "Bulk Author", "History", str(i))
+    assert len(lms.search_books("bulk")) == 5000
+    print("✅ Large catalogues search without recursion")
+
+def test_fuzzy_search(tmp_path):
+    """Misspelled authors and titles still find the right books, best match first"""
+    print("🧪 Testing fuzzy search...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    hobbit = lms.add_book("The Hobbit", "J.R.R. Tolkien", "Fiction", "111")
+    nineteen = lms.add_book("1984", "George Orwell", "Fiction", "222")
+    farm = lms.add_book("Animal Farm", "George Orwell", "Fiction", "333")
+    lms.add_book("Dune", "Frank Herbert", "Fiction", "444")
+
+    assert lms.search_books("Tolkein") == []
+    assert [book_id for book_id, score in lms.fuzzy_search("Tolkein")] == [hobbit]
+    assert {book_id for book_id, score in lms.fuzzy_search("Orwel")} == {nineteen, farm}
+    assert lms.fuzzy_search("animl farm")[0][0] == farm
+    print("✅ Typos resolved to the right books")
+
+    lms.delete_book(farm)
+    assert [book_id for book_id, score in lms.fuzzy_search("Orwel")] == [nineteen]
+    assert len(lms.fuzzy_search("Orwel", limit=0)) == 0
+    print("✅ Trigram index updated on delete")
+
+def test_autocomplete(tmp_path):
+    """Pickers complete ids, title words and member names, filtered and capped at the limit"""
+    print("🧪 Testing autocomplete...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    book_ids = lms.bulk_add_books([(f"Lord of the Rings {i}", "Tolkien", "Fiction", str(i)) for i in range(500)])
+    hobbit = lms.add_book("The Hobbit", "J.R.R. Tolkien", "Fiction", "111")
+    ann = lms.add_member("Ann Reader", "ann@test.com", "555")
+    bob = lms.add_member("Bob Annotator", "bob@test.com", "555")
+
+    assert lms.complete_books("hob") == [(hobbit, "The Hobbit")]
+    assert len(lms.complete_books("lord ri", limit=20)) == 20
+    assert lms.complete_books(book_ids[40]) == [(book_ids[40], "Lord of the Rings 40")]
+    assert [book_id for book_id, title in lms.complete_books("004")] == book_ids[39:49]
+    assert [member_id for member_id, name in lms.complete_members("ann")] == [ann, bob]
+    print("✅ Ids, title words and names completed")
+
+    lms.issue_book(hobbit, bob)
+    assert lms.complete_books("hob", status='Available') == []
+    assert lms.complete_books("hob", status='Issued') == [(hobbit, "The Hobbit")]
+    assert lms.complete_members("", borrowers_only=True) == [(bob, "Bob Annotator")]
+    lms.return_book(hobbit, bob)
+    lms.delete_book(hobbit)
+    new_id = lms.add_book("Hobbit Companion", "Author", "Literature", "222")
+    assert lms.complete_books("hob") == [(new_id, "Hobbit Companion")]
+    print("✅ Status filters and incremental updates")
+
+    for book_id in book_ids[5:300:7]:
+        lms.issue_book(book_id, lms.add_member(f"Borrower {book_id}", "b@test.com", "555"))
+    index = lms._book_completions
+    for query in ('', 'lo', 'rings 2', '01'):
+        walked = index.complete(query, 15, lambda book_id: book_id in lms.loans_by_book)
+        assert index.complete(query, 15, None, lms.loans_by_book) == walked
+        assert [book_id for book_id, title in lms.complete_books(query, 15, status='Issued')] == walked
+    print("✅ Issued-book completions from the loans match the full walk")
+
+def test_sparse_completion_time(tmp_path):
+    """Completing issued books and borrowers does not walk the catalogue"""
+    print("🧪 Timing issued-book completion on 100,000 titles...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    book_ids = lms.bulk_add_books([(f"Title {i}", "Author", "Fiction", str(i)) for i in range(100000)])
+    member_ids = lms.bulk_add_members([(f"Member {i}", "m@test.com", "555") for i in range(20000)])
+    lms.issue_book(book_ids[-1], member_ids[-1])
+    lms.complete_books('x'), lms.complete_members('x')
+
+    start = time.perf_counter()
+    for query in ('', 't', 'ti', 'title'):
+        assert lms.complete_books(query, status='Issued') == [(book_ids[-1], "Title 99999")]
+        assert lms.complete_members(query[:1] and 'me', borrowers_only=True) == [(member_ids[-1], "Member 19999")]
+    elapsed = (time.perf_counter() - start) * 1000 / 8
+    assert elapsed < 20, elapsed
+    print(f"✅ {elapsed:.2f} ms per completion")
+
+if __name__ == "__main__":
+    for test in (test_inverted_index_search, test_fuzzy_search, test_autocomplete, test_sparse_completion_time):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
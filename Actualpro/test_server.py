@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test the HTTP/JSON server and the load generator
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+
+from library_core import LibraryManagementSystem
+from loadgen import Connection, run_load
+from server import LibraryServer
+
+def new_library(directory, books=0, members=0):
+    lms = LibraryManagementSystem(data_file=os.path.join(directory, 'library_data.json'))
+    if books:
+        lms.bulk_add_books([(f"Served Book {i}", "Author", "Fiction", str(i)) for i in range(books)])
+    if members:
+        lms.bulk_add_members([(f"Member {i}", f"m{i}@test.com", "555") for i in range(members)])
+    return lms
+
+def serve(lms, scenario, **options):
+    """Run scenario(server, connection) against a server on a free port."""
+    async def run():
+        server = await LibraryServer(lms, port=0, **options).start()
+        connection = await Connection.open('127.0.0.1', server.port)
+        try:
+            return await scenario(server, connection)
+        finally:
+            await connection.close()
+            await server.close()
+    return asyncio.run(run())
+
+def test_endpoints(tmp_path):
+    """Books, members and loans can be managed over HTTP, with errors as status codes"""
+    print("🧪 Testing the HTTP endpoints...")
+
+    lms = new_library(tmp_path)
+
+    async def scenario(server, connection):
+        status, body = await connection.request('POST', '/books', {'title': "Dune", 'author': "Herbert",
+                                                                   'category': "Fiction", 'isbn': "1"})
+        assert status == 201
+        book_id = body['book_id']
+        status, body = await connection.request('POST', '/members', {'name': "Paul", 'email': "p@test.com",
+                                                                     'phone': "555"})
+        assert status == 201
+        member_id = body['member_id']
+
+        status, body = await connection.request('GET', '/books?q=dune')
+        assert status == 200 and body['count'] == 1 and body['books'][0]['book_id'] == book_id
+        status, body = await connection.request('POST', '/loans', {'book_id': book_id, 'member_id': member_id})
+        assert status == 201 and "issued to Paul" in body['message']
+        status, body = await connection.request('POST', '/loans', {'book_id': book_id, 'member_id': member_id})
+        assert status == 409 and body['error'] == "Book not available"
+        status, body = await connection.request('GET', f'/members/{member_id}')
+        assert status == 200 and [loan['book_id'] for loan in body['loans']] == [book_id]
+        status, body = await connection.request('GET', '/fees')
+        assert status == 200 and body == {'total_fees': 0.0, 'overdue_loans': 0}
+        status, body = await connection.request('POST', f'/loans/{book_id}/return', {'member_id': member_id})
+        assert status == 200 and body['message'] == "Book returned on time"
+        print("✅ Add, search, issue, return and fees")
+
+        assert (await connection.request('GET', '/books/9999'))[0] == 404
+        assert (await connection.request('POST', '/loans', {'book_id': book_id, 'member_id': '9999'}))[0] == 404
+        assert (await connection.request('POST', '/books', {'title': "No author"}))[0] == 400
+        assert (await connection.request('POST', '/books', {'title': "T", 'author': "A", 'category': "Cookery",
+                                                            'isbn': "2"}))[0] == 400
+        assert (await connection.request('PUT', '/books'))[0] == 405
+        assert (await connection.request('GET', '/shelves'))[0] == 404
+        connection.writer.write(b"POST /members HTTP/1.1\r\nContent-Length: 5\r\n\r\n{oops")
+        assert (await connection.receive())[0] == 400
+        print("✅ Unknown ids, bad input, wrong methods and bad JSON are 404/400/405")
+
+        assert (await connection.request('DELETE', f'/books/{book_id}'))[0] == 200
+        assert (await connection.request('DELETE', f'/members/{member_id}'))[0] == 200
+        status, body = await connection.request('GET', '/stats')
+        assert body['books'] == 0 and body['members'] == 0 and body['errors'] == 8
+        print(f"✅ Deleted; {body['requests']} requests served")
+    serve(lms, scenario)
+
+def test_keep_alive(tmp_path):
+    """Pipelined requests on one connection are answered in order; HTTP/1.0 closes"""
+    print("🧪 Testing keep-alive and pipelining...")
+
+    lms = new_library(tmp_path, books=50)
+
+    async def scenario(server, connection):
+        for i in range(1, 51):
+            connection.send('GET', f'/books/{str(i).zfill(4)}')
+        await connection.writer.drain()
+        titles = [(await connection.receive())[1]['title'] for _ in range(50)]
+        assert titles == [f"Served Book {i}" for i in range(50)]
+        assert server.connections == 1
+        print("✅ 50 pipelined requests answered in order on one connection")
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        writer.write(b"GET /stats HTTP/1.0\r\n\r\n")
+        response = await reader.read()
+        assert response.startswith(b"HTTP/1.1 200 OK") and b"Connection: close" in response
+        writer.close()
+        print("✅ HTTP/1.0 request answered and closed")
+    serve(lms, scenario)
+
+def test_durable_writes(tmp_path):
+    """With durable=True a change is on disk by the time it is answered"""
+    print("🧪 Testing durable writes...")
+
+    lms = new_library(tmp_path)
+
+    async def scenario(server, connection):
+        status, body = await connection.request('POST', '/books', {'title': "Saved", 'author': "A",
+                                                                   'category': "Science", 'isbn': "1"})
+        with open(lms.data_file) as f:
+            assert json.load(f)['books'][body['book_id']]['title'] == "Saved"
+        return server.autosaver.stats()
+    stats = serve(lms, scenario, durable=True, autosave_interval=5)
+    assert stats['saves'] == 1
+    print("✅ Saved before the response, without waiting for the autosave interval")
+
+def test_locked_writes_off_loop(tmp_path):
+    """A write waiting for the library lock (e.g. behind a save) does not stall lookups on other connections"""
+    print("🧪 Testing writes while the library lock is held...")
+
+    lms = new_library(tmp_path, books=10, members=1)
+    release = threading.Event()
+
+    def hold_lock():
+        with lms.lock:
+            release.wait(5)
+
+    async def scenario(server, connection):
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        other = await Connection.open('127.0.0.1', server.port)
+        try:
+            issue = asyncio.ensure_future(connection.request('POST', '/loans', {'book_id': '0001', 'member_id': '0001'}))
+            overdue = asyncio.ensure_future(other.request('GET', '/overdue'))
+            lookup = await Connection.open('127.0.0.1', server.port)
+            status, body = await asyncio.wait_for(lookup.request('GET', '/books/0002'), 2)
+            assert status == 200 and body['title'] == "Served Book 1"
+            assert not issue.done() and not overdue.done()
+            await lookup.close()
+            release.set()
+            assert (await issue)[0] == 201 and (await overdue)[0] == 200
+        finally:
+            release.set()
+            holder.join()
+            await other.close()
+    serve(lms, scenario)
+    print("✅ Lookup answered while an issue and the overdue list waited for the lock")
+
+def test_load(tmp_path):
+    """The load generator drives a mixed workload without server errors"""
+    print("🧪 Testing the load generator...")
+
+    lms = new_library(tmp_path, books=500, members=40)
+
+    async def scenario(server, connection):
+        return await run_load('127.0.0.1', server.port, connections=8, duration=1.0, pipeline=2)
+    results = serve(lms, scenario)
+    assert results['requests'] > 100 and not any(status.startswith('5') for status in results['statuses'])
+    assert set(results['operations']) <= {'search', 'book', 'issue', 'return', 'overdue'}
+    loans = [loan.book_id for issued in lms.issued_books.values() for loan in issued]
+    assert len(loans) == len(set(loans)) == len(lms.loans_by_book)
+    print(f"✅ {results['requests']:,} requests at {results['requests_per_s']:,.0f} req/s, library consistent")
+
+if __name__ == "__main__":
+    for test in (test_endpoints, test_keep_alive, test_durable_writes, test_locked_writes_off_loop, test_load):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
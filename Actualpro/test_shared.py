@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test several desks sharing one data file
+"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from headless import HeadlessLabel, headless_ui
+from library_core import LibraryManagementSystem
+
+def open_desk(data_file, **options):
+    return LibraryManagementSystem(data_file=data_file, shared=True, **options)
+
+def test_incremental_polling(tmp_path):
+    """Changes saved at one desk reach the other desk as records, without a reload"""
+    print("🧪 Testing change polling between desks...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    desk_a, desk_b = open_desk(data_file), open_desk(data_file)
+    received = []
+    desk_b.subscribe(received.append)
+
+    book = desk_a.add_book("Shared Book", "Author", "Fiction", "111")
+    member = desk_a.add_member("Shared Member", "shared@test.com", "555")
+    desk_a.issue_book(book, member)
+    desk_a.save_data()
+
+    generation = desk_b.generation
+    assert desk_b.poll_changes() == 3
+    assert [record['op'] for record in received] == ['add_book', 'add_member', 'issue_book']
+    assert desk_b.generation == generation
+    assert desk_b.books[book]['status'] == 'Issued' and desk_b.loan_for_book(book)[0] == member
+    assert desk_b.search_books("shared") == [book]
+    assert desk_b.poll_changes() == 0
+    print("✅ Three records pulled incrementally, indexes up to date")
+
+class ManualRoot:
+    """Collects the after() callbacks LibraryUI schedules so the test can run them"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback, *args):
+        self.scheduled.append((ms, callback, args))
+
+def test_ui_polling(tmp_path):
+    """The desk UI syncs on a worker thread and refreshes its tables back on the Tk thread"""
+    print("🧪 Testing the UI's background polling...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    desk_a, desk_b = open_desk(data_file), open_desk(data_file)
+    ui = headless_ui(desk_b)
+    ui.load_data()
+    ui.root, ui.status_label, ui._generation = ManualRoot(), HeadlessLabel(), desk_b.generation
+    sync_threads = []
+    poll_changes = desk_b.poll_changes
+    def recording_poll():
+        sync_threads.append(threading.get_ident())
+        return poll_changes()
+    desk_b.poll_changes = recording_poll
+
+    book = desk_a.add_book("Polled Book", "Author", "Fiction", "111")
+    desk_a.save_data()
+    ui.poll_shared()
+    while True:
+        ms, callback, args = ui.root.scheduled.pop(0)
+        if callback == ui.poll_shared:
+            break
+        time.sleep(ms / 1000)
+        callback(*args)
+    assert sync_threads and sync_threads[0] != threading.get_ident()
+    assert book in ui.books_tree.items and ms == ui.SHARED_POLL_MS
+    desk_a.close()
+    desk_b.close()
+    print("✅ Synced off the Tk thread, the new book shown and the next poll scheduled")
+
+def test_conflicting_issue(tmp_path):
+    """Two desks issuing the same copy: the second push is rebased and its issue dropped"""
+    print("🧪 Testing a double issue from two desks...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    desk_a = open_desk(data_file)
+    book = desk_a.add_book("Contested", "Author", "Fiction", "111")
+    member_a = desk_a.add_member("Reader A", "a@test.com", "555")
+    member_b = desk_a.add_member("Reader B", "b@test.com", "555")
+    desk_a.save_data()
+    desk_b = open_desk(data_file)
+
+    desk_a.issue_book(book, member_a)
+    desk_b.issue_book(book, member_b)
+    new_book = desk_b.add_book("Added At B", "Author", "Science", "222")
+    desk_a.save_data()
+    desk_b.save_data()
+
+    conflicts = desk_b.take_conflicts()
+    assert len(conflicts) == 1 and "Book not available" in conflicts[0]
+    print(f"✅ Conflict reported: {conflicts[0]}")
+    assert desk_b.loan_for_book(book)[0] == member_a
+    assert desk_b.books[new_book]['title'] == "Added At B"
+
+    desk_a.poll_changes()
+    fresh = open_desk(data_file)
+    for desk in (desk_a, fresh):
+        assert desk.loan_for_book(book)[0] == member_a
+        assert desk.books[new_book]['title'] == "Added At B"
+        assert member_b not in desk.issued_books or not desk.issued_books[member_b]
+    print("✅ Every desk agrees the book went to the first desk's reader")
+
+def test_id_collision(tmp_path):
+    """Books added at two desks with the same new id both survive"""
+    print("🧪 Testing concurrent adds...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    desk_a, desk_b = open_desk(data_file), open_desk(data_file)
+    assert desk_a.add_book("From A", "Author", "Fiction", "1") == desk_b.add_book("From B", "Author", "Fiction", "2")
+    desk_a.save_data()
+    desk_b.save_data()
+    assert not desk_b.take_conflicts()
+    desk_a.poll_changes()
+    for desk in (desk_a, desk_b, open_desk(data_file)):
+        assert sorted(book['title'] for book in desk.books.values()) == ["From A", "From B"]
+    print("✅ The second desk's book was given the next free id")
+
+def test_compaction(tmp_path):
+    """The change log is folded into the data file, which records its seq"""
+    print("🧪 Testing change log compaction...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    desk_a, desk_b = open_desk(data_file, compaction_threshold=10), open_desk(data_file)
+    behind = open_desk(data_file)
+    for i in range(12):
+        desk_a.add_book(f"Book {i}", "Author", "Fiction", str(i))
+        desk_a.save_data()
+        desk_b.poll_changes()
+    with open(data_file) as f:
+        assert json.load(f)['seq'] == 10
+    with open(data_file + '.changes') as f:
+        assert json.loads(f.readline()) == {'base_seq': 10}
+    assert len(desk_b.books) == 12
+
+    generation = behind.generation
+    behind.poll_changes()
+    assert behind.generation == generation + 1 and len(behind.books) == 12
+    print("✅ Desks in step keep polling; a desk that fell behind reloads")
+
+def add_books(data_file, desk, count):
+    lms = open_desk(data_file)
+    for i in range(count):
+        lms.add_book(f"Desk {desk} Book {i}", "Author", "Fiction", f"{desk}-{i}")
+        lms.save_data()
+    lms.close()
+
+def test_processes(tmp_path):
+    """Desks in separate processes writing at once lose no books"""
+    print("🧪 Testing three desk processes...")
+
+    data_file = os.path.join(tmp_path, 'library_data.json')
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=add_books, args=(data_file, desk, 15)) for desk in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    lms = open_desk(data_file)
+    assert len(lms.books) == 45
+    assert len({book['isbn'] for book in lms.books.values()}) == 45
+    print("✅ All 45 books saved")
+
+if __name__ == "__main__":
+    for test in (test_incremental_polling, test_ui_polling, test_conflicting_issue, test_id_collision,
+                 test_compaction, test_processes):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
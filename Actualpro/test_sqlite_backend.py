@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite storage backend against the LibraryManagementSystem API
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from library_core import LibraryManagementSystem
+from sqlite_backend import SQLiteLibraryManagementSystem, DATE_FORMAT
+
+def test_sqlite_backend(tmp_path):
+    """Issue/return/overdue/search run as SQL and survive a reopen"""
+    print("🧪 Testing SQLite backend...")
+
+    db_file = os.path.join(tmp_path, 'library_data.db')
+    lms = SQLiteLibraryManagementSystem(db_file)
+
+    book1 = lms.add_book("Dune", "Frank Herbert", "Fiction", "111")
+    book2 = lms.add_book("Cosmos", "Carl Sagan", "Science", "222")
+    member = lms.add_member("SQL User", "sql@test.com", "555-0200")
+    print(f"✅ Added books {book1}, {book2} and member {member}")
+
+    print(f"✅ {lms.issue_book(book1, member)}")
+    assert lms.books[book1]['status'] == 'Issued'
+    try:
+        lms.issue_book(book1, member)
+        assert False, "issuing an issued book should fail"
+    except ValueError as e:
+        print(f"✅ Expected error: {e}")
+
+    assert lms.search_books_recursive("sagan") == [book2]
+    assert lms.search_books("sag cos") == [book2] and lms.search_books("frank dune fiction") == [book1]
+    assert lms.search_books("agan") == [] and lms.search_books("") == []
+    assert [book_id for book_id, score in lms.fuzzy_search("frank herbrt")] == [book1]
+    book3 = lms.add_book("Cosmic Dust", "Someone", "Science", "333")
+    assert [book_id for book_id, score in lms.fuzzy_search("cosmo")][:2] == [book2, book3]
+    lms.delete_book(book3)
+    assert lms.get_overdue_books() == []
+    assert lms.complete_books("cos") == [(book2, "Cosmos")]
+    assert lms.complete_books("", status='Issued') == [(book1, "Dune")]
+    member_id, loan = lms.loan_for_book(book1)
+    assert member_id == member and loan == lms.issued_books[member][0] and lms.loan_for_book(book2) is None
+    assert lms.complete_members("use", borrowers_only=True) == [(member, "SQL User")]
+    print("✅ Search and overdue queries work")
+
+    # Back-date the loan so it is 3 days overdue
+    issue_date = datetime.now() - timedelta(days=17, hours=1)
+    lms.conn.execute("UPDATE loans SET issue_date = ?, due_date = ? WHERE book_id = ?", (
+        issue_date.strftime(DATE_FORMAT), (issue_date + timedelta(days=14)).strftime(DATE_FORMAT), book1))
+    assert [issued['book_id'] for issued in lms.get_overdue_books()] == [book1]
+    assert lms.calculate_total_late_fees() == 3.0
+    later = datetime.now() + timedelta(days=10)
+    assert lms.get_overdue_books(as_of=later) == lms.get_overdue_books() and lms.get_overdue_books(issue_date) == []
+    assert lms.calculate_total_late_fees(as_of=later) == 13.0 and lms.calculate_total_late_fees(issue_date) == 0
+    report = lms.late_fee_report()
+    assert (report['active_loans'], report['overdue_loans'], report['total_fees']) == (1, 1, 3.0)
+    assert report['member_totals'] == {member: 3.0} and dict(report['histogram'])['1-7 days'] == 1
+    print("✅ Overdue loans and late fees computed in SQL")
+
+    assert lms.return_book(book1, member) == "Book returned. Late fee: $3.00"
+    lms.close()
+
+    lms2 = SQLiteLibraryManagementSystem(db_file)
+    assert len(lms2.books) == 2 and not lms2.issued_books
+    assert lms2.books[book1]['status'] == 'Available'
+    print(lms2.delete_member(member))
+    lms2.close()
+    print("✅ Data persisted across reopen")
+
+def test_bulk_operations(tmp_path):
+    """bulk_add_books, bulk_add_members and bulk_issue each run as one transaction"""
+    print("🧪 Testing SQLite bulk operations...")
+
+    lms = SQLiteLibraryManagementSystem(os.path.join(tmp_path, 'library_data.db'))
+    book_ids = lms.bulk_add_books([(f"Bulk {i}", "Author", "Science", str(i)) for i in range(6)])
+    member_ids = lms.bulk_add_members([("Ann", "ann@test.com", "555"), {'name': "Bob", 'email': "b@test.com",
+                                                                       'phone': "556"}])
+    assert book_ids == ['0001', '0002', '0003', '0004', '0005', '0006'] and member_ids == ['0001', '0002']
+
+    for pairs, error in ((list(zip(book_ids[:4], ['0001'] * 4)), "Row 4: Maximum book limit reached"),
+                         ([('0001', '0001'), ('0001', '0002')], "Row 2: Book not available"),
+                         ([('0001', '0009')], "Row 1: Member not found")):
+        try:
+            lms.bulk_issue(pairs)
+            assert False, pairs
+        except ValueError as e:
+            assert str(e).startswith(error), e
+    assert not lms.issued_books and lms.books['0001']['status'] == 'Available'
+    print("✅ Rejected batches leave nothing issued")
+
+    assert lms.bulk_issue([('0001', '0001'), ('0002', '0001'), ('0003', '0002')]) == 3
+    assert [loan['book_id'] for loan in lms.issued_books['0001']] == ['0001', '0002']
+    assert lms.books['0003'] == dict(lms.books['0003'], status='Issued', issued_to='0002')
+    try:
+        lms.bulk_add_members([("Carl", "", "557")])
+        assert False
+    except ValueError as e:
+        assert str(e) == "Row 1: missing email"
+    lms.close()
+    print("✅ Bulk issue recorded loans and book status")
+
+def test_import_json(tmp_path):
+    """A library_data.json written by the JSON backend imports with its loans"""
+    print("🧪 Testing JSON import...")
+
+    directory = tmp_path
+    json_lms = LibraryManagementSystem(data_file=os.path.join(directory, 'library_data.json'))
+    book = json_lms.add_book("Imported", "Author", "Fiction", "111")
+    member = json_lms.add_member("Importer", "import@test.com", "555")
+    json_lms.issue_book(book, member)
+    json_lms.save_data()
+
+    lms = SQLiteLibraryManagementSystem(os.path.join(directory, 'library_data.db'))
+    assert lms.import_json(json_lms.data_file) == 1
+    assert lms.books[book]['status'] == 'Issued'
+    assert lms.issued_books[member][0]['due_date'] == json_lms.issued_books[member][0]['due_date']
+    lms.close()
+    print("✅ Books, members and loans imported")
+
+if __name__ == "__main__":
+    for test in (test_sqlite_backend, test_bulk_operations, test_import_json):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test that the UI tables are updated row by row after each operation
+"""
+
+import os
+import tempfile
+
+from headless import headless_ui
+from library import LibraryManagementSystem
+from sqlite_backend import SQLiteLibraryManagementSystem
+
+def test_incremental_refresh(tmp_path):
+    """Issuing, returning and deleting touch only the affected rows"""
+    print("🧪 Testing incremental table refresh...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    book_ids = lms.bulk_add_books([(f"Row Book {i}", "Author", "History", str(i)) for i in range(2000)])
+    member_id = lms.add_member("Row Reader", "row@test.com", "555")
+    ui = headless_ui(lms)
+    ui.load_data()
+    assert len(ui.books_tree.items) == 2000
+    ui.books_tree.calls = 0
+
+    lms.issue_book(book_ids[10], member_id)
+    ui.apply_changes()
+    assert ui.books_tree.calls == 1 and ui.books_tree.items[book_ids[10]][4] == 'Issued'
+    assert list(ui.issued_tree.items) == [book_ids[10]]
+    print("✅ Issue updated one book row and added one loan row")
+
+    lms.return_book(book_ids[10], member_id)
+    new_id = lms.add_book("Row Book New", "Author", "History", "x")
+    lms.delete_book(book_ids[0])
+    ui.apply_changes()
+    assert ui.books_tree.calls == 4 and not ui.issued_tree.items
+    assert book_ids[0] not in ui.books_tree.items and ui.books_tree.items[new_id][1] == "Row Book New"
+    assert ui.members_tree.calls == 1, "only the initial load touched members"
+    print("✅ Return, add and delete applied as single-row changes")
+
+    try:
+        with lms.transaction():
+            lms.delete_book(book_ids[1])
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    ui.apply_changes()
+    assert ui.books_tree.calls == 4 and book_ids[1] in ui.books_tree.items
+    print("✅ Rolled-back changes are not shown")
+
+def test_live_filter(tmp_path):
+    """The filter shows only matching books, follows later changes and clears back to catalogue order"""
+    print("🧪 Testing live filter...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    book_ids = lms.bulk_add_books([(f"{'Dune' if i % 100 == 0 else 'Other'} {i}", "Author", "Fiction", str(i))
+                                   for i in range(1000)])
+    ui = headless_ui(lms)
+    ui.load_data()
+    ui.submit_filter("dune")
+    assert ui.books_tree.get_children() == book_ids[::100] and ui.filter_label.text == "10 matches"
+    print("✅ Filter shows the 10 matching books")
+
+    new_id = lms.add_book("Dune Messiah", "Frank Herbert", "Fiction", "x")
+    lms.delete_book(book_ids[0])
+    ui.apply_changes()
+    assert ui.books_tree.get_children() == book_ids[100::100] + [new_id]
+    ui.load_data()
+    assert ui.books_tree.get_children() == book_ids[100::100] + [new_id]
+    print("✅ Filter re-applied after changes and reloads")
+
+    ui.submit_filter("")
+    assert ui.books_tree.get_children() == book_ids[1:] + [new_id] and not ui.hidden_books
+    print("✅ Clearing the filter restores every book in order")
+
+def test_sqlite_filter(tmp_path):
+    """With the SQLite backend the filter box searches through the backend's search_books"""
+    print("🧪 Testing the filter on the SQLite backend...")
+
+    lms = SQLiteLibraryManagementSystem(os.path.join(tmp_path, 'library_data.db'))
+    book_ids = lms.bulk_add_books([(f"{'Dune' if i % 10 == 0 else 'Other'} {i}", "Author", "Fiction", str(i))
+                                   for i in range(100)])
+    ui = headless_ui(lms)
+    ui.load_data()
+    ui.submit_filter("dun")
+    assert ui.books_tree.get_children() == book_ids[::10] and ui.filter_label.text == "10 matches"
+    ui.submit_filter("")
+    assert ui.books_tree.get_children() == book_ids and not ui.hidden_books
+    lms.close()
+    print("✅ Filtered and cleared without the in-memory indexes")
+
+if __name__ == "__main__":
+    for test in (test_incremental_refresh, test_live_filter, test_sqlite_filter):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
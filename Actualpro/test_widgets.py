@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the row source, scroll window and background search behind the book list
+"""
+
+import os
+import tempfile
+import threading
+
+from library_core import LibraryManagementSystem
+from widgets import BackgroundSearch, RowSource, RowWindow
+
+def test_row_source_and_window(tmp_path):
+    """Only the requested slice is built, and the window clamps and jumps like a scrolled list"""
+    print("🧪 Testing virtual list paging...")
+
+    lms = LibraryManagementSystem(data_file=os.path.join(tmp_path, 'library_data.json'))
+    lms.bulk_add_books([(f"Paged Book {i}", "Author", "Fiction", str(i)) for i in range(1000)])
+    built = []
+    def book_row(book_id):
+        built.append(book_id)
+        return (book_id, lms.books[book_id]['title'])
+
+    source = RowSource(lambda: lms.books, book_row)
+    assert len(source) == 1000 and not built
+    rows = source.rows(500, 520)
+    assert [iid for iid, values in rows] == [str(i).zfill(4) for i in range(501, 521)]
+    assert len(built) == 20
+    print("✅ Rows built only for the requested page")
+
+    window = RowWindow(total=len(source), visible=25)
+    assert window.scroll(-10) == 0
+    assert window.moveto(1.0) == 975 and window.bottom == 1000
+    assert window.show(source.index('0100')) == 99
+    assert window.show(source.index('0110')) == 99, "already on screen"
+    assert window.show(source.index('0200')) == 175
+    print("✅ Window clamps, scrolls and jumps to a row")
+
+    lms.delete_book('0001')
+    new_id = lms.add_book("Late Arrival", "Author", "Science", "x")
+    source.refresh()
+    assert len(source) == 1000 and source.index('0001') is None
+    assert source.index('0002') == 0 and source.index(new_id) == 999
+    print("✅ Source picks up added and deleted books on refresh")
+
+def test_background_search_keeps_newest_query():
+    """Queries typed while a search runs replace each other, and only the newest result is delivered"""
+    print("🧪 Testing background search...")
+
+    started, release = threading.Event(), threading.Event()
+    searched = []
+    def slow_search(query):
+        searched.append(query)
+        started.set()
+        release.wait(5)
+        return [query.upper()]
+
+    search = BackgroundSearch(slow_search)
+    search.submit("d")
+    assert started.wait(5)
+    for query in ("du", "dun", "dune"):
+        search.submit(query)
+    release.set()
+    assert search.wait(5) == ("dune", ["DUNE"])
+    assert searched == ["d", "dune"] and search.cancelled == 3
+    search.close()
+    print("✅ Stale queries skipped or dropped, newest result delivered")
+
+    source = RowSource(lambda: {'0001': 'a', '0002': 'b', '0003': 'c'}, lambda key: (key,))
+    source.set_filter(['0003', '0009', '0001'])
+    assert source.keys == ['0003', '0001'] and source.index('0001') == 1
+    source.set_filter(None)
+    assert len(source) == 3
+    print("✅ Row source filtered to search results in result order")
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        test_row_source_and_window(directory)
+    test_background_search_keeps_newest_query()
@@ -0,0 +1,312 @@
+"""
+Tk widgets for large Library Management System tables
+
+VirtualTreeview shows a RowSource through a ttk.Treeview that only ever
+holds the rows on screen. Scrolling moves a RowWindow over the source and
+re-renders those rows, so opening a 300k-title catalogue costs the same as
+opening a 30-title one. BackgroundSearch runs search-as-you-type queries
+off the Tk thread, and AutocompleteCombobox fills its drop-down with only
+the top matches for what has been typed.
+"""
+
+import threading
+from tkinter import ttk
+
+
+class RowSource:
+    """Positional access to a table for VirtualTreeview.
+
+    keys() returns the current keys (a dict, list or any iterable), values(key)
+    builds the displayed row and iid(key) the Treeview item id (the key itself
+    by default). Keys are snapshotted by refresh(), rows are built on demand.
+    """
+
+    def __init__(self, keys, values, iid=None):
+        self._keys = keys
+        self._values = values
+        self._iid = iid or (lambda key: key)
+        self._positions = None
+        self.filter = None
+        self.keys = []
+        self.refresh()
+
+    def refresh(self):
+        keys = self._keys()
+        if self.filter is None:
+            self.keys = list(keys)
+        else:
+            self.keys = [key for key in self.filter if key in keys]
+        self._positions = None
+
+    def set_filter(self, keys):
+        """Show only these keys, in this order; None shows the whole table again."""
+        self.filter = None if keys is None else list(keys)
+        self.refresh()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rows(self, start, stop):
+        return [(self._iid(key), self._values(key)) for key in self.keys[start:stop]]
+
+    def index(self, iid):
+        """Row number of an item id, or None if it is not in the table."""
+        if self._positions is None:
+            self._positions = {self._iid(key): i for i, key in enumerate(self.keys)}
+        return self._positions.get(iid)
+
+
+class RowWindow:
+    """The slice of rows [top, top + visible) currently shown, clamped to the table."""
+
+    def __init__(self, total=0, visible=1):
+        self.top = 0
+        self.total = total
+        self.visible = max(1, visible)
+
+    @property
+    def bottom(self):
+        return min(self.total, self.top + self.visible)
+
+    def clamp(self):
+        self.top = max(0, min(self.top, self.total - self.visible))
+        return self.top
+
+    def scroll(self, rows):
+        self.top += rows
+        return self.clamp()
+
+    def moveto(self, fraction):
+        self.top = int(float(fraction) * self.total)
+        return self.clamp()
+
+    def show(self, index):
+        # Scroll the least distance that brings index on screen
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.visible:
+            self.top = index - self.visible + 1
+        return self.clamp()
+
+    def fractions(self):
+        if not self.total:
+            return 0.0, 1.0
+        return self.top / self.total, self.bottom / self.total
+
+
+class VirtualTreeview(ttk.Frame):
+    """A headings-only Treeview over a RowSource that renders just the visible rows.
+
+    Rows within `buffer` of the window are fetched ahead so short scrolls do
+    not go back to the source. It answers the Treeview calls LibraryUI makes
+    (heading, column, bind, exists, selection, selection_set, see) in terms of
+    the whole source rather than the rendered rows.
+    """
+
+    def __init__(self, master, columns, source, buffer=50, **tree_options):
+        super().__init__(master)
+        self.source = source
+        self.buffer = buffer
+        self.window = RowWindow(len(source))
+        self._cache_start = 0
+        self._cache = []
+        self._selected = set()
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', **tree_options)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self._scroll(-1 if e.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda e: self._scroll(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda e: self._scroll(1, 'units'))
+        self.tree.bind('<Prior>', lambda e: self._scroll(-1, 'pages'))
+        self.tree.bind('<Next>', lambda e: self._scroll(1, 'pages'))
+        self.tree.bind('<Home>', lambda e: self.jump_to(0))
+        self.tree.bind('<End>', lambda e: self.jump_to(len(self.source) - 1))
+        self.tree.bind('<<TreeviewSelect>>', self._on_select, add=True)
+
+    def heading(self, *args, **kwargs):
+        return self.tree.heading(*args, **kwargs)
+
+    def column(self, *args, **kwargs):
+        return self.tree.column(*args, **kwargs)
+
+    def selection(self):
+        return tuple(self._selected)
+
+    def bind(self, *args, **kwargs):
+        return self.tree.bind(*args, **kwargs)
+
+    def _row_height(self):
+        return int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+
+    def _on_resize(self, event):
+        # The heading takes about one row
+        self.window.visible = max(1, event.height // self._row_height() - 1)
+        self.render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.window.moveto(amount)
+            self.render()
+        else:
+            self._scroll(int(amount), unit)
+
+    def _scroll(self, amount, unit):
+        self.window.scroll(amount * (self.window.visible if unit == 'pages' else 3))
+        self.render()
+        return 'break'
+
+    def _on_select(self, event):
+        on_screen = set(self.tree.get_children())
+        self._selected = (self._selected - on_screen) | set(self.tree.selection())
+
+    def _rows(self, start, stop):
+        cache_stop = self._cache_start + len(self._cache)
+        if start < self._cache_start or stop > cache_stop:
+            self._cache_start = max(0, start - self.buffer)
+            self._cache = self.source.rows(self._cache_start, stop + self.buffer)
+        return self._cache[start - self._cache_start:stop - self._cache_start]
+
+    def render(self):
+        """Redraw the rows in the current window."""
+        self.window.total = len(self.source)
+        self.window.clamp()
+        self.tree.delete(*self.tree.get_children())
+        for iid, values in self._rows(self.window.top, self.window.bottom):
+            self.tree.insert('', 'end', iid=iid, values=values)
+        visible_selection = [iid for iid in self._selected if self.tree.exists(iid)]
+        if visible_selection:
+            self.tree.selection_set(visible_selection)
+        self.scrollbar.set(*self.window.fractions())
+
+    def refresh(self):
+        """Re-read the source keys (after rows were added or removed) and redraw."""
+        self.source.refresh()
+        self._cache = []
+        self._selected = {iid for iid in self._selected if self.source.index(iid) is not None}
+        self.render()
+
+    def jump_to(self, index):
+        self.window.show(max(0, min(index, len(self.source) - 1)))
+        self.render()
+        return 'break'
+
+    def set_filter(self, keys):
+        self.source.set_filter(keys)
+        self.window.top = 0
+        self._cache = []
+        self.render()
+
+    def exists(self, iid):
+        return self.source.index(iid) is not None
+
+    def selection_set(self, iids):
+        self._selected = set(iids)
+        self.render()
+
+    def see(self, iid):
+        """Scroll the least distance that brings iid on screen."""
+        index = self.source.index(iid)
+        if index is not None:
+            self.jump_to(index)
+
+
+class BackgroundSearch:
+    """Runs search(query) on a worker thread, keeping only the newest query.
+
+    submit() replaces any query that has not started yet, and a result that
+    finishes after a newer submit() is dropped, so typing quickly never
+    queues up stale searches. The Tk thread collects results with poll().
+    """
+
+    def __init__(self, search):
+        self.search = search
+        self.cancelled = 0
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._query = None
+        self._running = False
+        self._result = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='library-search', daemon=True)
+        self._thread.start()
+
+    def submit(self, query):
+        with self._condition:
+            if self._query is not None:
+                self.cancelled += 1
+            self._generation += 1
+            self._query = query
+            self._result = None
+            self._condition.notify()
+
+    @property
+    def busy(self):
+        with self._condition:
+            return self._query is not None or self._running
+
+    def poll(self):
+        """Return (query, results) for the newest query once it is done, else None."""
+        with self._condition:
+            result, self._result = self._result, None
+            return result
+
+    def wait(self, timeout=None):
+        """Block until the newest query is done (for callers without an event loop)."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._query is None and not self._running, timeout)
+        return self.poll()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._query is not None or self._closed)
+                if self._closed:
+                    return
+                query, generation = self._query, self._generation
+                self._query = None
+                self._running = True
+            try:
+                results = self.search(query)
+            except Exception as e:
+                results = e
+            with self._condition:
+                self._running = False
+                if generation == self._generation:
+                    self._result = (query, results)
+                else:
+                    self.cancelled += 1
+                self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class AutocompleteCombobox(ttk.Combobox):
+    """A Combobox whose drop-down holds the top `limit` completions of the typed text.
+
+    complete(text, limit) returns the display strings; it is asked again on
+    every keystroke and when the drop-down opens, so the full list of choices
+    is never built.
+    """
+
+    NAVIGATION_KEYS = ('Up', 'Down', 'Return', 'KP_Enter', 'Escape', 'Tab')
+
+    def __init__(self, master, complete, limit=20, **options):
+        super().__init__(master, postcommand=self.update_values, **options)
+        self.complete = complete
+        self.limit = limit
+        self.bind('<KeyRelease>', self._on_key)
+        self.update_values()
+
+    def update_values(self):
+        self['values'] = self.complete(self.get(), self.limit)
+
+    def _on_key(self, event):
+        if event.keysym not in self.NAVIGATION_KEYS:
+            self.update_values()